@@ -11,6 +11,40 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
 WHISPER_MODEL = os.getenv("WHISPER_MODEL", "whisper-large-v3")
 
+# AI providers: "groq", or "mock" for a local stand-in with canned outputs and simulated
+# latency (offline load tests). WHISPER_PROVIDER defaults to LLM_PROVIDER
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq").lower()
+WHISPER_PROVIDER = os.getenv("WHISPER_PROVIDER", LLM_PROVIDER).lower()
+
+# Mock provider: latency distributions in seconds ("fixed:S", "uniform:LOW,HIGH",
+# "normal:MEAN,SD" or "lognormal:MEDIAN,SIGMA"), time to first token for the LLM and
+# per transcription for Whisper; output speed; random seed; optional canned outputs file
+MOCK_LLM_LATENCY = os.getenv("MOCK_LLM_LATENCY", "lognormal:0.4,0.5")
+MOCK_LLM_TOKENS_PER_SECOND = float(os.getenv("MOCK_LLM_TOKENS_PER_SECOND", "250"))
+MOCK_WHISPER_LATENCY = os.getenv("MOCK_WHISPER_LATENCY", "lognormal:1.0,0.3")
+MOCK_SEED = int(os.getenv("MOCK_SEED", "0"))
+MOCK_RESPONSES = os.getenv("MOCK_RESPONSES")
+
+# Embeddings (study document RAG and the semantic index over notes/flashcards)
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
+# "torch" (sentence-transformers) or "onnx" (ONNX Runtime on CPU, model exported with
+# python -m backend.utils.onnx_embeddings; model_int8.onnx for int8 weights). Threads
+# per inference (0 = runtime default) and texts per batch apply to both
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", f"models/{EMBEDDING_MODEL.split('/')[-1]}-onnx")
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "model.onnx")
+EMBEDDING_POOLING = os.getenv("EMBEDDING_POOLING", "cls").lower()
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+# Texts embedded by concurrent requests are gathered into shared batches of up to
+# EMBEDDING_BATCH_SIZE, waiting at most this long for more (0 embeds each call on its own)
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+# Semantic index rows held in memory as "float32", "float16" or "int8"; with quantized
+# storage the EMBEDDING_RESCORE_FACTOR * k best approximate hits are scored again with
+# the float32 vectors in the database (0 returns approximate scores)
+EMBEDDING_STORAGE = os.getenv("EMBEDDING_STORAGE", "float32").lower()
+EMBEDDING_RESCORE_FACTOR = int(os.getenv("EMBEDDING_RESCORE_FACTOR", "4"))
+
 # Database
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
@@ -18,7 +52,63 @@ DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "5432")
 DB_NAME = os.getenv("DB_NAME")
 
-DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# "postgresql" (default) or "sqlite" (embedded database file, e.g. for the desktop app)
+DB_BACKEND = os.getenv("DB_BACKEND", "postgresql").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "studykeet.db")
+
+if DB_BACKEND == "sqlite":
+    DATABASE_URL = f"sqlite:///{SQLITE_PATH}"
+    DEFAULT_ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{SQLITE_PATH}"
+else:
+    DATABASE_URL = f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    DEFAULT_ASYNC_DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+# Async engine (serves the notes and flashcards CRUD routes when enabled)
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() == "true"
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", DEFAULT_ASYNC_DATABASE_URL)
+
+# Connection pool (applies to both engines)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Spaced repetition: "leitner", "sm2" or "fsrs"
+SCHEDULER_ALGORITHM = os.getenv("SCHEDULER_ALGORITHM", "leitner")
+
+# Flashcards whose questions are at least this similar (estimated Jaccard, 0-1) count as duplicates
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.6"))
+
+# Flashcard generation: longer inputs are split into sections of about this many
+# characters, generated concurrently (at most this many LLM calls at once) and merged
+FLASHCARD_SECTION_CHARS = int(os.getenv("FLASHCARD_SECTION_CHARS", "8000"))
+FLASHCARD_GENERATION_CONCURRENCY = int(os.getenv("FLASHCARD_GENERATION_CONCURRENCY", "4"))
+
+# LLM dispatch: Groq rate limits shared by every LLM call (0 disables a limit), and the
+# output tokens assumed for a call until its response reports the real usage
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "12000"))
+LLM_OUTPUT_TOKEN_ESTIMATE = int(os.getenv("LLM_OUTPUT_TOKEN_ESTIMATE", "1024"))
+
+# Study RAG context: chunks are picked by maximal marginal relevance among the
+# CONTEXT_CANDIDATES most relevant (lambda: 1 = relevance only, 0 = diversity only)
+# until CONTEXT_TOKEN_BUDGET prompt tokens are used
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "700"))
+CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7"))
+CONTEXT_CANDIDATES = int(os.getenv("CONTEXT_CANDIDATES", "12"))
+
+# Study document retrieval: "adaptive" puts documents of up to RETRIEVAL_FULL_TEXT_TOKENS
+# into the prompt whole and retrieves "hybrid" from longer ones (the
+# RETRIEVAL_LEXICAL_CANDIDATES best BM25 chunks, re-ranked by embedding similarity);
+# "hybrid" always retrieves; "dense" embeds every chunk into Chroma
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "adaptive").lower()
+RETRIEVAL_FULL_TEXT_TOKENS = int(os.getenv("RETRIEVAL_FULL_TEXT_TOKENS", "1500"))
+RETRIEVAL_LEXICAL_CANDIDATES = int(os.getenv("RETRIEVAL_LEXICAL_CANDIDATES", "24"))
+
+# /grade: "separate" (coverage and accuracy prompts, two LLM calls) or "structured"
+# (one JSON-mode call rendered into the same two texts); requests may override it
+GRADING_MODE = os.getenv("GRADING_MODE", "separate").lower()
 
 # File Upload
 UPLOAD_DIR = "files"
@@ -1,51 +1,270 @@
 """
 Database models and session management
 """
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime
+from sqlalchemy import (
+    create_engine, event, inspect, text, Column, Integer, SmallInteger, Float, String, Text, DateTime,
+    LargeBinary, ForeignKey, Index
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
-from backend.config import DATABASE_URL
+import threading
+from backend.config import (
+    DATABASE_URL, DB_BACKEND, DB_ASYNC, ASYNC_DATABASE_URL,
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+)
+from backend.utils.search import setup_search
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+POOL_OPTIONS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+
+# Embedded mode: WAL lets reads run alongside the single writer, and NORMAL sync is
+# durable in WAL mode while skipping an fsync per commit
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "busy_timeout": 5000,      # ms to wait for the write lock
+    "cache_size": -65536,      # 64 MB page cache
+    "temp_store": "MEMORY",
+    "mmap_size": 268435456,    # 256 MB memory-mapped reads
+}
+
+
+def engine_options(url: str) -> dict:
+    if url.startswith("sqlite"):
+        # A local file needs neither liveness pings nor connection recycling
+        return {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "connect_args": {"check_same_thread": False},
+        }
+    return POOL_OPTIONS
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+# Engines are created by init_db() at application startup, not at import time
+engine = None
+async_engine = None
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+AsyncSessionLocal = None
+_init_lock = threading.Lock()
 
 Base = declarative_base()
 
 
+class SubjectModel(Base):
+    """One row per subject name, with cached note and flashcard counts (see backend/utils/subjects.py)"""
+    __tablename__ = "subjects"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(255), nullable=False, unique=True)
+    note_count = Column(Integer, nullable=False, default=0)
+    flashcard_count = Column(Integer, nullable=False, default=0)
+
+
 class NoteModel(Base):
     __tablename__ = "notes"
+    __table_args__ = (
+        Index("ix_notes_subject", "subject"),
+        Index("ix_notes_subject_id", "subject_id"),
+        Index("ix_notes_updated_at", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     subject = Column(String(255))
+    subject_id = Column(Integer, ForeignKey("subjects.id", ondelete="SET NULL"), nullable=True)
     title = Column(String(255))
     content = Column(Text)
     color = Column(String(50))
-    timestamp = Column(DateTime, default=datetime.now())
+    timestamp = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
 
 class FlashcardModel(Base):
     __tablename__ = "flashcards"
+    __table_args__ = (
+        Index("ix_flashcards_subject_next_review", "subject", "next_review"),
+        Index("ix_flashcards_next_review_box", "next_review", "leitner_box"),
+        Index("ix_flashcards_subject_id", "subject_id"),
+        Index("ix_flashcards_updated_at", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     subject = Column(String(255))
+    subject_id = Column(Integer, ForeignKey("subjects.id", ondelete="SET NULL"), nullable=True)
     question = Column(Text)
     answer = Column(Text)
     color = Column(String(50))
-    timestamp = Column(DateTime, default=datetime.now())
+    timestamp = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
     leitner_box = Column(Integer, default=1, nullable=True)
     next_review = Column(DateTime, default=datetime.now, nullable=True)
-    review_history = Column(Text, nullable=True)
+    review_history = Column(Text, nullable=True)  # legacy JSON history, moved to review_log
+    # Scheduler state (see backend/utils/scheduler.py)
+    ease_factor = Column(Float, default=2.5, nullable=True)
+    repetitions = Column(Integer, default=0, nullable=True)
+    stability = Column(Float, nullable=True)
+    difficulty = Column(Float, nullable=True)
+    last_review = Column(DateTime, nullable=True)
+
+
+class ReviewLogModel(Base):
+    """One row per flashcard review (append-only)"""
+    __tablename__ = "review_log"
+    __table_args__ = (
+        Index("ix_review_log_card_reviewed", "flashcard_id", "reviewed_at"),
+        Index("ix_review_log_reviewed", "reviewed_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    flashcard_id = Column(Integer, ForeignKey("flashcards.id", ondelete="CASCADE"), nullable=False)
+    result = Column(String(10), nullable=False)
+    box = Column(SmallInteger)
+    reviewed_at = Column(DateTime, nullable=False)
+
+
+class ItemEmbeddingModel(Base):
+    """Embedding of one note or flashcard for semantic search (see backend/utils/semantic_index.py)"""
+    __tablename__ = "item_embeddings"
+    __table_args__ = (
+        Index("ix_item_embeddings_item", "item_type", "item_id", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    item_type = Column(String(20), nullable=False)  # "note" or "flashcard"
+    item_id = Column(Integer, nullable=False)
+    model = Column(String(255), nullable=False)
+    content_hash = Column(String(64), nullable=False)  # sha256 of the embedded text
+    vector = Column(LargeBinary, nullable=False)  # float32, L2-normalized
+    updated_at = Column(DateTime, default=datetime.now)
+
+
+class TombstoneModel(Base):
+    """A deleted note or flashcard, kept so /sync can tell clients to drop it"""
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        Index("ix_tombstones_deleted_at", "deleted_at"),
+    )
 
+    id = Column(Integer, primary_key=True)
+    item_type = Column(String(20), nullable=False)  # "note" or "flashcard"
+    item_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.now)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+
+# Columns added to existing tables after they were first created: (table, column, type, backfill)
+MIGRATION_COLUMNS = [
+    ("notes", "updated_at", "TIMESTAMP", "COALESCE(timestamp, CURRENT_TIMESTAMP)"),
+    ("flashcards", "updated_at", "TIMESTAMP", "COALESCE(timestamp, CURRENT_TIMESTAMP)"),
+    # Filled in batches by backend.utils.subjects.migrate_subjects()
+    ("notes", "subject_id", "INTEGER REFERENCES subjects(id) ON DELETE SET NULL", None),
+    ("flashcards", "subject_id", "INTEGER REFERENCES subjects(id) ON DELETE SET NULL", None),
+    # Scheduler state (backend/utils/scheduler.py); NULL until a card's first review
+    ("flashcards", "ease_factor", "FLOAT", "2.5"),
+    ("flashcards", "repetitions", "INTEGER", "0"),
+    ("flashcards", "stability", "FLOAT", None),
+    ("flashcards", "difficulty", "FLOAT", None),
+    ("flashcards", "last_review", "TIMESTAMP", None),
+]
+
+
+def add_missing_columns(bind):
+    """Add MIGRATION_COLUMNS missing from tables that predate them, backfilling existing rows"""
+    inspector = inspect(bind)
+    existing = {table: {column["name"] for column in inspector.get_columns(table)}
+                for table in {table for table, *_ in MIGRATION_COLUMNS}}
+    with bind.begin() as conn:
+        for table, column, column_type, backfill in MIGRATION_COLUMNS:
+            if column in existing[table]:
+                continue
+            print(f"Adding {table}.{column}")
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+            if backfill is not None:
+                conn.execute(text(f"UPDATE {table} SET {column} = {backfill} WHERE {column} IS NULL"))
+
+
+def create_indexes(bind):
+    """Create any model indexes missing from tables that predate them"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+
+def init_db():
+    """Create the engines, then any missing tables and indexes (idempotent)"""
+    global engine, async_engine, AsyncSessionLocal
+    with _init_lock:
+        if engine is not None:
+            return engine
+
+        new_engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+        if DB_BACKEND == "sqlite":
+            event.listen(new_engine, "connect", set_sqlite_pragmas)
+
+        # Create tables
+        Base.metadata.create_all(bind=new_engine)
+        add_missing_columns(new_engine)
+        create_indexes(new_engine)
+        setup_search(new_engine)
+        SessionLocal.configure(bind=new_engine)
+
+        from backend.utils.review_log import migrate_review_history
+        from backend.utils.subjects import migrate_subjects
+        migrate_subjects(new_engine)
+        migrate_review_history(new_engine)
+
+        if DB_ASYNC:
+            from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+            async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+            if ASYNC_DATABASE_URL.startswith("sqlite"):
+                event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+            AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+        engine = new_engine
+        return engine
+
+
+async def close_db():
+    """Dispose of connection pools (application shutdown)"""
+    global engine, async_engine, AsyncSessionLocal
+    with _init_lock:
+        if async_engine is not None:
+            await async_engine.dispose()
+        if engine is not None:
+            engine.dispose()
+        engine = None
+        async_engine = None
+        AsyncSessionLocal = None
 
 
 def get_db():
     """Dependency for database sessions"""
+    if engine is None:
+        init_db()
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency for async database sessions (DB_ASYNC=true)"""
+    if AsyncSessionLocal is None:
+        init_db()
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,26 +1,64 @@
 """
 Flashcards CRUD and Leitner spaced repetition API endpoints
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, BackgroundTasks, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import distinct, text
+from sqlalchemy import func, text
 from typing import List, Optional
-from datetime import datetime, timedelta
-import json as py_json
+from collections import Counter
+from datetime import datetime
+import numpy as np
+import orjson
 
-from backend.database import get_db, FlashcardModel
+from backend.config import DEDUP_THRESHOLD
+from backend.database import get_db, SessionLocal, FlashcardModel, ReviewLogModel, SubjectModel
 from backend.schemas import (
     FlashcardCreate, FlashcardUpdate, FlashcardRead,
-    ReviewRequest, FlashcardGenerationRequest
+    ReviewRequest, ReviewBatchRequest, ReviewLogRead, FlashcardGenerationRequest, FlashcardBulkCreate
+)
+from backend.utils.flashcard_generator import (
+    generate_flashcards_from_content, get_prompt_for_source_type, stream_flashcards_from_content
+)
+from backend.utils.deck_io import (
+    COMPRESSIONS, DeckFormatError, DeckImporter, DeckReader, export_lines, gzip_chunks
+)
+from backend.utils.dedup import DUPLICATE_ACTIONS, near_duplicates
+from backend.utils.due_queue import due_queue
+from backend.utils.llm_dispatcher import INTERACTIVE
+from backend.utils.review_log import REVIEW_LOG_MIGRATION_BATCH, migrate_review_history
+from backend.utils.semantic_index import semantic_index, item_text
+from backend.utils.serialization import FLASHCARD_COLUMNS, FLASHCARD_FIELDS, json_rows
+from backend.utils.subjects import adjust_counts, subject_names_query
+from backend.utils.sync import tombstones
+from backend.utils.versions import etag_headers, not_modified, table_versions
+from backend.utils.scheduler import (
+    CARD_FIELDS, RATINGS, Deck, get_scheduler, ratings_from_results, review_card, to_datetime64
 )
-from backend.utils.flashcard_generator import generate_flashcards_from_content
 
 router = APIRouter()
 
+RESCHEDULE_UPDATE_BATCH = 5000
+ID_LOOKUP_BATCH = 1000
+REVIEW_LOG_FIELDS = ("flashcard_id", "result", "box", "reviewed_at")
+
+# Columns added after the flashcards table was first created
+FLASHCARD_MIGRATION_COLUMNS = [
+    ("leitner_box", "INTEGER DEFAULT 1"),
+    ("next_review", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP"),
+    ("review_history", "TEXT"),
+    ("ease_factor", "FLOAT DEFAULT 2.5"),
+    ("repetitions", "INTEGER DEFAULT 0"),
+    ("stability", "FLOAT"),
+    ("difficulty", "FLOAT"),
+    ("last_review", "TIMESTAMP"),
+]
+
 
 # CRUD Operations
-@router.post("/flashcards/")
-def add_flashcard(flashcard: FlashcardCreate, db: Session = Depends(get_db)):
+@router.post("/flashcards/", response_model=FlashcardRead)
+def add_flashcard(flashcard: FlashcardCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     """Create a new flashcard"""
     db_flashcard = FlashcardModel(
         subject=flashcard.subject,
@@ -31,46 +69,89 @@ def add_flashcard(flashcard: FlashcardCreate, db: Session = Depends(get_db)):
     db.add(db_flashcard)
     db.commit()
     db.refresh(db_flashcard)
+    due_queue.upsert(db_flashcard.id, db_flashcard.subject, db_flashcard.next_review, db_flashcard.leitner_box)
+    near_duplicates.upsert(db_flashcard.id, db_flashcard.subject, db_flashcard.question)
+    background_tasks.add_task(semantic_index.update_items, [("flashcard", db_flashcard.id, item_text("flashcard", db_flashcard))])
     return db_flashcard
 
 
-@router.get("/flashcards/")
-def get_flashcards(subject: Optional[str] = None, db: Session = Depends(get_db)):
-    """Get all flashcards, optionally filtered by subject"""
+@router.get("/flashcards/", response_model=List[FlashcardRead])
+def get_flashcards(request: Request, subject: Optional[str] = None, db: Session = Depends(get_db)):
+    """Get all flashcards, optionally filtered by subject (304 if the If-None-Match ETag is current)"""
+    etag = table_versions.etag("flashcards", subject or None)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
     try:
+        query = db.query(*FLASHCARD_COLUMNS)
         if subject:
-            cards = db.query(FlashcardModel).filter(FlashcardModel.subject == subject).all()
-        else:
-            cards = db.query(FlashcardModel).all()
-        
-        result = []
-        for card in cards:
-            card_dict = {
-                "id": card.id,
-                "subject": card.subject,
-                "question": card.question,
-                "answer": card.answer,
-                "color": card.color,
-                "leitner_box": getattr(card, 'leitner_box', 1) or 1,
-                "next_review": getattr(card, 'next_review', None),
-                "review_history": getattr(card, 'review_history', None)
-            }
-            result.append(card_dict)
-        return result
+            query = query.filter(FlashcardModel.subject == subject)
+        return json_rows(FLASHCARD_FIELDS, query.all(), headers=etag_headers(etag))
     except Exception as e:
         print(f"Error fetching flashcards: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/flashcards/subjects", response_model=List[str])
-def get_unique_flashcard_subjects(db: Session = Depends(get_db)):
+def get_unique_flashcard_subjects(request: Request, response: Response, db: Session = Depends(get_db)):
     """Get list of unique subjects"""
-    subjects = db.query(distinct(FlashcardModel.subject)).all()
-    return [subject[0] for subject in subjects]
+    etag = table_versions.etag("flashcards")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    subjects = db.execute(subject_names_query("flashcards")).scalars().all()
+    response.headers.update(etag_headers(etag))
+    return subjects
+
+
+@router.post("/flashcards/bulk")
+def add_flashcards_bulk(request: FlashcardBulkCreate, background_tasks: BackgroundTasks,
+                        db: Session = Depends(get_db)):
+    """Create many flashcards in one transaction (near duplicates are skipped by default)"""
+    try:
+        keep, duplicates = near_duplicates.screen(
+            db, [(card.subject, card.question) for card in request.flashcards], request.on_duplicate
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    new_flashcards = [
+        FlashcardModel(**request.flashcards[idx].model_dump(), leitner_box=1, next_review=datetime.now())
+        for idx in keep
+    ]
+    db.add_all(new_flashcards)
+    db.flush()
+    saved = [saved_card_state(c) for c in new_flashcards]
+    created = [FlashcardRead.model_validate(c) for c in new_flashcards]
+    db.commit()
+    index_saved_cards(saved, background_tasks)
+
+    return {
+        "flashcards": created,
+        "count": len(created),
+        "duplicates": duplicates,
+        "skipped": len(request.flashcards) - len(keep)
+    }
+
+
+def saved_card_state(card: FlashcardModel) -> tuple:
+    """What index_saved_cards() needs from a flushed card, read before commit expires it"""
+    return card.id, card.subject, card.question, card.next_review, card.leitner_box, item_text("flashcard", card)
 
 
-@router.put("/flashcards/{flashcard_id}")
-def update_flashcard(flashcard_id: int, flashcard: FlashcardUpdate, db: Session = Depends(get_db)):
+def index_saved_cards(saved, background_tasks: BackgroundTasks):
+    """Add newly committed cards to the due queue, duplicate index and semantic index"""
+    for card_id, subject, question, next_review, box, _ in saved:
+        due_queue.upsert(card_id, subject, next_review, box)
+        near_duplicates.upsert(card_id, subject, question)
+    background_tasks.add_task(
+        semantic_index.update_items, [("flashcard", card_id, text) for card_id, *_, text in saved]
+    )
+
+
+@router.put("/flashcards/{flashcard_id}", response_model=FlashcardRead)
+def update_flashcard(flashcard_id: int, flashcard: FlashcardUpdate, background_tasks: BackgroundTasks,
+                     db: Session = Depends(get_db)):
     """Update an existing flashcard"""
     db_flashcard = db.query(FlashcardModel).filter(FlashcardModel.id == flashcard_id).first()
     
@@ -81,45 +162,38 @@ def update_flashcard(flashcard_id: int, flashcard: FlashcardUpdate, db: Session
         setattr(db_flashcard, key, value)
     db.commit()
     db.refresh(db_flashcard)
+    due_queue.upsert(db_flashcard.id, db_flashcard.subject, db_flashcard.next_review, db_flashcard.leitner_box)
+    near_duplicates.upsert(db_flashcard.id, db_flashcard.subject, db_flashcard.question)
+    background_tasks.add_task(semantic_index.update_items, [("flashcard", db_flashcard.id, item_text("flashcard", db_flashcard))])
     return db_flashcard
 
 
 @router.delete("/flashcards/{flashcard_id}")
-def delete_flashcard(flashcard_id: int, db: Session = Depends(get_db)):
+def delete_flashcard(flashcard_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     """Delete a flashcard"""
     db_flashcard = db.query(FlashcardModel).filter(FlashcardModel.id == flashcard_id).first()
     if db_flashcard:
         db.delete(db_flashcard)
         db.commit()
+        due_queue.remove(flashcard_id)
+        near_duplicates.remove(flashcard_id)
+        background_tasks.add_task(semantic_index.remove_items, [("flashcard", flashcard_id)])
     return {"message": "Flashcard deleted"}
 
 
 # Leitner System Endpoints
 @router.post("/flashcards/migrate")
 def migrate_flashcards(db: Session = Depends(get_db)):
-    """Migration endpoint to add Leitner columns"""
+    """Migration endpoint to add Leitner and scheduler columns"""
     try:
         # Try to add columns if they don't exist
-        try:
-            db.execute(text("ALTER TABLE flashcards ADD COLUMN leitner_box INTEGER DEFAULT 1"))
-            db.commit()
-        except Exception as e:
-            db.rollback()
-            print(f"leitner_box column might already exist: {e}")
-        
-        try:
-            db.execute(text("ALTER TABLE flashcards ADD COLUMN next_review TIMESTAMP DEFAULT CURRENT_TIMESTAMP"))
-            db.commit()
-        except Exception as e:
-            db.rollback()
-            print(f"next_review column might already exist: {e}")
-        
-        try:
-            db.execute(text("ALTER TABLE flashcards ADD COLUMN review_history TEXT"))
-            db.commit()
-        except Exception as e:
-            db.rollback()
-            print(f"review_history column might already exist: {e}")
+        for column, column_type in FLASHCARD_MIGRATION_COLUMNS:
+            try:
+                db.execute(text(f"ALTER TABLE flashcards ADD COLUMN {column} {column_type}"))
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"{column} column might already exist: {e}")
         
         # Update any NULL values
         flashcards = db.query(FlashcardModel).all()
@@ -134,61 +208,127 @@ def migrate_flashcards(db: Session = Depends(get_db)):
                 updated_count += 1
         
         db.commit()
+        due_queue.invalidate()
+        migrated_reviews = migrate_review_history(db.get_bind())
         return {
             "message": f"Migration successful. Updated {updated_count} flashcard fields",
-            "total_cards": len(flashcards)
+            "total_cards": len(flashcards),
+            "migrated_reviews": migrated_reviews
         }
     except Exception as e:
         return {"message": f"Migration completed with warnings: {str(e)}"}
 
 
-@router.get("/flashcards/due")
-def get_due_flashcards(subject: Optional[str] = None, db: Session = Depends(get_db)):
-    """Get cards due for review today"""
+@router.get("/flashcards/due", response_model=List[FlashcardRead])
+def get_due_flashcards(subject: Optional[str] = None, limit: Optional[int] = Query(None, ge=1),
+                       db: Session = Depends(get_db)):
+    """Get cards due for review (optionally only the next `limit` cards)"""
     try:
-        now = datetime.now()
-        query = db.query(FlashcardModel).filter(FlashcardModel.next_review <= now)
+        due_ids = due_queue.due(db, subject, datetime.now(), limit)
         
-        if subject:
-            query = query.filter(FlashcardModel.subject == subject)
-            
-        due_cards = query.order_by(FlashcardModel.leitner_box.asc()).all()
+        rows = {}
+        for start in range(0, len(due_ids), ID_LOOKUP_BATCH):
+            batch_ids = due_ids[start:start + ID_LOOKUP_BATCH]
+            for row in db.query(*FLASHCARD_COLUMNS).filter(FlashcardModel.id.in_(batch_ids)).all():
+                rows[row[0]] = row
         
-        result = []
-        for card in due_cards:
-            card_dict = {
-                "id": card.id,
-                "subject": card.subject,
-                "question": card.question,
-                "answer": card.answer,
-                "color": card.color,
-                "leitner_box": getattr(card, 'leitner_box', 1) or 1,
-                "next_review": getattr(card, 'next_review', None),
-                "review_history": getattr(card, 'review_history', None)
-            }
-            result.append(card_dict)
-        return result
+        return json_rows(FLASHCARD_FIELDS, (rows[card_id] for card_id in due_ids if card_id in rows))
     except Exception as e:
         print(f"Error fetching due flashcards: {e}")
-        # Fallback: return all cards
-        cards = db.query(FlashcardModel).all()
-        result = []
-        for card in cards:
-            card_dict = {
-                "id": card.id,
-                "subject": card.subject,
-                "question": card.question,
-                "answer": card.answer,
-                "color": card.color,
-                "leitner_box": 1,
-                "next_review": None,
-                "review_history": None
+        due_queue.invalidate()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/flashcards/review/batch")
+def review_flashcards_batch(batch: ReviewBatchRequest, db: Session = Depends(get_db)):
+    """Apply an ordered list of reviews in one transaction (e.g. a synced offline session)"""
+    scheduler = get_scheduler()
+    card_ids = {entry.card_id for entry in batch.reviews}
+    states = {}
+    if card_ids:
+        rows = db.query(
+            FlashcardModel.id, *[getattr(FlashcardModel, field) for field in CARD_FIELDS]
+        ).filter(FlashcardModel.id.in_(card_ids)).all()
+        states = {row[0]: tuple(row[1:]) for row in rows}
+
+    received_at = datetime.now()
+    results = [None] * len(batch.reviews)
+    # Split entries into rounds with at most one review per card; each round is one vectorized pass
+    rounds = []
+    seen = {}
+    for position, entry in enumerate(batch.reviews):
+        if entry.result not in RATINGS:
+            results[position] = {"card_id": entry.card_id, "status": "invalid_result"}
+            continue
+        if entry.card_id not in states:
+            results[position] = {"card_id": entry.card_id, "status": "not_found"}
+            continue
+        reviewed_at = entry.reviewed_at or received_at
+        if reviewed_at.tzinfo is not None:
+            # Stored timestamps are naive local time
+            reviewed_at = reviewed_at.astimezone().replace(tzinfo=None)
+        round_index = seen.get(entry.card_id, 0)
+        seen[entry.card_id] = round_index + 1
+        if round_index == len(rounds):
+            rounds.append([])
+        rounds[round_index].append((position, entry.card_id, entry.result, reviewed_at))
+
+    updates = {}
+    log_rows = []
+    for entries in rounds:
+        ids = [card_id for _, card_id, _, _ in entries]
+        deck = Deck.from_rows([states[card_id] for card_id in ids])
+        deck = scheduler.review(
+            deck,
+            ratings_from_results([result for _, _, result, _ in entries]),
+            to_datetime64([reviewed_at for _, _, _, reviewed_at in entries])
+        )
+        next_reviews = scheduler.next_review(deck).astype("datetime64[us]").tolist()
+        for (position, card_id, result, reviewed_at), state, next_review in zip(
+            entries, deck.to_rows(), next_reviews
+        ):
+            states[card_id] = state
+            box = state[0]
+            # Later entries for the same card win
+            updates[card_id] = {
+                "id": card_id,
+                **dict(zip(CARD_FIELDS, state)),
+                "next_review": next_review
             }
-            result.append(card_dict)
-        return result
+            log_rows.append({
+                "flashcard_id": card_id,
+                "result": result,
+                "box": box,
+                "reviewed_at": reviewed_at
+            })
+            results[position] = {
+                "card_id": card_id,
+                "status": "ok",
+                "leitner_box": box,
+                "next_review": next_review
+            }
+
+    if updates:
+        try:
+            db.bulk_update_mappings(FlashcardModel, list(updates.values()))
+            db.bulk_insert_mappings(ReviewLogModel, log_rows)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error applying review batch: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+        table_versions.bump("flashcards")
+        for update in updates.values():
+            due_queue.update_schedule(update["id"], update["next_review"], update["leitner_box"])
+
+    return {
+        "reviewed": len(log_rows),
+        "cards_updated": len(updates),
+        "results": results
+    }
 
 
-@router.post("/flashcards/review/{flashcard_id}")
+@router.post("/flashcards/review/{flashcard_id}", response_model=FlashcardRead)
 def review_flashcard(flashcard_id: int, review: ReviewRequest, db: Session = Depends(get_db)):
     """Review a flashcard (mark again/hard/good/easy)"""
     flashcard = db.query(FlashcardModel).filter(FlashcardModel.id == flashcard_id).first()
@@ -196,47 +336,255 @@ def review_flashcard(flashcard_id: int, review: ReviewRequest, db: Session = Dep
     if not flashcard:
         raise HTTPException(status_code=404, detail="Flashcard not found")
     
-    # Update Leitner nest based on result
-    if review.result == "again":
-        flashcard.leitner_box = 1
-        flashcard.next_review = datetime.now() + timedelta(minutes=15)
-    elif review.result == "hard":
-        flashcard.leitner_box = 2
-        flashcard.next_review = datetime.now() + timedelta(days=1)
-    elif review.result == "good":
-        flashcard.leitner_box = 3
-        flashcard.next_review = datetime.now() + timedelta(days=2)
-    elif review.result == "easy":
-        flashcard.leitner_box = 4
-        flashcard.next_review = datetime.now() + timedelta(days=7)
-    else:
+    if review.result not in RATINGS:
         raise HTTPException(
             status_code=400,
             detail="Invalid result. Use 'again', 'hard', 'good', or 'easy'"
         )
     
-    # Update review history
-    history = []
-    if flashcard.review_history:
-        try:
-            history = py_json.loads(flashcard.review_history)
-        except:
-            history = []
-    
-    history.append({
-        "date": datetime.now().isoformat(),
-        "result": review.result,
-        "box": flashcard.leitner_box
-    })
+    # Update scheduling state (Leitner nest, next review) with the configured scheduler
+    reviewed_at = datetime.now()
+    review_card(flashcard, review.result, reviewed_at)
     
-    flashcard.review_history = py_json.dumps(history)
+    # Append to review log
+    db.add(ReviewLogModel(
+        flashcard_id=flashcard.id,
+        result=review.result,
+        box=flashcard.leitner_box,
+        reviewed_at=reviewed_at
+    ))
     
     db.commit()
     db.refresh(flashcard)
+    due_queue.upsert(flashcard.id, flashcard.subject, flashcard.next_review, flashcard.leitner_box)
     return flashcard
 
 
-@router.post("/flashcards/reset/{flashcard_id}")
+@router.post("/flashcards/reschedule")
+def reschedule_flashcards(algorithm: Optional[str] = None, subject: Optional[str] = None,
+                          db: Session = Depends(get_db)):
+    """Recompute next_review for the whole deck (or one subject) under a scheduling algorithm"""
+    try:
+        scheduler = get_scheduler(algorithm)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    query = db.query(
+        FlashcardModel.id, FlashcardModel.next_review,
+        *[getattr(FlashcardModel, field) for field in CARD_FIELDS]
+    )
+    if subject:
+        query = query.filter(FlashcardModel.subject == subject)
+    rows = query.all()
+    if not rows:
+        return {"message": "No flashcards to reschedule", "algorithm": scheduler.name, "updated": 0}
+
+    ids = [row[0] for row in rows]
+    current = to_datetime64([row[1] for row in rows])
+    deck = Deck.from_rows(row[2:] for row in rows)
+    next_reviews = scheduler.reschedule(deck, current)
+    changed = np.flatnonzero((next_reviews != current) & ~np.isnat(next_reviews))
+    new_values = next_reviews[changed].astype("datetime64[us]").tolist()
+
+    try:
+        for start in range(0, len(changed), RESCHEDULE_UPDATE_BATCH):
+            db.bulk_update_mappings(FlashcardModel, [
+                {"id": ids[index], "next_review": value}
+                for index, value in zip(changed[start:start + RESCHEDULE_UPDATE_BATCH].tolist(),
+                                        new_values[start:start + RESCHEDULE_UPDATE_BATCH])
+            ])
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Error rescheduling flashcards: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    due_queue.invalidate()
+    table_versions.bump("flashcards")
+
+    return {
+        "message": f"Rescheduled {len(changed)} of {len(ids)} flashcards",
+        "algorithm": scheduler.name,
+        "updated": int(len(changed))
+    }
+
+
+# Review History
+@router.post("/flashcards/history/migrate")
+def migrate_flashcard_history(batch_size: int = Query(REVIEW_LOG_MIGRATION_BATCH, ge=1, le=10000),
+                              db: Session = Depends(get_db)):
+    """Migrate legacy review_history JSON into the review_log table"""
+    try:
+        migrated = migrate_review_history(db.get_bind(), batch_size)
+    except Exception as e:
+        db.rollback()
+        print(f"Error migrating review history: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"message": f"Migrated {migrated} reviews", "migrated_reviews": migrated}
+
+
+@router.get("/flashcards/history", response_model=List[ReviewLogRead])
+def get_review_history(
+    subject: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """Get review log entries, optionally filtered by subject and date range"""
+    query = db.query(
+        ReviewLogModel.flashcard_id, ReviewLogModel.result,
+        ReviewLogModel.box, ReviewLogModel.reviewed_at
+    )
+    if subject:
+        query = query.join(FlashcardModel, FlashcardModel.id == ReviewLogModel.flashcard_id).filter(
+            FlashcardModel.subject == subject
+        )
+    if since:
+        query = query.filter(ReviewLogModel.reviewed_at >= since)
+    if until:
+        query = query.filter(ReviewLogModel.reviewed_at < until)
+    rows = query.order_by(ReviewLogModel.reviewed_at.desc()).offset(offset).limit(limit).all()
+    return json_rows(REVIEW_LOG_FIELDS, rows)
+
+
+@router.get("/flashcards/{flashcard_id}/history", response_model=List[ReviewLogRead])
+def get_flashcard_history(
+    flashcard_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db)
+):
+    """Get the review log of a single flashcard"""
+    query = db.query(
+        ReviewLogModel.flashcard_id, ReviewLogModel.result,
+        ReviewLogModel.box, ReviewLogModel.reviewed_at
+    ).filter(ReviewLogModel.flashcard_id == flashcard_id)
+    if since:
+        query = query.filter(ReviewLogModel.reviewed_at >= since)
+    if until:
+        query = query.filter(ReviewLogModel.reviewed_at < until)
+    rows = query.order_by(ReviewLogModel.reviewed_at.desc()).limit(limit).all()
+    return json_rows(REVIEW_LOG_FIELDS, rows)
+
+
+@router.post("/flashcards/dedup")
+def dedup_flashcards(background_tasks: BackgroundTasks, subject: Optional[str] = None,
+                     threshold: float = Query(DEDUP_THRESHOLD, gt=0, le=1), dry_run: bool = True,
+                     db: Session = Depends(get_db)):
+    """Find groups of near-duplicate cards; unless dry_run, keep the most-reviewed card of each group"""
+    try:
+        groups = near_duplicates.groups(db, subject, threshold)
+        card_ids = [card_id for group in groups for card_id in group]
+        progress = {}
+        for start in range(0, len(card_ids), ID_LOOKUP_BATCH):
+            batch_ids = card_ids[start:start + ID_LOOKUP_BATCH]
+            for card_id, question, repetitions, last_review in db.query(
+                FlashcardModel.id, FlashcardModel.question, FlashcardModel.repetitions, FlashcardModel.last_review
+            ).filter(FlashcardModel.id.in_(batch_ids)):
+                progress[card_id] = (question, repetitions or 0, last_review is not None)
+
+        report = []
+        removed = []
+        for group in groups:
+            group = [card_id for card_id in group if card_id in progress]
+            if len(group) < 2:
+                continue
+            # Most reviews first, then reviewed at all, then oldest
+            kept = min(group, key=lambda card_id: (-progress[card_id][1], not progress[card_id][2], card_id))
+            duplicates = [card_id for card_id in group if card_id != kept]
+            report.append({
+                "kept": kept,
+                "question": progress[kept][0],
+                "duplicates": duplicates
+            })
+            removed.extend(duplicates)
+
+        if not dry_run and removed:
+            removed_per_subject = Counter()
+            for start in range(0, len(removed), ID_LOOKUP_BATCH):
+                batch_filter = FlashcardModel.id.in_(removed[start:start + ID_LOOKUP_BATCH])
+                removed_per_subject.update(dict(
+                    db.query(FlashcardModel.subject_id, func.count()).filter(batch_filter)
+                    .group_by(FlashcardModel.subject_id).all()
+                ))
+                db.query(FlashcardModel).filter(batch_filter).delete(synchronize_session=False)
+            removed_per_subject.pop(None, None)
+            adjust_counts(db, "flashcards", {subject_id: -count for subject_id, count in removed_per_subject.items()})
+            db.add_all(tombstones("flashcard", removed))
+            db.commit()
+            for card_id in removed:
+                due_queue.remove(card_id)
+                near_duplicates.remove(card_id)
+            background_tasks.add_task(semantic_index.remove_items, [("flashcard", card_id) for card_id in removed])
+            print(f"Removed {len(removed)} near-duplicate flashcards")
+
+        return {"groups": report, "duplicates": len(removed), "removed": 0 if dry_run else len(removed)}
+    except Exception as e:
+        print(f"Error deduplicating flashcards: {e}")
+        near_duplicates.invalidate()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Export / Import
+def export_stream(subject: Optional[str]):
+    """Export chunks read in a session of their own, open for as long as the response streams"""
+    with SessionLocal() as db:
+        yield from export_lines(db, subject)
+
+
+@router.get("/flashcards/export")
+def export_flashcards(subject: Optional[str] = None, compression: str = "none"):
+    """Stream the deck (or one subject) as NDJSON with scheduler state and review history"""
+    if compression not in COMPRESSIONS:
+        raise HTTPException(status_code=400, detail=f"Invalid compression: {compression}. Use 'none' or 'gzip'")
+    chunks = export_stream(subject or None)
+    filename = "studykeet-deck.ndjson"
+    media_type = "application/x-ndjson"
+    if compression == "gzip":
+        chunks = gzip_chunks(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(chunks, media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+@router.post("/flashcards/import")
+async def import_flashcards(request: Request, background_tasks: BackgroundTasks, subject: Optional[str] = None,
+                            db: Session = Depends(get_db)):
+    """Import an export stream (raw request body, plain or gzipped) in one transaction
+
+    `subject` puts every imported card in that subject instead of the exported one.
+    """
+    reader = DeckReader()
+    importer = DeckImporter(db, subject or None)
+    try:
+        async for chunk in request.stream():
+            records = reader.feed(chunk)
+            if records:
+                await run_in_threadpool(importer.add, records)
+        await run_in_threadpool(importer.add, reader.close())
+        result = await run_in_threadpool(importer.finish)
+    except DeckFormatError as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        await run_in_threadpool(db.rollback)
+        print(f"Error importing flashcards: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Multi-row inserts bypass the session events and the per-card index updates
+    due_queue.invalidate()
+    near_duplicates.invalidate()
+    table_versions.bump("flashcards", result["subjects"])
+    # The index reads the imported cards back from the database, SYNC_BATCH at a time
+    background_tasks.add_task(semantic_index.update_ids, "flashcard", importer.ids)
+    print(f"Imported {result['imported']} flashcards with {result['reviews']} reviews")
+    return result
+
+
+@router.post("/flashcards/reset/{flashcard_id}", response_model=FlashcardRead)
 def reset_flashcard(flashcard_id: int, db: Session = Depends(get_db)):
     """Reset a flashcard to box 1"""
     flashcard = db.query(FlashcardModel).filter(FlashcardModel.id == flashcard_id).first()
@@ -246,9 +594,14 @@ def reset_flashcard(flashcard_id: int, db: Session = Depends(get_db)):
     
     flashcard.leitner_box = 1
     flashcard.next_review = datetime.now()
+    flashcard.ease_factor = 2.5
+    flashcard.repetitions = 0
+    flashcard.stability = None
+    flashcard.difficulty = None
     
     db.commit()
     db.refresh(flashcard)
+    due_queue.upsert(flashcard.id, flashcard.subject, flashcard.next_review, flashcard.leitner_box)
     return flashcard
 
 
@@ -277,46 +630,27 @@ def get_session_stats(db: Session = Depends(get_db)):
 def get_session_preview(db: Session = Depends(get_db)):
     """Get preview stats by subject"""
     now = datetime.now()
-    
-    subjects = db.query(FlashcardModel.subject).distinct().all()
-    subjects = [s[0] for s in subjects if s[0]]
-    
-    preview = {}
-    for subject in subjects:
-        due_count = db.query(FlashcardModel).filter(
-            FlashcardModel.subject == subject,
-            FlashcardModel.next_review <= now
-        ).count()
-        
-        box_dist = {}
-        for box_num in [1, 2, 3, 4]:
-            count = db.query(FlashcardModel).filter(
-                FlashcardModel.subject == subject,
-                FlashcardModel.leitner_box == box_num,
-                FlashcardModel.next_review <= now
-            ).count()
-            box_dist[f"box_{box_num}"] = count
-        
-        preview[subject] = {
-            "due_count": due_count,
-            **box_dist
-        }
-    
-    # Include "All" subjects
-    total_due = db.query(FlashcardModel).filter(FlashcardModel.next_review <= now).count()
-    all_box_dist = {}
-    for box_num in [1, 2, 3, 4]:
-        count = db.query(FlashcardModel).filter(
-            FlashcardModel.leitner_box == box_num,
-            FlashcardModel.next_review <= now
-        ).count()
-        all_box_dist[f"box_{box_num}"] = count
-    
-    preview["All"] = {
-        "due_count": total_due,
-        **all_box_dist
-    }
-    
+    boxes = (1, 2, 3, 4)
+
+    def empty():
+        return {"due_count": 0, **{f"box_{box_num}": 0 for box_num in boxes}}
+
+    # Subjects with cards come from the subjects table; due counts from one grouped scan of due cards
+    names = dict(db.query(SubjectModel.id, SubjectModel.name).filter(SubjectModel.flashcard_count > 0))
+    preview = {name: empty() for name in sorted(names.values())}
+    preview["All"] = empty()
+    due = db.query(FlashcardModel.subject_id, FlashcardModel.leitner_box, func.count()).filter(
+        FlashcardModel.next_review <= now
+    ).group_by(FlashcardModel.subject_id, FlashcardModel.leitner_box)
+    for subject_id, box_num, count in due:
+        targets = [preview["All"]]
+        if names.get(subject_id) in preview:
+            targets.append(preview[names[subject_id]])
+        for target in targets:
+            target["due_count"] += count
+            if box_num in boxes:
+                target[f"box_{box_num}"] += count
+
     return preview
 
 
@@ -327,7 +661,7 @@ async def generate_flashcards_preview(request: FlashcardGenerationRequest):
     try:
         print(f"Received flashcard preview request: source_type={request.source_type}")
         
-        flashcards_data = generate_flashcards_from_content(request.source_type, request.content)
+        flashcards_data = await generate_flashcards_from_content(request.source_type, request.content, INTERACTIVE)
         
         print(f"Generated {len(flashcards_data)} flashcards for preview")
         
@@ -345,25 +679,71 @@ async def generate_flashcards_preview(request: FlashcardGenerationRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/flashcards/generate-preview/stream")
+async def stream_flashcards_preview(request: FlashcardGenerationRequest):
+    """Generate flashcards without saving, streamed as NDJSON while the LLM writes them
+
+    One {"type": "card", "flashcard": {"q": ..., "a": ...}} line per card, then
+    {"type": "done", "count": n}, or {"type": "error", "detail": ...} if generation failed.
+    """
+    try:
+        get_prompt_for_source_type(request.source_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    print(f"Received streaming flashcard preview request: source_type={request.source_type}")
+
+    async def lines():
+        count = 0
+        try:
+            async for card in stream_flashcards_from_content(request.source_type, request.content):
+                count += 1
+                yield orjson.dumps({"type": "card", "flashcard": card}) + b"\n"
+        except Exception as e:
+            print(f"Error streaming flashcard preview: {e}")
+            yield orjson.dumps({"type": "error", "detail": str(e)}) + b"\n"
+            return
+        print(f"Streamed {count} flashcards for preview")
+        yield orjson.dumps({"type": "done", "count": count}) + b"\n"
+
+    # No proxy buffering, or the cards would arrive all at once
+    return StreamingResponse(lines(), media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 @router.post("/flashcards/generate")
-async def generate_flashcards(request: FlashcardGenerationRequest, db: Session = Depends(get_db)):
-    """Generate and save flashcards"""
+async def generate_flashcards(request: FlashcardGenerationRequest, background_tasks: BackgroundTasks,
+                              db: Session = Depends(get_db)):
+    """Generate and save flashcards (near duplicates of existing cards are skipped by default)"""
+    if request.on_duplicate not in DUPLICATE_ACTIONS:
+        raise HTTPException(status_code=400, detail="Invalid on_duplicate. Use 'skip', 'flag' or 'keep'")
+
     try:
         print(f"Received flashcard generation request: source_type={request.source_type}, subject={request.subject}")
         
-        flashcards_data = generate_flashcards_from_content(request.source_type, request.content)
+        flashcards_data = await generate_flashcards_from_content(request.source_type, request.content)
         
         print(f"Parsed {len(flashcards_data)} flashcards from LLM response")
         
-        # Save flashcards to database
-        saved_flashcards = []
-        colors = ["yellow.300", "pink.300", "blue.300", "green.300", "purple.300"]
-        
+        cards = []
         for idx, card in enumerate(flashcards_data):
             if "q" not in card or "a" not in card:
                 print(f"Skipping card {idx}: missing q or a fields")
                 continue
-                
+            cards.append(card)
+
+        keep, duplicates = near_duplicates.screen(
+            db, [(request.subject, card["q"]) for card in cards], request.on_duplicate
+        )
+        if duplicates:
+            print(f"Found {len(duplicates)} near-duplicate flashcards (on_duplicate={request.on_duplicate})")
+
+        # Save flashcards to database
+        saved_flashcards = []
+        new_flashcards = []
+        colors = ["yellow.300", "pink.300", "blue.300", "green.300", "purple.300"]
+        
+        for idx in keep:
+            card = cards[idx]
             db_flashcard = FlashcardModel(
                 subject=request.subject,
                 question=card["q"],
@@ -373,18 +753,24 @@ async def generate_flashcards(request: FlashcardGenerationRequest, db: Session =
                 next_review=datetime.now()
             )
             db.add(db_flashcard)
+            new_flashcards.append(db_flashcard)
             saved_flashcards.append({
                 "question": card["q"],
                 "answer": card["a"]
             })
         
+        db.flush()
+        saved = [saved_card_state(c) for c in new_flashcards]
         db.commit()
+        index_saved_cards(saved, background_tasks)
         print(f"Successfully saved {len(saved_flashcards)} flashcards to database")
         
         return {
             "message": f"Generated and saved {len(saved_flashcards)} flashcards",
             "flashcards": saved_flashcards,
-            "count": len(saved_flashcards)
+            "count": len(saved_flashcards),
+            "duplicates": duplicates,
+            "skipped": len(cards) - len(keep)
         }
         
     except ValueError as e:
@@ -0,0 +1,162 @@
+"""
+Async Flashcards CRUD and review API endpoints (registered ahead of the sync ones when DB_ASYNC=true)
+
+Only the high-traffic routes have async versions; maintenance and generation
+endpoints are still served by backend/routes/flashcards.py.
+"""
+from fastapi import APIRouter, HTTPException, Depends, Query, BackgroundTasks, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime
+
+from backend.database import get_async_db, FlashcardModel, ReviewLogModel
+from backend.schemas import FlashcardCreate, FlashcardUpdate, FlashcardRead, ReviewRequest
+from backend.utils.dedup import near_duplicates
+from backend.utils.due_queue import due_queue, INDEX_COLUMNS
+from backend.utils.scheduler import RATINGS, review_card
+from backend.utils.semantic_index import semantic_index, item_text
+from backend.utils.serialization import FLASHCARD_COLUMNS, FLASHCARD_FIELDS, json_rows
+from backend.utils.subjects import subject_names_query
+from backend.utils.versions import etag_headers, not_modified, table_versions
+
+router = APIRouter()
+
+ID_LOOKUP_BATCH = 1000
+
+
+@router.post("/flashcards/", response_model=FlashcardRead)
+async def add_flashcard(flashcard: FlashcardCreate, background_tasks: BackgroundTasks,
+                        db: AsyncSession = Depends(get_async_db)):
+    """Create a new flashcard"""
+    db_flashcard = FlashcardModel(
+        subject=flashcard.subject,
+        question=flashcard.question,
+        answer=flashcard.answer,
+        color=flashcard.color
+    )
+    db.add(db_flashcard)
+    await db.commit()
+    await db.refresh(db_flashcard)
+    due_queue.upsert(db_flashcard.id, db_flashcard.subject, db_flashcard.next_review, db_flashcard.leitner_box)
+    near_duplicates.upsert(db_flashcard.id, db_flashcard.subject, db_flashcard.question)
+    background_tasks.add_task(semantic_index.update_items, [("flashcard", db_flashcard.id, item_text("flashcard", db_flashcard))])
+    return db_flashcard
+
+
+@router.get("/flashcards/", response_model=List[FlashcardRead])
+async def get_flashcards(request: Request, subject: Optional[str] = None,
+                         db: AsyncSession = Depends(get_async_db)):
+    """Get all flashcards, optionally filtered by subject (304 if the If-None-Match ETag is current)"""
+    etag = table_versions.etag("flashcards", subject or None)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    try:
+        query = select(*FLASHCARD_COLUMNS)
+        if subject:
+            query = query.where(FlashcardModel.subject == subject)
+        result = await db.execute(query)
+        return json_rows(FLASHCARD_FIELDS, result.all(), headers=etag_headers(etag))
+    except Exception as e:
+        print(f"Error fetching flashcards: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/flashcards/subjects", response_model=List[str])
+async def get_unique_flashcard_subjects(request: Request, response: Response,
+                                        db: AsyncSession = Depends(get_async_db)):
+    """Get list of unique subjects"""
+    etag = table_versions.etag("flashcards")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    result = await db.execute(subject_names_query("flashcards"))
+    response.headers.update(etag_headers(etag))
+    return list(result.scalars().all())
+
+
+@router.get("/flashcards/due", response_model=List[FlashcardRead])
+async def get_due_flashcards(subject: Optional[str] = None, limit: Optional[int] = Query(None, ge=1),
+                             db: AsyncSession = Depends(get_async_db)):
+    """Get cards due for review (optionally only the next `limit` cards)"""
+    try:
+        if not due_queue.loaded:
+            result = await db.execute(select(*INDEX_COLUMNS).where(FlashcardModel.next_review.isnot(None)))
+            due_queue.load(result.all())
+        due_ids = due_queue.due(None, subject, datetime.now(), limit)
+
+        rows = {}
+        for start in range(0, len(due_ids), ID_LOOKUP_BATCH):
+            batch_ids = due_ids[start:start + ID_LOOKUP_BATCH]
+            result = await db.execute(select(*FLASHCARD_COLUMNS).where(FlashcardModel.id.in_(batch_ids)))
+            for row in result.all():
+                rows[row[0]] = row
+
+        return json_rows(FLASHCARD_FIELDS, (rows[card_id] for card_id in due_ids if card_id in rows))
+    except Exception as e:
+        print(f"Error fetching due flashcards: {e}")
+        due_queue.invalidate()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.put("/flashcards/{flashcard_id}", response_model=FlashcardRead)
+async def update_flashcard(flashcard_id: int, flashcard: FlashcardUpdate, background_tasks: BackgroundTasks,
+                           db: AsyncSession = Depends(get_async_db)):
+    """Update an existing flashcard"""
+    db_flashcard = await db.get(FlashcardModel, flashcard_id)
+
+    if not db_flashcard:
+        raise HTTPException(status_code=404, detail="Flashcard not found")
+
+    for key, value in flashcard.model_dump().items():
+        setattr(db_flashcard, key, value)
+    await db.commit()
+    await db.refresh(db_flashcard)
+    due_queue.upsert(db_flashcard.id, db_flashcard.subject, db_flashcard.next_review, db_flashcard.leitner_box)
+    near_duplicates.upsert(db_flashcard.id, db_flashcard.subject, db_flashcard.question)
+    background_tasks.add_task(semantic_index.update_items, [("flashcard", db_flashcard.id, item_text("flashcard", db_flashcard))])
+    return db_flashcard
+
+
+@router.delete("/flashcards/{flashcard_id}")
+async def delete_flashcard(flashcard_id: int, background_tasks: BackgroundTasks,
+                           db: AsyncSession = Depends(get_async_db)):
+    """Delete a flashcard"""
+    db_flashcard = await db.get(FlashcardModel, flashcard_id)
+    if db_flashcard:
+        await db.delete(db_flashcard)
+        await db.commit()
+        due_queue.remove(flashcard_id)
+        near_duplicates.remove(flashcard_id)
+        background_tasks.add_task(semantic_index.remove_items, [("flashcard", flashcard_id)])
+    return {"message": "Flashcard deleted"}
+
+
+@router.post("/flashcards/review/{flashcard_id:int}", response_model=FlashcardRead)
+async def review_flashcard(flashcard_id: int, review: ReviewRequest, db: AsyncSession = Depends(get_async_db)):
+    """Review a flashcard (mark again/hard/good/easy)"""
+    flashcard = await db.get(FlashcardModel, flashcard_id)
+
+    if not flashcard:
+        raise HTTPException(status_code=404, detail="Flashcard not found")
+
+    if review.result not in RATINGS:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid result. Use 'again', 'hard', 'good', or 'easy'"
+        )
+
+    reviewed_at = datetime.now()
+    review_card(flashcard, review.result, reviewed_at)
+    db.add(ReviewLogModel(
+        flashcard_id=flashcard.id,
+        result=review.result,
+        box=flashcard.leitner_box,
+        reviewed_at=reviewed_at
+    ))
+
+    await db.commit()
+    await db.refresh(flashcard)
+    due_queue.upsert(flashcard.id, flashcard.subject, flashcard.next_review, flashcard.leitner_box)
+    return flashcard
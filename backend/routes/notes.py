@@ -1,19 +1,22 @@
 """
 Notes CRUD API endpoints
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import distinct
 from typing import List, Optional
 
 from backend.database import get_db, NoteModel
 from backend.schemas import NoteCreate, NoteUpdate, NoteRead
+from backend.utils.semantic_index import semantic_index, item_text
+from backend.utils.serialization import NOTE_COLUMNS, NOTE_FIELDS, json_rows
+from backend.utils.subjects import subject_names_query
+from backend.utils.versions import etag_headers, not_modified, table_versions
 
 router = APIRouter()
 
 
-@router.post("/notes/")
-def add_note(note: NoteCreate, db: Session = Depends(get_db)):
+@router.post("/notes/", response_model=NoteRead)
+def add_note(note: NoteCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     """Create a new note"""
     db_note = NoteModel(
         subject=note.subject,
@@ -24,26 +27,37 @@ def add_note(note: NoteCreate, db: Session = Depends(get_db)):
     db.add(db_note)
     db.commit()
     db.refresh(db_note)
+    background_tasks.add_task(semantic_index.update_items, [("note", db_note.id, item_text("note", db_note))])
     return db_note
 
 
 @router.get("/notes/", response_model=List[NoteRead])
-def get_notes(subject: Optional[str] = None, db: Session = Depends(get_db)):
-    """Get all notes, optionally filtered by subject"""
+def get_notes(request: Request, subject: Optional[str] = None, db: Session = Depends(get_db)):
+    """Get all notes, optionally filtered by subject (304 if the If-None-Match ETag is current)"""
+    etag = table_versions.etag("notes", subject or None)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    query = db.query(*NOTE_COLUMNS)
     if subject:
-        return db.query(NoteModel).filter(NoteModel.subject == subject).all()
-    return db.query(NoteModel).all()
+        query = query.filter(NoteModel.subject == subject)
+    return json_rows(NOTE_FIELDS, query.all(), headers=etag_headers(etag))
 
 
 @router.get("/notes/subjects", response_model=List[str])
-def get_unique_subjects(db: Session = Depends(get_db)):
+def get_unique_subjects(request: Request, response: Response, db: Session = Depends(get_db)):
     """Get list of unique subjects"""
-    subjects = db.query(distinct(NoteModel.subject)).all()
-    return [subject[0] for subject in subjects]
+    etag = table_versions.etag("notes")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    subjects = db.execute(subject_names_query("notes")).scalars().all()
+    response.headers.update(etag_headers(etag))
+    return subjects
 
 
-@router.put("/notes/{note_id}")
-def update_note(note_id: int, note: NoteUpdate, db: Session = Depends(get_db)):
+@router.put("/notes/{note_id}", response_model=NoteRead)
+def update_note(note_id: int, note: NoteUpdate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     """Update an existing note"""
     db_note = db.query(NoteModel).filter(NoteModel.id == note_id).first()
     
@@ -54,14 +68,16 @@ def update_note(note_id: int, note: NoteUpdate, db: Session = Depends(get_db)):
         setattr(db_note, key, value)
     db.commit()
     db.refresh(db_note)
+    background_tasks.add_task(semantic_index.update_items, [("note", db_note.id, item_text("note", db_note))])
     return db_note
 
 
 @router.delete("/notes/{note_id}")
-def delete_note(note_id: int, db: Session = Depends(get_db)):
+def delete_note(note_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     """Delete a note"""
     db_note = db.query(NoteModel).filter(NoteModel.id == note_id).first()
     if db_note:
         db.delete(db_note)
         db.commit()
+        background_tasks.add_task(semantic_index.remove_items, [("note", note_id)])
     return {"message": "Note deleted"}
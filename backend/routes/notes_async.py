@@ -0,0 +1,86 @@
+"""
+Async Notes CRUD API endpoints (registered instead of the sync ones when DB_ASYNC=true)
+"""
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from backend.database import get_async_db, NoteModel
+from backend.schemas import NoteCreate, NoteUpdate, NoteRead
+from backend.utils.semantic_index import semantic_index, item_text
+from backend.utils.serialization import NOTE_COLUMNS, NOTE_FIELDS, json_rows
+from backend.utils.subjects import subject_names_query
+from backend.utils.versions import etag_headers, not_modified, table_versions
+
+router = APIRouter()
+
+
+@router.post("/notes/", response_model=NoteRead)
+async def add_note(note: NoteCreate, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
+    """Create a new note"""
+    db_note = NoteModel(
+        subject=note.subject,
+        title=note.title,
+        content=note.content,
+        color=note.color
+    )
+    db.add(db_note)
+    await db.commit()
+    await db.refresh(db_note)
+    background_tasks.add_task(semantic_index.update_items, [("note", db_note.id, item_text("note", db_note))])
+    return db_note
+
+
+@router.get("/notes/", response_model=List[NoteRead])
+async def get_notes(request: Request, subject: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    """Get all notes, optionally filtered by subject (304 if the If-None-Match ETag is current)"""
+    etag = table_versions.etag("notes", subject or None)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    query = select(*NOTE_COLUMNS)
+    if subject:
+        query = query.where(NoteModel.subject == subject)
+    result = await db.execute(query)
+    return json_rows(NOTE_FIELDS, result.all(), headers=etag_headers(etag))
+
+
+@router.get("/notes/subjects", response_model=List[str])
+async def get_unique_subjects(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """Get list of unique subjects"""
+    etag = table_versions.etag("notes")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    result = await db.execute(subject_names_query("notes"))
+    response.headers.update(etag_headers(etag))
+    return list(result.scalars().all())
+
+
+@router.put("/notes/{note_id}", response_model=NoteRead)
+async def update_note(note_id: int, note: NoteUpdate, background_tasks: BackgroundTasks,
+                      db: AsyncSession = Depends(get_async_db)):
+    """Update an existing note"""
+    db_note = await db.get(NoteModel, note_id)
+
+    if not db_note:
+        raise HTTPException(status_code=404, detail="Note not found")
+
+    for key, value in note.model_dump().items():
+        setattr(db_note, key, value)
+    await db.commit()
+    await db.refresh(db_note)
+    background_tasks.add_task(semantic_index.update_items, [("note", db_note.id, item_text("note", db_note))])
+    return db_note
+
+
+@router.delete("/notes/{note_id}")
+async def delete_note(note_id: int, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
+    """Delete a note"""
+    db_note = await db.get(NoteModel, note_id)
+    if db_note:
+        await db.delete(db_note)
+        await db.commit()
+        background_tasks.add_task(semantic_index.remove_items, [("note", note_id)])
+    return {"message": "Note deleted"}
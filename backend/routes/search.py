@@ -0,0 +1,61 @@
+"""
+Full-text search API endpoints
+"""
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from backend.database import get_db
+from backend.schemas import SearchResponse, SemanticSearchResult
+from backend.utils.search import SEARCH_TYPES, search
+from backend.utils.semantic_index import semantic_index
+
+router = APIRouter()
+
+
+@router.get("/search", response_model=SearchResponse)
+def search_content(q: str = Query(..., min_length=1),
+                   type: Optional[str] = Query(None, description="note or flashcard (default: both)"),
+                   subject: Optional[str] = None,
+                   limit: int = Query(20, ge=1, le=100),
+                   offset: int = Query(0, ge=0),
+                   db: Session = Depends(get_db)):
+    """Search note titles/content and flashcard questions/answers, best matches first"""
+    if type is not None and type not in SEARCH_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid type. Use 'note' or 'flashcard'")
+
+    try:
+        return search(db, q, (type,) if type else SEARCH_TYPES, subject, limit, offset)
+    except Exception as e:
+        print(f"Error searching for {q!r}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/search/semantic", response_model=List[SemanticSearchResult])
+def semantic_search(q: str = Query(..., min_length=1),
+                    k: int = Query(10, ge=1, le=100),
+                    type: Optional[str] = Query(None, description="note or flashcard (default: both)"),
+                    subject: Optional[str] = None,
+                    db: Session = Depends(get_db)):
+    """Notes and flashcards closest in meaning to the query (top k by cosine similarity)"""
+    if type is not None and type not in SEARCH_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid type. Use 'note' or 'flashcard'")
+
+    try:
+        hits = semantic_index.search(db, q, k, (type,) if type else SEARCH_TYPES, subject)
+        return semantic_index.results(db, hits)
+    except Exception as e:
+        print(f"Error in semantic search for {q!r}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/search/semantic/sync")
+def sync_semantic_index(db: Session = Depends(get_db)):
+    """Embed notes/flashcards missing from the semantic index or changed outside the API"""
+    try:
+        result = semantic_index.sync(db)
+        print(f"Semantic index sync: {result}")
+        return result
+    except Exception as e:
+        print(f"Error syncing semantic index: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
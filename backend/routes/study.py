@@ -2,11 +2,11 @@
 Study-related API endpoints (question answering, summarization, grading)
 """
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 import os
-import json
 
-from backend.config import UPLOAD_DIR
+from backend.config import UPLOAD_DIR, GRADING_MODE
 from backend.utils.document_loader import (
     load_pdf_for_query, load_pdf_for_summary,
     load_webpage_for_query, load_webpage_for_summary,
@@ -14,9 +14,9 @@ from backend.utils.document_loader import (
 )
 from backend.utils.rag import (
     create_db, delete_vector_db,
-    answer_question, evaluate_coverage,
-    evaluate_accuracy, summarize
+    answer_question, summarize
 )
+from backend.utils.grading import GRADING_MODES, grade_separately, grade_structured
 from backend.utils.audio import transcribe
 
 router = APIRouter()
@@ -48,12 +48,13 @@ async def answer_question_api(
         else:
             raise HTTPException(status_code=400, detail="Invalid content type")
 
-        vector_db = create_db(text)
-        result = answer_question(question, vector_db)
-        value = {"result": result}
+        document = await run_in_threadpool(create_db, text)
+        result = await answer_question(question, document)
         
-        delete_vector_db(vector_db)
-        return json.dumps(value)
+        delete_vector_db(document)
+        retrieval = document.report()
+        print(f"retrieval: {retrieval}")
+        return {"result": result, "retrieval": retrieval}
         
     except Exception as e:
         print(f"SERVER ERROR: {e}")
@@ -84,11 +85,9 @@ async def summarize_endpoint(
         else:
             raise HTTPException(status_code=400, detail="Invalid content type")
 
-        result = summarize(docs)
-        value = {"result": result}
-        result = json.dumps(value, ensure_ascii=False, indent=4, separators=(',', ': '))
+        result = await summarize(docs)
         
-        return result
+        return {"result": result}
         
     except Exception as e:
         print(f"SERVER ERROR: {e}")
@@ -101,14 +100,21 @@ async def grade_endpoint(
     file: UploadFile = File(None),
     content: str = Form(None),
     content_type: str = Form(None),
-    text: str = Form(None)
+    text: str = Form(None),
+    mode: str = Form(None)
 ):
-    """Grade user's explanation (coverage and accuracy)"""
+    """Grade user's explanation (coverage and accuracy)
+
+    mode overrides GRADING_MODE: "separate" or "structured" (one LLM call).
+    """
+    mode = mode or GRADING_MODE
+    if mode not in GRADING_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid mode. Use one of: {', '.join(GRADING_MODES)}")
     try:
         # Accept either an uploaded audio file OR a plain text transcription
         if audio:
             print(f"Received audio file: {audio.filename}")
-            transcription = transcribe(audio)
+            transcription = await run_in_threadpool(transcribe, audio)
         elif text:
             print("Received text input for grading")
             transcription = text
@@ -132,19 +138,22 @@ async def grade_endpoint(
         else:
             raise HTTPException(status_code=400, detail="Invalid content type")
 
-        vector_db = create_db(text)
+        document = await run_in_threadpool(create_db, text)
         
-        # Evaluate coverage
-        coverage = evaluate_coverage(transcription, vector_db)
+        # Evaluate coverage and accuracy
+        if mode == "structured":
+            grading = await grade_structured(transcription, document)
+        else:
+            grading = await grade_separately(transcription, document)
+        coverage, accuracy = grading["coverage"], grading["accuracy"]
         print(f"coverage: {coverage}")
-        
-        # Evaluate accuracy
-        accuracy = evaluate_accuracy(transcription, vector_db)
         print(f"accuracy: {accuracy}")
 
-        delete_vector_db(vector_db)
+        delete_vector_db(document)
+        retrieval = document.report()
+        print(f"retrieval: {retrieval}")
         
-        return JSONResponse(content={"coverage": coverage, "accuracy": accuracy})
+        return JSONResponse(content={"coverage": coverage, "accuracy": accuracy, "retrieval": retrieval})
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
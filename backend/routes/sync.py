@@ -0,0 +1,38 @@
+"""
+Delta sync API endpoint
+"""
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime
+
+from backend.database import get_db, SessionLocal
+from backend.utils.serialization import ORJSONResponse
+from backend.utils.sync import changes, prune_tombstones
+
+router = APIRouter()
+
+
+def prune_in_background():
+    with SessionLocal() as db:
+        prune_tombstones(db)
+
+
+@router.get("/sync")
+def sync(background_tasks: BackgroundTasks, since: Optional[datetime] = None, db: Session = Depends(get_db)):
+    """Notes and flashcards changed since the `cursor` of a previous call, plus deleted ids
+
+    Without `since` (or with one older than the tombstone retention) the response is
+    a full snapshot with "full": true. Pass the returned "cursor" as `since` next
+    time; apply "deleted" first, then upsert the rows by id.
+    """
+    if since is not None and since.tzinfo is not None:
+        since = since.astimezone().replace(tzinfo=None)  # stored timestamps are naive local time
+    try:
+        result = changes(db, since)
+    except Exception as e:
+        print(f"Error computing sync delta: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if result["full"]:
+        background_tasks.add_task(prune_in_background)
+    return ORJSONResponse(result)
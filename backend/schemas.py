@@ -2,7 +2,8 @@
 Pydantic schemas for API request/response validation
 """
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+from datetime import datetime
 
 
 # Notes
@@ -48,7 +49,7 @@ class FlashcardUpdate(FlashcardBase):
 class FlashcardRead(FlashcardBase):
     id: int
     leitner_box: Optional[int] = 1
-    next_review: Optional[str] = None
+    next_review: Optional[datetime] = None
     review_history: Optional[str] = None
 
     class Config:
@@ -70,7 +71,82 @@ class ReviewRequest(BaseModel):
     result: str  # "again", "hard", "good", or "easy"
 
 
+class ReviewEntry(BaseModel):
+    card_id: int
+    result: str  # "again", "hard", "good", or "easy"
+    reviewed_at: Optional[datetime] = None  # defaults to the time the batch is received
+
+
+class ReviewBatchRequest(BaseModel):
+    reviews: List[ReviewEntry]  # applied in order
+
+
+class ReviewLogRead(BaseModel):
+    flashcard_id: int
+    result: str
+    box: Optional[int] = None
+    reviewed_at: datetime
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+
 class FlashcardGenerationRequest(BaseModel):
     source_type: str  # "summary", "coverage", "accuracy", "qa_answer"
     content: str
     subject: Optional[str] = "General"
+    on_duplicate: Optional[str] = "skip"  # "skip", "flag" or "keep" near-duplicate cards
+
+
+class FlashcardBulkCreate(BaseModel):
+    flashcards: List[FlashcardCreate]
+    on_duplicate: Optional[str] = "skip"  # "skip", "flag" or "keep" near-duplicate cards
+
+
+# Search
+class SearchResult(BaseModel):
+    type: str  # "note" or "flashcard"
+    id: int
+    subject: Optional[str] = None
+    title: str  # note title or card question, HTML-escaped, matches wrapped in <mark>
+    snippet: str  # best-matching fragment of the note content or card answer
+    rank: float
+
+
+class SearchResponse(BaseModel):
+    query: str
+    results: List[SearchResult]
+    limit: int
+    offset: int
+    has_more: bool
+
+
+class SemanticSearchResult(BaseModel):
+    type: str  # "note" or "flashcard"
+    id: int
+    subject: Optional[str] = None
+    title: str  # note title or card question
+    snippet: str  # start of the note content or card answer
+    score: float  # cosine similarity to the query
+
+
+# Structured grading (the JSON the LLM must return when GRADING_MODE=structured)
+class GradingFlashcard(BaseModel):
+    q: str
+    a: str
+
+
+class GradingCorrection(BaseModel):
+    said: str  # what the student said
+    actually: str  # what the source says instead
+    proof: str = ""  # short quote from the source
+
+
+class GradingReport(BaseModel):
+    covered: List[str]  # concepts the explanation covered
+    missed: List[str]  # important concepts it left out
+    coverage_flashcards: List[GradingFlashcard]
+    incorrect: List[GradingCorrection]
+    correct: List[str]  # accurate points
+    accuracy_flashcards: List[GradingFlashcard]
@@ -1,25 +1,17 @@
 """
-Audio transcription utilities using Groq Whisper
+Audio transcription utilities (Groq Whisper, or the mock provider)
 """
 from fastapi import UploadFile, HTTPException
-from groq import Groq
-from backend.config import GROQ_API_KEY, WHISPER_MODEL
 
-groq_client = Groq(api_key=GROQ_API_KEY)
+from backend.utils.providers import transcribe_audio
 
 
 def transcribe(audio: UploadFile) -> str:
-    """Transcribe audio file using Groq Whisper"""
+    """Transcribe audio file using WHISPER_PROVIDER"""
     try:
         audio_bytes = audio.file.read()
-
-        result = groq_client.audio.transcriptions.create(
-            file=(audio.filename, audio_bytes),
-            model=WHISPER_MODEL,
-        )
-
-        return result.text
+        return transcribe_audio(audio.filename, audio_bytes)
 
     except Exception as e:
-        print(f"Groq Whisper error: {e}")
+        print(f"Whisper error: {e}")
         raise HTTPException(status_code=500, detail="Transcription failed")
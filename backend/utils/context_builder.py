@@ -0,0 +1,139 @@
+"""
+Token-budgeted context assembly for the study RAG prompts
+
+split_documents() cuts a study document into chunks of up to 800 characters that
+overlap by up to 200, and the default retriever put the four nearest chunks into
+the prompt as a list of Document reprs: often near-duplicates of each other, with
+the overlap text repeated, escaped newlines, and no bound on size. build_context()
+instead
+
+- scores every chunk against the query and keeps the CONTEXT_CANDIDATES most
+  relevant ones,
+- picks among those by maximal marginal relevance (CONTEXT_MMR_LAMBDA weighs
+  relevance to the query against similarity to the chunks already picked) until
+  CONTEXT_TOKEN_BUDGET is spent, charging each chunk only for the text its picked
+  neighbours don't already cover,
+- renders the picks in document order as plain passages, adjacent chunks merged
+  without their shared overlap and non-adjacent ones separated by "---" lines.
+"""
+import re
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from backend.config import CONTEXT_TOKEN_BUDGET, CONTEXT_MMR_LAMBDA, CONTEXT_CANDIDATES
+from backend.utils.embeddings import embed_query, normalize
+from backend.utils.llm_dispatcher import CHARS_PER_TOKEN
+
+PASSAGE_SEPARATOR = "\n---\n"
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def overlap(previous: str, following: str) -> int:
+    """Length of the text that ends `previous` and starts `following`, in whole lines"""
+    # The splitter overlaps chunks by whole lines, so only line starts can begin the overlap
+    starts = [0] + [match.end() for match in re.finditer("\n", previous)]
+    for start in starts:
+        shared = previous[start:]
+        if shared and following.startswith(shared) and following[len(shared):len(shared) + 1] in ("", "\n"):
+            return len(shared)
+    return 0
+
+
+def chunk_overlaps(chunks: Sequence[str]) -> List[int]:
+    return [overlap(chunks[i], chunks[i + 1]) for i in range(len(chunks) - 1)]
+
+
+def select_chunks(relevance: np.ndarray, vectors: np.ndarray, chunks: Sequence[str],
+                  budget: int = CONTEXT_TOKEN_BUDGET, lambda_mult: float = CONTEXT_MMR_LAMBDA,
+                  candidates: int = CONTEXT_CANDIDATES, overlaps: Optional[List[int]] = None) -> List[int]:
+    """Indexes of the chunks (in document order) to put into the prompt
+
+    relevance is the cosine similarity of each chunk to the query (-inf for chunks
+    that were not scored) and vectors their unit embeddings, in document order;
+    overlaps[i] is the overlap between chunk i and chunk i + 1.
+    """
+    if not len(chunks):
+        return []
+    if overlaps is None:
+        overlaps = chunk_overlaps(chunks)
+    pool = [index for index in np.argsort(-relevance)[:candidates] if np.isfinite(relevance[index])]
+    selected: List[int] = []
+    picked = set()
+    spent = 0
+
+    def cost(index: int) -> int:
+        length = len(chunks[index])
+        if index - 1 in picked:
+            length -= overlaps[index - 1]
+        if index + 1 in picked:
+            length -= overlaps[index]
+        return -(-max(length, 0) // CHARS_PER_TOKEN)
+
+    while pool:
+        if selected:
+            redundancy = (vectors[pool] @ vectors[selected].T).max(axis=1)
+        else:
+            redundancy = np.zeros(len(pool))
+        scores = lambda_mult * relevance[pool] - (1 - lambda_mult) * redundancy
+        chosen = None
+        for position in np.argsort(-scores):
+            index = pool[position]
+            # The most relevant chunk always goes in, even if it alone exceeds the budget
+            if spent + cost(index) <= budget or not selected:
+                chosen = index
+                break
+        if chosen is None:
+            break
+        spent += cost(chosen)
+        selected.append(chosen)
+        picked.add(chosen)
+        pool.remove(chosen)
+        # Chunks that no longer fit never will: picks only make the remaining budget smaller
+        pool = [index for index in pool if spent + cost(index) <= budget]
+    return sorted(int(index) for index in selected)
+
+
+def compact(text: str) -> str:
+    """Text with runs of blanks and blank lines collapsed"""
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r" ?\n ?", "\n", text)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def render(chunks: Sequence[str], selected: Sequence[int], overlaps: Optional[List[int]] = None) -> str:
+    """Selected chunks as plain passages, adjacent chunks merged without their overlap"""
+    passages = []
+    previous = None
+    for index in selected:
+        if previous is not None and index == previous + 1:
+            shared = overlaps[previous] if overlaps is not None else overlap(chunks[previous], chunks[index])
+            passages[-1] += chunks[index][shared:] if shared else "\n" + chunks[index]
+        else:
+            passages.append(chunks[index])
+        previous = index
+    return PASSAGE_SEPARATOR.join(compact(passage) for passage in passages)
+
+
+def assemble(relevance: np.ndarray, vectors: np.ndarray, chunks: Sequence[str],
+             overlaps: Optional[List[int]] = None, **options) -> str:
+    """Select and render the context for one query"""
+    if overlaps is None:
+        overlaps = chunk_overlaps(chunks)
+    return render(chunks, select_chunks(relevance, vectors, chunks, overlaps=overlaps, **options), overlaps)
+
+
+def build_context(vector_db, query: str, **options) -> str:
+    """Context text for query from a study document's vector store (see create_db)"""
+    stored = vector_db.get(include=["documents", "metadatas", "embeddings"])
+    if not len(stored["documents"]):
+        return ""
+    # Chunks are stored with their position in the document; restore document order
+    positions = [(metadata or {}).get("chunk", i) for i, metadata in enumerate(stored["metadatas"])]
+    order = np.argsort(positions, kind="stable")
+    chunks = [stored["documents"][i] for i in order]
+    vectors = normalize(np.asarray(stored["embeddings"], dtype=np.float32)[order])
+    return assemble(vectors @ embed_query(query), vectors, chunks, **options)
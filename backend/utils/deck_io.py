@@ -0,0 +1,278 @@
+"""
+Streaming deck export and import (NDJSON, optionally gzipped)
+
+An export is one JSON object per line: a header, then one line per flashcard
+carrying its content, scheduler state (Leitner box, next review, SM-2/FSRS
+fields) and its review_log entries:
+
+    {"type": "deck", "format": "studykeet-deck", "version": 1, "exported_at": ..., "subject": null}
+    {"type": "card", "id": 7, "subject": "Biology", "question": ..., "leitner_box": 3, ..., "reviews": [...]}
+
+Exports read the cards through a server-side cursor, EXPORT_BATCH rows at a
+time, and fetch the reviews for each batch by flashcard id, so memory stays
+flat however large the deck is. Imports parse the upload as it arrives and insert
+IMPORT_BATCH cards (one multi-row INSERT ... RETURNING) plus their reviews at a
+time, all in one transaction: a failed import leaves the database untouched.
+Imported cards get new ids.
+"""
+import zlib
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional
+
+import orjson
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from backend.database import FlashcardModel, ReviewLogModel
+from backend.utils.subjects import adjust_counts, subject_ids
+
+EXPORT_FORMAT = "studykeet-deck"
+EXPORT_VERSION = 1
+EXPORT_BATCH = 1000
+IMPORT_BATCH = 1000
+COMPRESSIONS = ("none", "gzip")
+GZIP_LEVEL = 6
+MAX_LINE_BYTES = 1 << 20
+GZIP_MAGIC = b"\x1f\x8b"
+
+CARD_EXPORT_COLUMNS = (
+    FlashcardModel.id,
+    FlashcardModel.subject,
+    FlashcardModel.question,
+    FlashcardModel.answer,
+    FlashcardModel.color,
+    FlashcardModel.timestamp,
+    FlashcardModel.leitner_box,
+    FlashcardModel.next_review,
+    FlashcardModel.ease_factor,
+    FlashcardModel.repetitions,
+    FlashcardModel.stability,
+    FlashcardModel.difficulty,
+    FlashcardModel.last_review,
+)
+CARD_EXPORT_FIELDS = tuple(column.key for column in CARD_EXPORT_COLUMNS)
+DATETIME_FIELDS = ("timestamp", "next_review", "last_review")
+# Scheduler state of a card that was never reviewed (matches the model defaults)
+CARD_DEFAULTS = {"leitner_box": 1, "ease_factor": 2.5, "repetitions": 0}
+
+
+class DeckFormatError(ValueError):
+    """The uploaded stream is not a readable deck export"""
+
+
+# Export
+def export_lines(db: Session, subject: Optional[str] = None) -> Iterator[bytes]:
+    """Deck export as NDJSON chunks, one chunk per batch of cards"""
+    yield orjson.dumps({
+        "type": "deck",
+        "format": EXPORT_FORMAT,
+        "version": EXPORT_VERSION,
+        "exported_at": datetime.now(),
+        "subject": subject,
+    }) + b"\n"
+
+    query = select(*CARD_EXPORT_COLUMNS).order_by(FlashcardModel.id)
+    if subject:
+        query = query.where(FlashcardModel.subject == subject)
+    cards = db.execute(query, execution_options={"stream_results": True, "yield_per": EXPORT_BATCH})
+    for rows in cards.partitions():
+        reviews = {}
+        review_rows = db.execute(
+            select(ReviewLogModel.flashcard_id, ReviewLogModel.result, ReviewLogModel.box,
+                   ReviewLogModel.reviewed_at)
+            .where(ReviewLogModel.flashcard_id.in_([row[0] for row in rows]))
+            .order_by(ReviewLogModel.flashcard_id, ReviewLogModel.reviewed_at)
+        )
+        for card_id, result, box, reviewed_at in review_rows:
+            reviews.setdefault(card_id, []).append({"result": result, "box": box, "reviewed_at": reviewed_at})
+
+        lines = []
+        for row in rows:
+            record = {"type": "card", **dict(zip(CARD_EXPORT_FIELDS, row))}
+            record["reviews"] = reviews.get(row[0], [])
+            lines.append(orjson.dumps(record))
+        yield b"\n".join(lines) + b"\n"
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = GZIP_LEVEL) -> Iterator[bytes]:
+    """Compress a byte stream into a gzip stream incrementally"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip header and trailer
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+# Import
+class DeckReader:
+    """Incremental export parser: feed() raw upload bytes (plain or gzipped), get card records back"""
+
+    def __init__(self):
+        self.header = None
+        self.line = 0
+        self._head = b""  # first bytes, until gzip can be told apart from plain NDJSON
+        self._decompressor = None
+        self._plain = False
+        self._buffer = b""
+
+    def feed(self, chunk: bytes) -> List[dict]:
+        if self._decompressor is None and not self._plain:
+            self._head += chunk
+            if len(self._head) < len(GZIP_MAGIC):
+                return []
+            chunk, self._head = self._head, b""
+            if chunk.startswith(GZIP_MAGIC):
+                self._decompressor = zlib.decompressobj(31)
+            else:
+                self._plain = True
+        if self._decompressor is not None:
+            try:
+                chunk = self._decompressor.decompress(chunk)
+            except zlib.error as e:
+                raise DeckFormatError(f"Corrupt gzip stream: {e}")
+        return self._records(self._buffer + chunk)
+
+    def close(self) -> List[dict]:
+        """Records left at the end of the stream"""
+        remainder = self._buffer + self._head
+        self._buffer = self._head = b""
+        if self._decompressor is not None:
+            if not self._decompressor.eof:
+                raise DeckFormatError("Truncated gzip stream")
+            remainder += self._decompressor.flush()
+        records = self._records(remainder + b"\n")
+        if self.header is None:
+            raise DeckFormatError("Empty upload: expected a deck export")
+        return records
+
+    def _records(self, data: bytes) -> List[dict]:
+        lines = data.split(b"\n")
+        self._buffer = lines.pop()
+        if len(self._buffer) > MAX_LINE_BYTES:
+            raise DeckFormatError(f"Line {self.line + 1} is longer than {MAX_LINE_BYTES} bytes")
+        records = []
+        for line in lines:
+            self.line += 1
+            if not line.strip():
+                continue
+            try:
+                record = orjson.loads(line)
+            except orjson.JSONDecodeError as e:
+                raise DeckFormatError(f"Line {self.line}: invalid JSON ({e})")
+            if not isinstance(record, dict):
+                raise DeckFormatError(f"Line {self.line}: expected a JSON object")
+            if self.header is None:
+                self._check_header(record)
+            elif record.get("type") == "card":
+                record["line"] = self.line
+                records.append(record)
+            # Other record types are ignored so newer exports still import
+        return records
+
+    def _check_header(self, record: dict):
+        if record.get("type") != "deck" or record.get("format") != EXPORT_FORMAT:
+            raise DeckFormatError(f"Line {self.line}: not a {EXPORT_FORMAT} export")
+        if not isinstance(record.get("version"), int) or record["version"] > EXPORT_VERSION:
+            raise DeckFormatError(f"Unsupported export version: {record.get('version')}")
+        self.header = record
+
+
+def _datetime(record: dict, field: str) -> Optional[datetime]:
+    value = record.get(field)
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value).replace(tzinfo=None)
+    except (TypeError, ValueError):
+        raise DeckFormatError(f"Line {record['line']}: invalid {field}: {value!r}")
+
+
+def card_row(record: dict, subject: Optional[str] = None) -> dict:
+    """FlashcardModel insert values for an exported card record"""
+    question, answer = record.get("question"), record.get("answer")
+    if not isinstance(question, str) or not isinstance(answer, str):
+        raise DeckFormatError(f"Line {record['line']}: a card needs a question and an answer")
+    row = {
+        "subject": subject or record.get("subject"),
+        "question": question,
+        "answer": answer,
+        "color": record.get("color"),
+    }
+    for field in ("leitner_box", "ease_factor", "repetitions", "stability", "difficulty"):
+        value = record.get(field)
+        row[field] = CARD_DEFAULTS.get(field) if value is None else value
+    for field in DATETIME_FIELDS:
+        row[field] = _datetime(record, field)
+    row["timestamp"] = row["timestamp"] or datetime.now()
+    row["next_review"] = row["next_review"] or datetime.now()
+    return row
+
+
+def review_rows(record: dict, card_id: int) -> List[dict]:
+    rows = []
+    for review in record.get("reviews") or ():
+        if not isinstance(review, dict):
+            raise DeckFormatError(f"Line {record['line']}: reviews must be JSON objects")
+        reviewed_at = _datetime({"line": record["line"], **review}, "reviewed_at")
+        if reviewed_at is None:
+            continue
+        rows.append({
+            "flashcard_id": card_id,
+            "result": str(review.get("result", ""))[:10],
+            "box": review.get("box"),
+            "reviewed_at": reviewed_at,
+        })
+    return rows
+
+
+class DeckImporter:
+    """Batched inserts of imported cards and their reviews into one open transaction"""
+
+    def __init__(self, db: Session, subject: Optional[str] = None):
+        self.db = db
+        self.subject = subject
+        self.cards = 0
+        self.reviews = 0
+        self.ids: List[int] = []  # of the new cards, for the semantic index
+        self.subjects = set()
+        self._pending: List[dict] = []
+
+    def add(self, records: Iterable[dict]):
+        for record in records:
+            self._pending.append(record)
+            if len(self._pending) >= IMPORT_BATCH:
+                self.flush()
+
+    def flush(self):
+        """Insert the buffered cards with one multi-row INSERT ... RETURNING, then their reviews"""
+        records, self._pending = self._pending, []
+        if not records:
+            return
+        rows = [card_row(record, self.subject) for record in records]
+        # Multi-row inserts skip the ORM flush hooks that link subjects and keep their counts
+        subjects = subject_ids(self.db, {row["subject"] for row in rows})
+        for row in rows:
+            row["subject_id"] = subjects.get(row["subject"])
+        adjust_counts(self.db, "flashcards", Counter(row["subject_id"] for row in rows if row["subject_id"] is not None))
+        ids = self.db.execute(
+            insert(FlashcardModel).returning(FlashcardModel.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+        reviews = [review for record, card_id in zip(records, ids) for review in review_rows(record, card_id)]
+        if reviews:
+            self.db.execute(insert(ReviewLogModel), reviews)
+        self.cards += len(ids)
+        self.reviews += len(reviews)
+        self.ids.extend(ids)
+        self.subjects.update(row["subject"] for row in rows if row["subject"] is not None)
+
+    def finish(self) -> dict:
+        """Insert what's left and commit"""
+        self.flush()
+        self.db.commit()
+        return {
+            "imported": self.cards,
+            "reviews": self.reviews,
+            "subjects": sorted(self.subjects),
+        }
@@ -0,0 +1,276 @@
+"""
+Near-duplicate detection for flashcard questions (MinHash + LSH)
+
+Each question is reduced to a 128-value MinHash signature over character
+5-grams of its normalized text. Signatures are split into 32 bands of 4 rows and
+every band is hashed into a bucket per subject, so finding the cards that look
+like a new question only touches the cards sharing a bucket with it instead of
+the whole deck. Candidates are confirmed by the estimated Jaccard similarity
+(fraction of equal signature values) against DEDUP_THRESHOLD.
+
+Like the due queue, the index is per process and loads lazily from the database.
+"""
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from backend.config import DEDUP_THRESHOLD
+from backend.database import FlashcardModel
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+DUPLICATE_ACTIONS = ("skip", "flag", "keep")
+
+# Multiply-shift hash family: h(x) = (a * x + b) mod 2^64 >> 32, with a odd.
+# Fixed seed so signatures are reproducible.
+_rng = np.random.RandomState(20240601)
+_PERM_A = _rng.randint(0, 1 << 62, NUM_PERM, dtype=np.int64).astype(np.uint64) * np.uint64(2) + np.uint64(1)
+_PERM_B = _rng.randint(0, 1 << 62, NUM_PERM, dtype=np.int64).astype(np.uint64)
+_BAND_MIX = np.array([0x9E3779B97F4A7C15 ** i % (1 << 64) for i in range(ROWS)], dtype=np.uint64)
+_BAND_IDS = np.arange(BANDS, dtype=np.uint64) * np.uint64(0xBF58476D1CE4E5B9)
+_SHIFT = np.uint64(32)
+
+INDEX_COLUMNS = (FlashcardModel.id, FlashcardModel.subject, FlashcardModel.question)
+
+
+def normalize_text(text: Optional[str]) -> str:
+    return " ".join(re.findall(r"\w+", (text or "").lower()))
+
+
+def shingles(text: str) -> np.ndarray:
+    """Hashed character shingles of normalized text"""
+    text = normalize_text(text)
+    if len(text) <= SHINGLE_SIZE:
+        grams = {text}
+    else:
+        grams = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    return np.array([zlib.crc32(gram.encode("utf-8")) for gram in grams], dtype=np.uint64)
+
+
+def _hash(values: np.ndarray) -> np.ndarray:
+    """(NUM_PERM, len(values)) hashes, one row per permutation"""
+    return (_PERM_A[:, None] * values[None, :] + _PERM_B[:, None]) >> _SHIFT
+
+
+def signature(text: str) -> np.ndarray:
+    """MinHash signature (NUM_PERM uint64 values)"""
+    return _hash(shingles(text)).min(axis=1)
+
+
+def signatures(texts: Sequence[str], batch_size: int = 1000) -> np.ndarray:
+    """MinHash signatures for many texts, (len(texts), NUM_PERM); one hashing pass per batch"""
+    result = np.empty((len(texts), NUM_PERM), dtype=np.uint64)
+    for start in range(0, len(texts), batch_size):
+        parts = [shingles(text) for text in texts[start:start + batch_size]]
+        offsets = np.cumsum([0] + [len(part) for part in parts[:-1]])
+        hashed = _hash(np.concatenate(parts))
+        result[start:start + len(parts)] = np.minimum.reduceat(hashed, offsets, axis=1).T
+    return result
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.mean(a == b))
+
+
+def band_hashes(sigs: np.ndarray) -> np.ndarray:
+    """One bucket key per band of each signature, (..., BANDS); the band number is mixed in"""
+    bands = sigs.reshape(sigs.shape[:-1] + (BANDS, ROWS))
+    return (bands * _BAND_MIX).sum(axis=-1) ^ _BAND_IDS
+
+
+class NearDuplicateIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._cards: Dict[int, Tuple[Optional[str], np.ndarray, List[int]]] = {}  # id -> (subject, signature, bands)
+        self._buckets: Dict[Optional[str], Dict[int, Set[int]]] = {}  # subject -> band key -> card ids
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self, rows):
+        """Build the index from INDEX_COLUMNS rows"""
+        with self._lock:
+            self._load_rows(rows)
+
+    def _load_rows(self, rows):
+        rows = list(rows)
+        self._cards = {}
+        self._buckets = {}
+        sigs = signatures([question for _, _, question in rows])
+        for (card_id, subject, _), sig, bands in zip(rows, sigs, band_hashes(sigs).tolist()):
+            self._add(card_id, subject, sig, bands)
+        self._loaded = True
+
+    def _ensure_loaded(self, db: Optional[Session]):
+        if not self._loaded:
+            self._load_rows(db.query(*INDEX_COLUMNS).all())
+
+    def _add(self, card_id: int, subject: Optional[str], sig: np.ndarray, bands: Optional[List[int]] = None):
+        bands = band_hashes(sig).tolist() if bands is None else bands
+        self._cards[card_id] = (subject, sig, bands)
+        buckets = self._buckets.setdefault(subject, {})
+        for key in bands:
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = {card_id}
+            else:
+                bucket.add(card_id)
+
+    def _discard(self, card_id: int):
+        card = self._cards.pop(card_id, None)
+        if card is None:
+            return
+        subject, _, bands = card
+        buckets = self._buckets.get(subject, {})
+        for key in bands:
+            bucket = buckets.get(key)
+            if bucket is not None:
+                bucket.discard(card_id)
+                if not bucket:
+                    del buckets[key]
+
+    def _candidates(self, subject: Optional[str], bands: List[int]) -> List[int]:
+        buckets = self._buckets.get(subject)
+        if not buckets:
+            return []
+        candidates = set()
+        for key in bands:
+            bucket = buckets.get(key)
+            if bucket:
+                candidates |= bucket
+        return sorted(candidates)
+
+    def _best_match(self, subject: Optional[str], sig: np.ndarray,
+                    threshold: float) -> Optional[Tuple[int, float]]:
+        candidates = self._candidates(subject, band_hashes(sig).tolist())
+        if not candidates:
+            return None
+        scores = (np.stack([self._cards[card_id][1] for card_id in candidates]) == sig).mean(axis=1)
+        best = int(scores.argmax())
+        if scores[best] < threshold:
+            return None
+        return candidates[best], float(scores[best])
+
+    def find(self, db: Optional[Session], subject: Optional[str], question: str,
+             threshold: float = DEDUP_THRESHOLD) -> Optional[Tuple[int, float]]:
+        """(card id, similarity) of the closest existing card in the subject, if it is a near duplicate"""
+        sig = signature(question)
+        with self._lock:
+            self._ensure_loaded(db)
+            return self._best_match(subject, sig, threshold)
+
+    def upsert(self, card_id: int, subject: Optional[str], question: Optional[str]):
+        """Record a card's current subject and question after a write"""
+        sig = signature(question)
+        with self._lock:
+            if not self._loaded:
+                return  # the first lookup loads fresh state from the database
+            self._discard(card_id)
+            self._add(card_id, subject, sig)
+
+    def remove(self, card_id: int):
+        with self._lock:
+            self._discard(card_id)
+
+    def invalidate(self):
+        """Drop the whole index; it is rebuilt from the database on the next lookup"""
+        with self._lock:
+            self._loaded = False
+            self._cards = {}
+            self._buckets = {}
+
+    def groups(self, db: Session, subject: Optional[str] = None,
+               threshold: float = DEDUP_THRESHOLD) -> List[List[int]]:
+        """Groups of near-duplicate card ids (each sorted), optionally within one subject"""
+        with self._lock:
+            self._ensure_loaded(db)
+            parent = {}
+
+            def root(card_id):
+                while parent.get(card_id, card_id) != card_id:
+                    card_id = parent[card_id]
+                return card_id
+
+            for card_id, (card_subject, sig, bands) in self._cards.items():
+                if subject is not None and card_subject != subject:
+                    continue
+                for other_id in self._candidates(card_subject, bands):
+                    if other_id <= card_id or root(other_id) == root(card_id):
+                        continue
+                    if similarity(sig, self._cards[other_id][1]) >= threshold:
+                        parent[root(other_id)] = root(card_id)
+
+            members: Dict[int, List[int]] = {}
+            for card_id in parent:
+                members.setdefault(root(card_id), []).append(card_id)
+            groups = []
+            for group_root, ids in members.items():
+                if group_root not in ids:
+                    ids.append(group_root)
+                groups.append(sorted(ids))
+            return sorted(groups)
+
+    def screen(self, db: Session, cards: Sequence[Tuple[Optional[str], str]], on_duplicate: str = "skip",
+               threshold: float = DEDUP_THRESHOLD) -> Tuple[List[int], List[dict]]:
+        """Check (subject, question) pairs about to be inserted, against the deck and each other
+
+        Returns the positions to insert and one report per duplicate found. With
+        on_duplicate="flag" every card is inserted and duplicates are only reported;
+        "keep" skips the check.
+        """
+        if on_duplicate not in DUPLICATE_ACTIONS:
+            raise ValueError(f"Invalid on_duplicate: {on_duplicate}. Use 'skip', 'flag' or 'keep'")
+        if on_duplicate == "keep":
+            return list(range(len(cards))), []
+
+        batch = NearDuplicateIndex()
+        batch.load([])
+        keep, duplicates = [], []
+        for position, (subject, question) in enumerate(cards):
+            sig = signature(question)
+            with self._lock:
+                self._ensure_loaded(db)
+                match = self._best_match(subject, sig, threshold)
+            duplicate_of = match[0] if match else None
+            if match is None:
+                # Cards earlier in the same batch have no id yet; report them by position
+                match = batch._best_match(subject, sig, threshold)
+            if match is None:
+                keep.append(position)
+                batch._add(position, subject, sig)
+                continue
+            duplicates.append({
+                "index": position,
+                "question": question,
+                "duplicate_of": duplicate_of,
+                "duplicate_of_index": None if duplicate_of is not None else match[0],
+                "similarity": round(match[1], 3),
+            })
+            if on_duplicate == "flag":
+                keep.append(position)
+                batch._add(position, subject, sig)
+        return keep, duplicates
+
+
+near_duplicates = NearDuplicateIndex()
+
+
+def unique_questions(questions: Sequence[str], threshold: float = DEDUP_THRESHOLD) -> List[int]:
+    """Positions of the questions that are not near duplicates of an earlier one in the list"""
+    seen = NearDuplicateIndex()
+    seen.load([])
+    keep = []
+    for position, sig in enumerate(signatures(list(questions))):
+        if seen._best_match(None, sig, threshold) is None:
+            keep.append(position)
+            seen._add(position, None, sig)
+    return keep
@@ -3,14 +3,12 @@ Document loading and processing utilities
 """
 import re
 import os
-from PyPDF2 import PdfReader
-from langchain_community.document_loaders import PyPDFLoader, WebBaseLoader
-from langchain_core.documents import Document as LCDocument
-from langchain_text_splitters import CharacterTextSplitter
 
 
 def load_pdf_for_query(filename: str) -> str:
     """Read PDF and return text content"""
+    from PyPDF2 import PdfReader
+
     pdfreader = PdfReader(filename)
     rawtext = ''
     for page in pdfreader.pages:
@@ -22,6 +20,8 @@ def load_pdf_for_query(filename: str) -> str:
 
 def load_pdf_for_summary(filename: str):
     """Read PDF and return pages/docs for summarization"""
+    from langchain_community.document_loaders import PyPDFLoader
+
     loader = PyPDFLoader(filename)
     pages = loader.load_and_split()
     return pages
@@ -29,6 +29,8 @@ def load_pdf_for_summary(filename: str):
 
 def create_docs_from_text(text: str):
     """Create Document objects from text"""
+    from langchain_core.documents import Document as LCDocument
+
     doc_text_splits = text.split('\n')
     documents = []
     for chunk in doc_text_splits:
@@ -43,6 +45,8 @@ def create_docs_from_text(text: str):
 
 def load_webpage_for_query(url: str) -> str:
     """Load webpage and return cleaned text"""
+    from langchain_community.document_loaders import WebBaseLoader
+
     loader = WebBaseLoader(url)
     docs = loader.load()
     raw_content = docs[0].page_content.strip()
@@ -54,6 +58,8 @@ def load_webpage_for_query(url: str) -> str:
 
 def load_webpage_for_summary(url: str):
     """Load webpage and return docs for summarization"""
+    from langchain_community.document_loaders import WebBaseLoader
+
     loader = WebBaseLoader(url)
     docs = loader.load()
     return docs
@@ -61,6 +67,8 @@ def load_webpage_for_summary(url: str):
 
 def split_documents(text: str):
     """Split text into chunks for embeddings"""
+    from langchain_text_splitters import CharacterTextSplitter
+
     text_splitter = CharacterTextSplitter(
         separator="\n",
         chunk_size=800,
@@ -0,0 +1,158 @@
+"""
+In-process due-queue index for Leitner sessions
+
+Keeps one min-heap of (next_review, card_id) per (subject, nest), plus one per nest
+across all subjects, so the next k due cards come out in O(k log n) without
+querying and sorting the flashcards table. Card writes update the index in place;
+outdated heap entries are dropped lazily when they reach the top.
+
+The index lives in process memory: with several server workers each keeps its own
+copy and only sees its own writes, so it assumes the single-process desktop setup.
+"""
+import heapq
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from backend.database import FlashcardModel
+
+BOXES = (1, 2, 3, 4)
+# Columns the index is built from (filter out NULL next_review)
+INDEX_COLUMNS = (FlashcardModel.id, FlashcardModel.subject, FlashcardModel.next_review, FlashcardModel.leitner_box)
+ALL_SUBJECTS = object()  # heap key for the cross-subject queues
+
+
+class DueQueueIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._cards: Dict[int, Tuple[Optional[str], datetime, int]] = {}  # id -> (subject, next_review, box)
+        self._heaps: Dict[Tuple[Optional[str], int], List[Tuple[datetime, int]]] = {}
+        self._stale = 0
+
+    def _push(self, card_id: int, subject: Optional[str], next_review: datetime, box: int):
+        for key in ((subject, box), (ALL_SUBJECTS, box)):
+            heapq.heappush(self._heaps.setdefault(key, []), (next_review, card_id))
+
+    def _is_current(self, key: Tuple[Optional[str], int], next_review: datetime, card_id: int) -> bool:
+        card = self._cards.get(card_id)
+        if card is None:
+            return False
+        subject, card_next_review, box = card
+        return (card_next_review == next_review and box == key[1]
+                and (key[0] is ALL_SUBJECTS or key[0] == subject))
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self, rows):
+        """Build the index from INDEX_COLUMNS rows (for callers without a sync session)"""
+        with self._lock:
+            self._load_rows(rows)
+
+    def _load_rows(self, rows):
+        self._cards = {
+            card_id: (subject, next_review, box or 1)
+            for card_id, subject, next_review, box in rows
+        }
+        self._rebuild()
+        self._loaded = True
+
+    def _rebuild(self):
+        heaps: Dict[Tuple[Optional[str], int], List[Tuple[datetime, int]]] = {}
+        for card_id, (subject, next_review, box) in self._cards.items():
+            heaps.setdefault((subject, box), []).append((next_review, card_id))
+            heaps.setdefault((ALL_SUBJECTS, box), []).append((next_review, card_id))
+        for heap in heaps.values():
+            heapq.heapify(heap)
+        self._heaps = heaps
+        self._stale = 0
+
+    def due(self, db: Optional[Session], subject: Optional[str], now: datetime,
+            limit: Optional[int] = None) -> List[int]:
+        """Ids of cards due at `now`, lowest nest first, then longest overdue first"""
+        with self._lock:
+            if not self._loaded:
+                self._load_rows(
+                    db.query(*INDEX_COLUMNS).filter(FlashcardModel.next_review.isnot(None)).all()
+                )
+
+            due_ids = []
+            seen = set()
+            for box in BOXES:
+                key = (subject or ALL_SUBJECTS, box)
+                heap = self._heaps.get(key)
+                if not heap:
+                    continue
+                taken = []
+                while heap and (limit is None or len(due_ids) < limit):
+                    next_review, card_id = heap[0]
+                    if next_review > now:
+                        break
+                    entry = heapq.heappop(heap)
+                    if not self._is_current(key, next_review, card_id):
+                        self._stale = max(0, self._stale - 1)
+                        continue
+                    if card_id in seen:
+                        continue  # duplicate of a live entry already served; drop it
+                    seen.add(card_id)
+                    taken.append(entry)
+                    due_ids.append(card_id)
+                # Serving cards doesn't change their schedule, so put them back
+                for entry in taken:
+                    heapq.heappush(heap, entry)
+                if limit is not None and len(due_ids) >= limit:
+                    break
+            return due_ids
+
+    def upsert(self, card_id: int, subject: Optional[str], next_review: Optional[datetime], box: Optional[int]):
+        """Record a card's current subject and schedule after a write"""
+        with self._lock:
+            self._upsert(card_id, subject, next_review, box)
+
+    def update_schedule(self, card_id: int, next_review: Optional[datetime], box: Optional[int]):
+        """Like upsert(), keeping the subject the index already has for the card"""
+        with self._lock:
+            card = self._cards.get(card_id)
+            if card is not None:
+                self._upsert(card_id, card[0], next_review, box)
+
+    def _upsert(self, card_id: int, subject: Optional[str], next_review: Optional[datetime], box: Optional[int]):
+        if not self._loaded:
+            return  # the first read loads fresh state from the database
+        if next_review is not None and self._cards.get(card_id) == (subject, next_review, box or 1):
+            return  # schedule unchanged (e.g. a content edit): the live entry still holds
+        if card_id in self._cards:
+            self._stale += 2
+        if next_review is None:
+            self._cards.pop(card_id, None)
+        else:
+            box = box or 1
+            self._cards[card_id] = (subject, next_review, box)
+            self._push(card_id, subject, next_review, box)
+        self._compact_if_needed()
+
+    def remove(self, card_id: int):
+        with self._lock:
+            if self._cards.pop(card_id, None) is not None:
+                self._stale += 2
+                self._compact_if_needed()
+
+    def invalidate(self):
+        """Drop the whole index; it is rebuilt from the database on the next read"""
+        with self._lock:
+            self._loaded = False
+            self._cards = {}
+            self._heaps = {}
+            self._stale = 0
+
+    def _compact_if_needed(self):
+        # Rebuild the heaps once outdated entries outnumber live ones
+        if self._stale > 2 * len(self._cards) + 1024:
+            self._rebuild()
+
+
+due_queue = DueQueueIndex()
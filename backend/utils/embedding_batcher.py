@@ -0,0 +1,151 @@
+"""
+Cross-request dynamic batching for embeddings
+
+Concurrent /grade and /answer_question requests each embed a handful of chunks
+and a query, and each call pays the model's per-call overhead and runs at a
+small batch size. With EMBEDDING_BATCH_WAIT_MS > 0, embed_texts() and
+embed_query() hand their texts to one EmbeddingBatcher instead:
+
+- callers (worker threads) put jobs on a local queue and block on a future;
+  requests larger than EMBEDDING_BATCH_SIZE are split into several jobs
+- a single worker thread takes the oldest job and keeps gathering queued jobs,
+  in arrival order, until the batch holds EMBEDDING_BATCH_SIZE texts or the
+  oldest job has waited EMBEDDING_BATCH_WAIT_MS, whichever comes first. It only
+  waits while some caller inside embed() has no job in the batch yet, so a
+  lone request is not delayed, and jobs that queued up while the previous
+  batch ran go in without further waiting
+- the model runs once per batch and each caller gets back its own rows
+
+metrics() reports batch sizes, queue waits and inference times
+(GET /embeddings/metrics). Like the LLM dispatcher, the batcher is per process.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from backend.utils.llm_dispatcher import WAIT_SAMPLES, _percentile
+
+
+class _Job:
+    __slots__ = ("call", "texts", "future", "queued")
+
+    def __init__(self, call: object, texts: List[str]):
+        self.call = call  # the embed() call the job belongs to
+        self.texts = texts
+        self.future: Future = Future()
+        self.queued = time.monotonic()
+
+
+class EmbeddingBatcher:
+    """Worker thread that embeds the texts of concurrent callers in shared batches"""
+
+    def __init__(self, embed: Callable[[List[str]], list], max_batch: int, max_wait: float):
+        self._embed = embed
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self._queue: "queue.Queue[_Job]" = queue.Queue()
+        self._carry: Optional[_Job] = None  # job that didn't fit into the last batch
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._active = 0  # embed() calls in progress
+        self.batches = 0
+        self.jobs = 0
+        self.texts = 0
+        self._sizes = deque(maxlen=WAIT_SAMPLES)
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self._inference = deque(maxlen=WAIT_SAMPLES)
+
+    def _start(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """float32 (len(texts), dim) embeddings; blocks until the batches holding them have run"""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        self._start()
+        call = object()
+        with self._lock:
+            self._active += 1
+        try:
+            jobs = []
+            for start in range(0, len(texts), self.max_batch):
+                job = _Job(call, list(texts[start:start + self.max_batch]))
+                self._queue.put(job)
+                jobs.append(job)
+            return np.concatenate([job.future.result() for job in jobs])
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def _next_batch(self) -> List[_Job]:
+        first, self._carry = self._carry or self._queue.get(), None
+        batch, size, calls = [first], len(first.texts), {first.call}
+        deadline = first.queued + self.max_wait
+        while size < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0 and len(calls) < self._active:
+                    job = self._queue.get(timeout=timeout)
+                else:
+                    job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if size + len(job.texts) > self.max_batch:
+                self._carry = job
+                break
+            batch.append(job)
+            calls.add(job.call)
+            size += len(job.texts)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            texts = [text for job in batch for text in job.texts]
+            started = time.monotonic()
+            try:
+                vectors = np.asarray(self._embed(texts), dtype=np.float32)
+            except Exception as e:
+                for job in batch:
+                    job.future.set_exception(e)
+                continue
+            finished = time.monotonic()
+            offset = 0
+            for job in batch:
+                job.future.set_result(vectors[offset:offset + len(job.texts)])
+                offset += len(job.texts)
+            with self._lock:
+                self.batches += 1
+                self.jobs += len(batch)
+                self.texts += len(texts)
+                self._sizes.append(len(texts))
+                self._inference.append(finished - started)
+                self._waits.extend(started - job.queued for job in batch)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            sizes, waits, inference = list(self._sizes), list(self._waits), list(self._inference)
+            totals = {"batches": self.batches, "jobs": self.jobs, "texts": self.texts}
+        result = {
+            "max_batch": self.max_batch,
+            "max_wait_seconds": self.max_wait,
+            "queue_depth": self._queue.qsize() + (self._carry is not None),
+            **totals,
+        }
+        if sizes:
+            result["batch_size"] = {"mean": round(sum(sizes) / len(sizes), 2), "p50": _percentile(sizes, 0.5),
+                                    "max": max(sizes)}
+            result["queue_wait_seconds"] = {"mean": round(sum(waits) / len(waits), 4),
+                                            "p95": round(_percentile(waits, 0.95), 4),
+                                            "p99": round(_percentile(waits, 0.99), 4)}
+            result["inference_seconds"] = {"mean": round(sum(inference) / len(inference), 4),
+                                           "max": round(max(inference), 4)}
+        return result
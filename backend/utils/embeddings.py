@@ -0,0 +1,79 @@
+"""
+Shared text embedding model
+
+The model is loaded once, on first use, and reused by the study document RAG
+and the semantic index. EMBEDDING_BACKEND picks PyTorch sentence-transformers
+(HuggingFaceEmbeddings) or ONNX Runtime (onnx_embeddings.py). With
+EMBEDDING_BATCH_WAIT_MS > 0, texts from concurrent callers are embedded together
+in shared batches (embedding_batcher.py).
+"""
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+
+from backend.config import (
+    EMBEDDING_MODEL, EMBEDDING_BACKEND, EMBEDDING_ONNX_DIR, EMBEDDING_ONNX_FILE, EMBEDDING_POOLING,
+    EMBEDDING_THREADS, EMBEDDING_BATCH_SIZE, EMBEDDING_BATCH_WAIT_MS
+)
+from backend.utils.embedding_batcher import EmbeddingBatcher
+
+EMBEDDING_BACKENDS = ("torch", "onnx")
+
+if EMBEDDING_BACKEND not in EMBEDDING_BACKENDS:
+    raise ValueError(f"EMBEDDING_BACKEND must be one of {', '.join(EMBEDDING_BACKENDS)}, got {EMBEDDING_BACKEND!r}")
+
+# Identifies the vectors this configuration produces (stored with each semantic index
+# row): the ONNX export, its quantization and pooling give vectors that differ from
+# PyTorch's, so switching any of them re-embeds only the rows made under another key
+if EMBEDDING_BACKEND == "onnx":
+    EMBEDDING_KEY = f"{EMBEDDING_MODEL} onnx:{EMBEDDING_ONNX_FILE}:{EMBEDDING_POOLING}"
+else:
+    EMBEDDING_KEY = EMBEDDING_MODEL
+
+
+@lru_cache(maxsize=1)
+def get_embedding_model():
+    """LangChain embeddings for EMBEDDING_MODEL on EMBEDDING_BACKEND (loaded on first call)"""
+    if EMBEDDING_BACKEND == "onnx":
+        from backend.utils.onnx_embeddings import OnnxEmbeddings
+        return OnnxEmbeddings(EMBEDDING_ONNX_DIR, EMBEDDING_ONNX_FILE, threads=EMBEDDING_THREADS,
+                              batch_size=EMBEDDING_BATCH_SIZE, pooling=EMBEDDING_POOLING)
+
+    if EMBEDDING_THREADS:
+        import torch
+        torch.set_num_threads(EMBEDDING_THREADS)
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL, encode_kwargs={"batch_size": EMBEDDING_BATCH_SIZE})
+
+
+@lru_cache(maxsize=1)
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """Batcher shared by embed_texts() and embed_query() (EMBEDDING_BATCH_WAIT_MS > 0)"""
+    return EmbeddingBatcher(lambda texts: get_embedding_model().embed_documents(texts),
+                            EMBEDDING_BATCH_SIZE, EMBEDDING_BATCH_WAIT_MS / 1000)
+
+
+def _embed(texts: List[str]) -> np.ndarray:
+    if EMBEDDING_BATCH_WAIT_MS > 0:
+        return get_embedding_batcher().embed(texts)
+    return np.asarray(get_embedding_model().embed_documents(texts), dtype=np.float32)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so a dot product is the cosine similarity"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """Embed documents; returns a float32 (len(texts), dim) array of unit vectors"""
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+    return normalize(_embed(list(texts)))
+
+
+def embed_query(text: str) -> np.ndarray:
+    """Embed a search query as a float32 unit vector"""
+    # Both backends embed queries exactly like documents, so queries can share batches with chunks
+    return normalize(_embed([text])[0])
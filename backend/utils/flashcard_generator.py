@@ -1,10 +1,15 @@
 """
 Flashcard generation prompts and logic
 """
+import asyncio
 import json
 import re
-from langchain_groq import ChatGroq
-from backend.config import GROQ_MODEL, GROQ_API_KEY
+from typing import List
+
+from backend.config import FLASHCARD_SECTION_CHARS, FLASHCARD_GENERATION_CONCURRENCY
+from backend.utils.dedup import NearDuplicateIndex, unique_questions
+from backend.utils.llm_dispatcher import BULK, INTERACTIVE, llm_dispatcher
+from backend.utils.providers import create_chat_model
 
 MASTER_WRAPPER = """
 You are an assistant that must follow the EXACT formatting rules.
@@ -124,21 +129,12 @@ def get_prompt_for_source_type(source_type: str) -> str:
     return prompts[source_type]
 
 
-def generate_flashcards_from_content(source_type: str, content: str) -> list:
-    """Generate flashcards using LLM"""
-    selected_prompt = get_prompt_for_source_type(source_type)
-    full_prompt = MASTER_WRAPPER + "\n" + selected_prompt.format(input=content)
-    
-    llm = ChatGroq(
-        temperature=0,
-        model=GROQ_MODEL,
-        groq_api_key=GROQ_API_KEY
-    )
-    
-    response = llm.invoke(full_prompt)
-    result_text = response.content.strip()
-    
-    # Parse JSON response
+def build_prompt(source_type: str, content: str) -> str:
+    return MASTER_WRAPPER + "\n" + get_prompt_for_source_type(source_type).format(input=content)
+
+
+def parse_flashcards(result_text: str) -> list:
+    """Flashcard array from an LLM response (bare JSON, or JSON wrapped in other text)"""
     flashcards_data = None
     try:
         flashcards_data = json.loads(result_text)
@@ -158,3 +154,204 @@ def generate_flashcards_from_content(source_type: str, content: str) -> list:
         raise ValueError("LLM did not return a valid flashcard array")
     
     return flashcards_data
+
+
+# Paragraphs, then lines, then sentences
+SECTION_SEPARATORS = (r"\n\s*\n", r"\n", r"(?<=[.!?])\s+")
+
+
+def _pieces(text: str, max_chars: int, separators=SECTION_SEPARATORS) -> List[str]:
+    """Pieces of text no longer than max_chars, split at the coarsest separator that works"""
+    if len(text) <= max_chars:
+        return [text]
+    if not separators:
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+    parts = re.split(f"({separators[0]})", text)
+    pieces = []
+    for i in range(0, len(parts), 2):
+        # Each piece keeps the separator that followed it
+        piece = parts[i] + (parts[i + 1] if i + 1 < len(parts) else "")
+        pieces.extend(_pieces(piece, max_chars, separators[1:]))
+    return pieces
+
+
+def split_sections(content: str, max_chars: int = FLASHCARD_SECTION_CHARS) -> List[str]:
+    """Split long content into sections of at most max_chars at paragraph/line/sentence boundaries"""
+    if len(content) <= max_chars:
+        return [content]
+    sections = []
+    current = ""
+    for piece in _pieces(content, max_chars):
+        if current and len(current) + len(piece) > max_chars:
+            sections.append(current.strip())
+            current = ""
+        current += piece
+    sections.append(current.strip())
+    return [section for section in sections if section]
+
+
+def is_card(card) -> bool:
+    return isinstance(card, dict) and isinstance(card.get("q"), str) and "a" in card
+
+
+async def generate_section(llm, source_type: str, content: str, priority: str = BULK) -> list:
+    response = await llm_dispatcher.complete(llm, build_prompt(source_type, content), priority)
+    return parse_flashcards(response.content.strip())
+
+
+async def generate_flashcards_from_content(source_type: str, content: str, priority: str = BULK) -> list:
+    """Generate flashcards using LLM
+
+    Content longer than FLASHCARD_SECTION_CHARS is split into sections that are
+    generated concurrently (at most FLASHCARD_GENERATION_CONCURRENCY calls at a
+    time); the cards are merged in section order and near-duplicate questions
+    across sections dropped. A failed section is skipped unless all of them fail.
+    Calls are dispatched as bulk work unless the caller is waiting on the result
+    (priority=INTERACTIVE).
+    """
+    get_prompt_for_source_type(source_type)  # reject unknown source types before any LLM call
+    llm = create_chat_model()
+
+    sections = split_sections(content)
+    if len(sections) == 1:
+        return await generate_section(llm, source_type, content, priority)
+
+    limit = asyncio.Semaphore(FLASHCARD_GENERATION_CONCURRENCY)
+
+    async def generate_limited(section: str) -> list:
+        async with limit:
+            return await generate_section(llm, source_type, section, priority)
+
+    results = await asyncio.gather(*(generate_limited(section) for section in sections), return_exceptions=True)
+    cards = []
+    errors = []
+    for index, result in enumerate(results):
+        if isinstance(result, BaseException):
+            print(f"Flashcard generation failed for section {index + 1}/{len(sections)}: {result}")
+            errors.append(result)
+            continue
+        cards.extend(card for card in result if is_card(card))
+    if len(errors) == len(sections):
+        raise errors[0]
+
+    keep = unique_questions([card["q"] for card in cards])
+    print(f"Generated {len(cards)} flashcards from {len(sections)} sections "
+          f"({len(cards) - len(keep)} duplicates across sections dropped)")
+    return [cards[idx] for idx in keep]
+
+
+# Streaming
+class FlashcardStreamParser:
+    """Incremental parser for a JSON array of flashcard objects arriving in pieces
+
+    feed() returns each top-level object of the array as soon as its closing brace
+    arrives, so cards can be shown while the LLM is still writing the rest. Text
+    around the array (markdown fences, prose) is skipped.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.count = 0
+        self._pos = 0
+        self._in_array = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._object_start = 0
+
+    def feed(self, chunk: str) -> list:
+        self.text += chunk
+        text = self.text
+        cards = []
+        for pos in range(self._pos, len(text)):
+            char = text[pos]
+            if not self._in_array:
+                self._in_array = char == "["
+            elif self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                if self._depth == 0:
+                    self._object_start = pos
+                self._depth += 1
+            elif char == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        card = json.loads(text[self._object_start:pos + 1])
+                    except ValueError:
+                        continue
+                    cards.append(card)
+            elif char == "]" and self._depth == 0:
+                # A bracket pair in prose before the real array; keep looking
+                self._in_array = False
+        self._pos = len(text)
+        self.count += len(cards)
+        return cards
+
+
+async def stream_section(llm, source_type: str, content: str, priority: str = INTERACTIVE):
+    """Cards of one section as the LLM streams its response"""
+    parser = FlashcardStreamParser()
+    async for chunk in llm_dispatcher.stream(llm, build_prompt(source_type, content), priority):
+        for card in parser.feed(chunk.content):
+            yield card
+    if parser.count == 0:
+        # Nothing recognizable while streaming: same fallback parsing as the non-streaming path
+        for card in parse_flashcards(parser.text.strip()):
+            yield card
+
+
+async def stream_flashcards_from_content(source_type: str, content: str):
+    """Yield flashcards as the LLM writes them
+
+    Sections, concurrency limit and cross-section dedup work as in
+    generate_flashcards_from_content(), but cards come out in arrival order.
+    """
+    get_prompt_for_source_type(source_type)
+    llm = create_chat_model()
+    sections = split_sections(content)
+    limit = asyncio.Semaphore(FLASHCARD_GENERATION_CONCURRENCY)
+    queue = asyncio.Queue()
+    finished = object()
+
+    async def produce(section: str):
+        try:
+            async with limit:
+                async for card in stream_section(llm, source_type, section):
+                    await queue.put(card)
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            await queue.put(finished)
+
+    tasks = [asyncio.create_task(produce(section)) for section in sections]
+    seen = NearDuplicateIndex()
+    seen.load([])
+    errors = []
+    yielded = 0
+    try:
+        remaining = len(tasks)
+        while remaining:
+            item = await queue.get()
+            if item is finished:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                print(f"Flashcard generation failed for a section: {item}")
+                errors.append(item)
+            elif is_card(item) and seen.find(None, None, item["q"]) is None:
+                seen.upsert(yielded, None, item["q"])
+                yielded += 1
+                yield item
+        if errors and not yielded:
+            raise errors[0]
+    finally:
+        # The client may disconnect mid-stream; stop the remaining LLM calls
+        for task in tasks:
+            task.cancel()
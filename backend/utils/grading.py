@@ -0,0 +1,118 @@
+"""
+Single-call structured grading (GRADING_MODE=structured)
+
+The default /grade path makes two LLM calls over the same context and
+explanation: evaluate_coverage() and evaluate_accuracy(), each with its own long
+prompt. The structured mode asks once for both evaluations as one JSON object
+(Groq JSON mode), validates it against schemas.GradingReport and renders it into
+the same two markdown texts the separate prompts produce, so the frontend and
+the coverage/accuracy flashcard prompts see no difference. If the response is
+not a valid report, grading falls back to the two separate calls.
+"""
+import json
+from typing import Dict, List
+
+from pydantic import ValidationError
+
+from backend.schemas import GradingFlashcard, GradingReport
+from backend.utils.providers import create_chat_model
+from backend.utils.rag import ask_with_context, evaluate_accuracy, evaluate_coverage
+
+GRADING_MODES = ("separate", "structured")
+NOTHING = "* None"
+
+STRUCTURED_GRADING_PROMPT = """
+You are an expert study tutor grading a student's explanation for both **coverage** and **accuracy**.
+Judge only using the provided source content. No outside information.
+
+### USER EXPLANATION
+{input}
+
+### SOURCE CONTENT
+{context}
+
+### INSTRUCTIONS
+Identify:
+1. **covered** — concepts in the explanation that the source supports
+2. **missed** — important concepts from the source the explanation leaves out
+3. **coverage_flashcards** — short recall cards, prioritizing missed concepts
+4. **incorrect** — misinterpretations or contradictions: what was said, what the source actually says, and a short quoted proof
+5. **correct** — accurate points, short and direct
+6. **accuracy_flashcards** — cards that fix each misunderstanding
+
+### RULES (CRITICAL)
+- One idea per list item.
+- Do NOT say "You mentioned that…" or "The source states…"
+- Proofs are short quotes copied from the source content.
+- No filler, no hedging ("seems", "may", "likely").
+- Use an empty list when there is nothing to report.
+
+### OUTPUT
+Respond ONLY with a JSON object that matches this JSON schema:
+{schema}
+"""
+
+REPORT_SCHEMA = json.dumps(GradingReport.model_json_schema(), separators=(",", ":"))
+
+
+def parse_report(text: str) -> GradingReport:
+    """GradingReport from an LLM response (JSON object, possibly wrapped in other text)"""
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("No JSON object in grading response")
+    return GradingReport.model_validate_json(text[start:end + 1])
+
+
+def _bullets(items: List[str]) -> str:
+    return "\n".join(f"* {item}" for item in items) or NOTHING
+
+
+def _cards(cards: List[GradingFlashcard]) -> str:
+    return "\n".join(f"* Q: {card.q} → A: {card.a}" for card in cards) or NOTHING
+
+
+def render_coverage(report: GradingReport) -> str:
+    """Coverage text in the format of the evaluate_coverage() prompt"""
+    return (
+        f"**What you covered (correct, included concepts):**\n{_bullets(report.covered)}\n\n"
+        f"**What you missed (important concepts not mentioned):**\n{_bullets(report.missed)}\n\n"
+        f"**Suggested Leitner Flashcards (short & recall-friendly):**\n{_cards(report.coverage_flashcards)}"
+    )
+
+
+def render_accuracy(report: GradingReport) -> str:
+    """Accuracy text in the format of the evaluate_accuracy() prompt"""
+    corrections = [
+        f"Said: {item.said} → Actually: {item.actually}" + (f' ("{item.proof}")' if item.proof else "")
+        for item in report.incorrect
+    ]
+    return (
+        f"**Incorrect or misunderstood:**\n{_bullets(corrections)}\n\n"
+        f"**Correct points:**\n{_bullets(report.correct)}\n\n"
+        f"**Fix-it Flashcards (Leitner):**\n{_cards(report.accuracy_flashcards)}"
+    )
+
+
+async def grade_separately(transcription: str, document) -> Dict[str, str]:
+    """Coverage and accuracy from their own prompts (two LLM calls)"""
+    coverage = await evaluate_coverage(transcription, document)
+    accuracy = await evaluate_accuracy(transcription, document)
+    return {"coverage": coverage, "accuracy": accuracy}
+
+
+async def grade_structured(transcription: str, document) -> Dict[str, str]:
+    """Coverage and accuracy texts from one JSON-mode LLM call"""
+    from langchain_core.prompts import ChatPromptTemplate
+
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", STRUCTURED_GRADING_PROMPT),
+        ("human", "{input}"),
+    ])
+    text = await ask_with_context(prompt, transcription, document, llm=create_chat_model(json_mode=True),
+                                  schema=REPORT_SCHEMA)
+    try:
+        report = parse_report(text)
+    except (ValueError, ValidationError) as e:
+        print(f"Structured grading returned an invalid report, grading separately: {e}")
+        return await grade_separately(transcription, document)
+    return {"coverage": render_coverage(report), "accuracy": render_accuracy(report)}
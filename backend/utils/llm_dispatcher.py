@@ -0,0 +1,260 @@
+"""
+Central dispatch for LLM calls: rate limits, priorities and request coalescing
+
+Every Groq chat completion goes through llm_dispatcher, which
+
+- admits calls under two token buckets, requests per minute
+  (LLM_REQUESTS_PER_MINUTE) and tokens per minute (LLM_TOKENS_PER_MINUTE), so
+  bursts wait here instead of being rejected by Groq. A call's tokens are
+  estimated before it runs (prompt characters / 4 plus LLM_OUTPUT_TOKEN_ESTIMATE)
+  and the bucket is corrected with the usage the response reports.
+- serves waiting calls by priority: INTERACTIVE (question answering, grading,
+  summaries, flashcard previews) before BULK (flashcard generation that is saved
+  straight away), first come first served within a class.
+- coalesces identical prompts: a call whose model and messages match a call
+  already in flight waits for that response instead of paying for its own.
+  Streaming calls are rate limited but never coalesced.
+
+metrics() reports queue depth, wait times, coalescing counts and the token usage
+responses reported (GET /llm/metrics).
+Like the other in-process singletons, the dispatcher assumes the single-worker
+desktop setup: one process, one event loop.
+"""
+import asyncio
+import hashlib
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from backend.config import LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE, LLM_OUTPUT_TOKEN_ESTIMATE
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+PRIORITIES = (INTERACTIVE, BULK)  # served in this order
+CHARS_PER_TOKEN = 4
+WAIT_SAMPLES = 1000  # recent waits kept per priority for the metrics
+
+
+class TokenBucket:
+    """Refills per_minute units a minute, holding at most one minute's worth; 0 means unlimited"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken; more than the capacity waits for a full bucket"""
+        if not self.capacity:
+            return 0.0
+        self._refill(now)
+        needed = min(amount, self.capacity)
+        return 0.0 if self.level >= needed else (needed - self.level) / self.rate
+
+    def take(self, amount: float, now: float):
+        # The level may go negative (oversized calls, usage above the estimate): later calls wait longer
+        if self.capacity:
+            self._refill(now)
+            self.level -= amount
+
+    def refund(self, amount: float):
+        """Give back (or with a negative amount, charge) the difference once real usage is known"""
+        if self.capacity:
+            self.level = min(self.capacity, self.level + amount)
+
+
+def _text(messages) -> str:
+    if isinstance(messages, str):
+        return messages
+    return "\n".join(f"{getattr(m, 'type', '')}: {getattr(m, 'content', m)}" for m in messages)
+
+
+def estimate_tokens(messages) -> int:
+    """Tokens a call is assumed to use before it runs: prompt plus expected output"""
+    return len(_text(messages)) // CHARS_PER_TOKEN + LLM_OUTPUT_TOKEN_ESTIMATE
+
+
+def _usage(message) -> Optional[dict]:
+    """Input, output and total tokens reported on a response or stream chunk, if any"""
+    usage = getattr(message, "usage_metadata", None)
+    if usage and usage.get("total_tokens"):
+        return usage
+    token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+    if token_usage.get("total_tokens"):
+        return {"input_tokens": token_usage.get("prompt_tokens", 0),
+                "output_tokens": token_usage.get("completion_tokens", 0),
+                "total_tokens": token_usage["total_tokens"]}
+    return None
+
+
+def _percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class LLMDispatcher:
+    def __init__(self, requests_per_minute: int = LLM_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = LLM_TOKENS_PER_MINUTE):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.running = 0
+        self.coalesced = 0
+        self.admitted = {priority: 0 for priority in PRIORITIES}
+        self.usage = {"input_tokens": 0, "output_tokens": 0}  # as reported by responses
+        self._queue = []  # heap of [priority rank, arrival, wakeup future]
+        self._arrivals = itertools.count()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._waits = {priority: deque(maxlen=WAIT_SAMPLES) for priority in PRIORITIES}
+
+    # Admission
+    async def _admit(self, priority: str, tokens: int):
+        """Wait until this call is first in line and both buckets can cover it"""
+        loop = asyncio.get_running_loop()
+        entry = [PRIORITIES.index(priority), next(self._arrivals), None]
+        heapq.heappush(self._queue, entry)
+        started = time.monotonic()
+        try:
+            while True:
+                timer = None
+                entry[2] = loop.create_future()
+                if self._queue[0] is entry:
+                    now = time.monotonic()
+                    delay = max(self.requests.delay(1, now), self.tokens.delay(tokens, now))
+                    if delay <= 0:
+                        heapq.heappop(self._queue)
+                        self.requests.take(1, now)
+                        self.tokens.take(tokens, now)
+                        break
+                    timer = loop.call_later(delay, _wake, entry[2])
+                # Woken by the timer, or when whoever was ahead leaves the queue
+                try:
+                    await entry[2]
+                finally:
+                    if timer is not None:
+                        timer.cancel()
+        except BaseException:
+            if entry in self._queue:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+            raise
+        finally:
+            self._wake_head()
+        self._waits[priority].append(time.monotonic() - started)
+        self.admitted[priority] += 1
+
+    def _wake_head(self):
+        if self._queue and self._queue[0][2] is not None:
+            _wake(self._queue[0][2])
+
+    @asynccontextmanager
+    async def _slot(self, priority: str, messages):
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown LLM priority: {priority}")
+        estimate = estimate_tokens(messages)
+        await self._admit(priority, estimate)
+        self.running += 1
+        used = []  # usage reported by the response (or stream chunks)
+        try:
+            yield used
+        finally:
+            self.running -= 1
+            if used:
+                for usage in used:
+                    for field in self.usage:
+                        self.usage[field] += usage.get(field) or 0
+                self.tokens.refund(estimate - sum(usage["total_tokens"] for usage in used))
+                self._wake_head()
+
+    # Calls
+    @staticmethod
+    def _key(llm, messages) -> str:
+        model = getattr(llm, "model_name", None) or getattr(llm, "model", "")
+        settings = f"{type(llm).__name__}|{model}|{getattr(llm, 'temperature', '')}|{getattr(llm, 'model_kwargs', '')}"
+        return hashlib.sha256(f"{settings}\n{_text(messages)}".encode("utf-8")).hexdigest()
+
+    async def complete(self, llm, messages, priority: str = INTERACTIVE):
+        """llm.ainvoke(messages) under the rate limits; identical calls in flight share one response"""
+        key = self._key(llm, messages)
+        while key in self._inflight:
+            shared = self._inflight[key]
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(shared)
+            except asyncio.CancelledError:
+                if not shared.cancelled():
+                    raise  # this caller was cancelled, not the call it was waiting for
+                # The original caller went away before its response arrived: try again
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            async with self._slot(priority, messages) as used:
+                response = await llm.ainvoke(messages)
+                if _usage(response):
+                    used.append(_usage(response))
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # retrieved: nobody may be waiting on it
+            raise
+        else:
+            future.set_result(response)
+            return response
+        finally:
+            del self._inflight[key]
+
+    async def stream(self, llm, messages, priority: str = INTERACTIVE):
+        """llm.astream(messages) under the rate limits"""
+        async with self._slot(priority, messages) as used:
+            async for chunk in llm.astream(messages):
+                if _usage(chunk):
+                    used.append(_usage(chunk))
+                yield chunk
+
+    # Metrics
+    def metrics(self) -> dict:
+        depth = {priority: 0 for priority in PRIORITIES}
+        for rank, _, _ in self._queue:
+            depth[PRIORITIES[rank]] += 1
+        waits = {}
+        for priority, samples in self._waits.items():
+            waits[priority] = {"count": len(samples)}
+            if samples:
+                waits[priority].update({
+                    "mean": round(sum(samples) / len(samples), 4),
+                    "p50": round(_percentile(samples, 0.5), 4),
+                    "p95": round(_percentile(samples, 0.95), 4),
+                    "max": round(max(samples), 4),
+                })
+        now = time.monotonic()
+        self.requests.delay(0, now)  # refill before reporting the levels
+        self.tokens.delay(0, now)
+        return {
+            "limits": {"requests_per_minute": int(self.requests.capacity),
+                       "tokens_per_minute": int(self.tokens.capacity)},
+            "available": {"requests": round(self.requests.level, 1), "tokens": round(self.tokens.level)},
+            "queue_depth": depth,
+            "running": self.running,
+            "coalescing": {"in_flight_prompts": len(self._inflight), "coalesced": self.coalesced},
+            "admitted": dict(self.admitted),
+            "usage": dict(self.usage),
+            "wait_seconds": waits,
+        }
+
+
+llm_dispatcher = LLMDispatcher()
@@ -0,0 +1,234 @@
+"""
+Local stand-ins for the Groq chat model and Whisper (LLM_PROVIDER=mock)
+
+They answer without network access, in the shapes the real providers return, so
+/grade, /summarize, /answer_question and flashcard generation can be load-tested
+offline and reproducibly:
+
+- Latency is sampled from a configurable distribution (MOCK_LLM_LATENCY for the
+  time to the first token, MOCK_WHISPER_LATENCY per transcription) with a seeded
+  random generator (MOCK_SEED). Responses are then written at
+  MOCK_LLM_TOKENS_PER_SECOND: ainvoke() waits for the whole response, astream()
+  yields it a few tokens at a time.
+- Outputs are canned per prompt kind (answer, coverage, accuracy, summary) with
+  sentences of the prompt's source filled in; flashcard arrays and structured
+  grading reports are built from those sentences, so section splitting and
+  dedup see realistic data. MOCK_RESPONSES may name a JSON file mapping kinds
+  (and "transcription") to a text or a list of texts to cycle through; texts
+  may use the {snippet}, {snippet_2} and {snippet_lower} placeholders.
+- Token usage is reported as characters / 4, like the dispatcher's estimate.
+
+Distributions are written "fixed:S", "uniform:LOW,HIGH", "normal:MEAN,SD" or
+"lognormal:MEDIAN,SIGMA", in seconds.
+"""
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+from functools import lru_cache
+from itertools import count
+from typing import Callable, Dict, List
+
+from backend.config import (
+    MOCK_LLM_LATENCY, MOCK_LLM_TOKENS_PER_SECOND, MOCK_WHISPER_LATENCY, MOCK_SEED, MOCK_RESPONSES
+)
+from backend.utils.llm_dispatcher import CHARS_PER_TOKEN
+
+STREAM_CHUNK_TOKENS = 4
+MAX_MOCK_CARDS = 12
+SOURCE_HEADINGS = ("SOURCE CONTENT", "CONTEXT", "CONTENT", "INPUT")  # where the prompts put the material
+
+# First marker found in the prompt decides the kind of canned response
+PROMPT_KINDS = (
+    ("both **coverage** and **accuracy**", "grading"),
+    ("evaluating the **coverage**", "coverage"),
+    ("evaluating the **accuracy**", "accuracy"),
+    ("Summarize the content", "summary"),
+    ("Respond ONLY with valid JSON", "flashcards"),
+    ("trained in the Feynman Technique", "answer"),
+)
+
+CANNED = {
+    "answer": (
+        "**Answer:**\nThe context explains this directly: \"{snippet}\"\n\n"
+        "**Feynman-style recap (1–2 sentences):**\nIn short, {snippet_lower}"
+    ),
+    "coverage": (
+        "**What you covered (correct, included concepts):**\n* {snippet}\n\n"
+        "**What you missed (important concepts not mentioned):**\n* {snippet_2}\n\n"
+        "**Suggested Leitner Flashcards (short & recall-friendly):**\n* Q: What does the source say first? → A: {snippet}"
+    ),
+    "accuracy": (
+        "**Incorrect or misunderstood:**\n* Said: the opposite → Actually: {snippet} (\"{snippet}\")\n\n"
+        "**Correct points:**\n* {snippet_2}\n\n"
+        "**Fix-it Flashcards (Leitner):**\n* Q: What is actually true? → A: {snippet}"
+    ),
+    "summary": (
+        "**Simple explanation (faithful, no invented details):**\n{snippet}\n\n"
+        "**Key ideas:**\n* {snippet}\n* {snippet_2}\n\n"
+        "**Why these ideas matter (simple causal or conceptual connections):**\n* {snippet_2}\n\n"
+        "**Flashcards (Leitner):**\n* Q: What is the main idea? → A: {snippet}"
+    ),
+    "transcription": (
+        "So the main idea is that the process turns one thing into another, and I think "
+        "the first step happens before the second one, which is why the result looks the way it does."
+    ),
+}
+
+
+def parse_distribution(spec: str, rng: random.Random) -> Callable[[], float]:
+    """Sampler of non-negative seconds for a "name:params" distribution spec"""
+    name, _, params = spec.partition(":")
+    try:
+        values = [float(value) for value in params.split(",") if value.strip()]
+        if name == "fixed":
+            (seconds,) = values
+            sample = lambda: seconds
+        elif name == "uniform":
+            low, high = values
+            sample = lambda: rng.uniform(low, high)
+        elif name == "normal":
+            mean, sd = values
+            sample = lambda: rng.gauss(mean, sd)
+        elif name == "lognormal":
+            median, sigma = values
+            sample = lambda: rng.lognormvariate(math.log(median), sigma)
+        else:
+            raise ValueError(name)
+    except ValueError:
+        raise ValueError(f"Invalid latency distribution {spec!r}: use fixed:S, uniform:LOW,HIGH, "
+                         f"normal:MEAN,SD or lognormal:MEDIAN,SIGMA")
+    return lambda: max(0.0, sample())
+
+
+@lru_cache(maxsize=1)
+def canned_responses() -> Dict[str, List[str]]:
+    """Built-in canned texts, overridden by the MOCK_RESPONSES file"""
+    responses = {kind: [text] for kind, text in CANNED.items()}
+    if MOCK_RESPONSES:
+        with open(MOCK_RESPONSES, encoding="utf-8") as f:
+            for kind, texts in json.load(f).items():
+                responses[kind] = [texts] if isinstance(texts, str) else list(texts)
+    return responses
+
+
+def _prompt_text(messages) -> str:
+    if isinstance(messages, str):
+        return messages
+    return "\n".join(str(getattr(message, "content", message)) for message in messages)
+
+
+def _section(prompt: str, heading: str) -> str:
+    match = re.search(rf"### {heading}[^\n]*\n(.*?)(?:\n###|\Z)", prompt, re.DOTALL)
+    return match.group(1).strip() if match else ""
+
+
+def _sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in re.split(r"(?<=[.!?])\s+|\n+", text) if len(sentence.strip()) > 20]
+
+
+class _Responder:
+    """Canned outputs and seeded samplers shared by the mock models"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rng = random.Random(MOCK_SEED)
+        self._llm_latency = parse_distribution(MOCK_LLM_LATENCY, self._rng)
+        self._whisper_latency = parse_distribution(MOCK_WHISPER_LATENCY, self._rng)
+        self._turns = count()
+
+    def llm_latency(self) -> float:
+        with self._lock:
+            return self._llm_latency()
+
+    def whisper_latency(self) -> float:
+        with self._lock:
+            return self._whisper_latency()
+
+    def _canned(self, kind: str) -> str:
+        texts = canned_responses()[kind]
+        return texts[next(self._turns) % len(texts)]
+
+    def respond(self, prompt: str, json_mode: bool) -> str:
+        kind = next((kind for marker, kind in PROMPT_KINDS if marker in prompt), "answer")
+        if json_mode and kind != "flashcards":
+            kind = "grading"
+        source = next(filter(None, (_section(prompt, heading) for heading in SOURCE_HEADINGS)), "")
+        sentences = _sentences(source) or ["The source content is short."]
+        if kind in canned_responses():
+            text = self._canned(kind)
+            snippet, snippet_2 = sentences[0], sentences[min(1, len(sentences) - 1)]
+            for placeholder, value in (("{snippet}", snippet), ("{snippet_2}", snippet_2),
+                                       ("{snippet_lower}", snippet[:1].lower() + snippet[1:])):
+                text = text.replace(placeholder, value)
+            return text
+        # Flashcards and grading reports are built from the source unless MOCK_RESPONSES has them
+        if kind == "flashcards":
+            cards = [{"q": f"What does the text say about \"{' '.join(sentence.split()[:6])}\"?", "a": sentence}
+                     for sentence in sentences[:MAX_MOCK_CARDS]]
+            return json.dumps(cards, ensure_ascii=False)
+        return json.dumps({
+            "covered": sentences[:2],
+            "missed": sentences[2:4],
+            "coverage_flashcards": [{"q": "What does the source say first?", "a": sentences[0]}],
+            "incorrect": [{"said": "the opposite", "actually": sentences[-1], "proof": sentences[-1][:80]}],
+            "correct": sentences[:1],
+            "accuracy_flashcards": [{"q": "What is actually true?", "a": sentences[-1]}],
+        }, ensure_ascii=False)
+
+    def transcription(self) -> str:
+        return self._canned("transcription")
+
+
+@lru_cache(maxsize=1)
+def responder() -> _Responder:
+    return _Responder()
+
+
+def _tokens(text: str) -> int:
+    return max(1, -(-len(text) // CHARS_PER_TOKEN))
+
+
+class MockChatModel:
+    """Async stand-in for ChatGroq: ainvoke() and astream() with simulated latency"""
+
+    def __init__(self, model_name: str = "mock", temperature: float = 0, model_kwargs: dict = None):
+        self.model_name = model_name
+        self.temperature = temperature
+        self.model_kwargs = model_kwargs or {}
+
+    def _respond(self, messages):
+        prompt = _prompt_text(messages)
+        json_mode = self.model_kwargs.get("response_format", {}).get("type") == "json_object"
+        text = responder().respond(prompt, json_mode)
+        usage = {"input_tokens": _tokens(prompt), "output_tokens": _tokens(text)}
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        return text, usage
+
+    async def ainvoke(self, messages):
+        from langchain_core.messages import AIMessage
+
+        text, usage = self._respond(messages)
+        await asyncio.sleep(responder().llm_latency() + usage["output_tokens"] / MOCK_LLM_TOKENS_PER_SECOND)
+        return AIMessage(content=text, usage_metadata=usage, response_metadata={"model_name": self.model_name})
+
+    async def astream(self, messages):
+        from langchain_core.messages import AIMessageChunk
+
+        text, usage = self._respond(messages)
+        await asyncio.sleep(responder().llm_latency())
+        step = STREAM_CHUNK_TOKENS * CHARS_PER_TOKEN
+        for start in range(0, len(text), step):
+            await asyncio.sleep(STREAM_CHUNK_TOKENS / MOCK_LLM_TOKENS_PER_SECOND)
+            yield AIMessageChunk(content=text[start:start + step])
+        # Like Groq with stream usage on, the last chunk carries the token counts
+        yield AIMessageChunk(content="", usage_metadata=usage)
+
+
+def mock_transcribe(filename: str, audio_bytes: bytes) -> str:
+    """Canned transcription after a simulated Whisper delay (blocking, like the Groq client)"""
+    time.sleep(responder().whisper_latency())
+    return responder().transcription()
@@ -0,0 +1,125 @@
+"""
+ONNX Runtime embedding backend (EMBEDDING_BACKEND=onnx)
+
+HuggingFaceEmbeddings runs the model through PyTorch sentence-transformers,
+which on CPU-only servers makes embedding the main cost of preparing a study
+document. OnnxEmbeddings runs the same model exported to ONNX, optionally with
+int8 weights (dynamic quantization), on ONNX Runtime's CPU provider:
+
+- EMBEDDING_THREADS caps the threads of one inference (0 = one per core)
+- texts are tokenized once, sorted by length and embedded EMBEDDING_BATCH_SIZE
+  at a time, each batch padded only to its own longest text
+- pooling follows the export: the sentence_embedding output of a
+  sentence-transformers export, else the [CLS] token (bge models) or, with
+  EMBEDDING_POOLING=mean, the mean over the attention mask
+
+Export the model once (needs optimum[exporters]; --int8 also writes
+model_int8.onnx, selected with EMBEDDING_ONNX_FILE=model_int8.onnx):
+
+    python -m backend.utils.onnx_embeddings models/bge-small-en-v1.5-onnx [--int8]
+"""
+import argparse
+import os
+from typing import List
+
+import numpy as np
+
+POOLINGS = ("cls", "mean")
+MAX_TOKENS = 512
+QUANTIZED_FILE = "model_int8.onnx"
+
+
+class OnnxEmbeddings:
+    """embed_documents() and embed_query() like HuggingFaceEmbeddings, on ONNX Runtime"""
+
+    def __init__(self, model_dir: str, model_file: str = "model.onnx", threads: int = 0,
+                 batch_size: int = 32, pooling: str = "cls"):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        if pooling not in POOLINGS:
+            raise ValueError(f"Invalid pooling {pooling!r}: use one of {', '.join(POOLINGS)}")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self._session = ort.InferenceSession(
+            os.path.join(model_dir, model_file), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._inputs = {node.name for node in self._session.get_inputs()}
+        self._outputs = [node.name for node in self._session.get_outputs()]
+        self._tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        # Batches are padded here, to their own longest text
+        self._tokenizer.no_padding()
+        self._tokenizer.enable_truncation(MAX_TOKENS)
+        self._pad_id = self._tokenizer.token_to_id("[PAD]") or 0
+        self.batch_size = batch_size
+        self.pooling = pooling
+
+    def _run(self, encodings) -> np.ndarray:
+        length = max(len(encoding.ids) for encoding in encodings)
+        ids = np.full((len(encodings), length), self._pad_id, dtype=np.int64)
+        mask = np.zeros((len(encodings), length), dtype=np.int64)
+        types = np.zeros((len(encodings), length), dtype=np.int64)
+        for row, encoding in enumerate(encodings):
+            size = len(encoding.ids)
+            ids[row, :size] = encoding.ids
+            mask[row, :size] = 1
+            types[row, :size] = encoding.type_ids
+        feed = {"input_ids": ids, "attention_mask": mask, "token_type_ids": types}
+        outputs = dict(zip(self._outputs, self._session.run(None, {
+            name: value for name, value in feed.items() if name in self._inputs
+        })))
+        if "sentence_embedding" in outputs:
+            return outputs["sentence_embedding"]
+        hidden = outputs.get("last_hidden_state", next(iter(outputs.values())))
+        if self.pooling == "mean":
+            weights = mask[..., None].astype(hidden.dtype)
+            return (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1)
+        return hidden[:, 0]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """float32 (len(texts), dim) embeddings, not normalized (like HuggingFaceEmbeddings)"""
+        encodings = self._tokenizer.encode_batch(list(texts))
+        order = sorted(range(len(encodings)), key=lambda index: len(encodings[index].ids))
+        vectors = None
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            embedded = self._run([encodings[index] for index in batch])
+            if vectors is None:
+                vectors = np.empty((len(encodings), embedded.shape[1]), dtype=np.float32)
+            vectors[batch] = embedded
+        return vectors if vectors is not None else np.empty((0, 0), dtype=np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed([text])[0].tolist()
+
+
+def export_model(model_name: str, output_dir: str, quantize: bool = False):
+    """Export model_name to output_dir/model.onnx with its tokenizer (and model_int8.onnx)"""
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from transformers import AutoTokenizer
+
+    ORTModelForFeatureExtraction.from_pretrained(model_name, export=True).save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(os.path.join(output_dir, "model.onnx"), os.path.join(output_dir, QUANTIZED_FILE),
+                         weight_type=QuantType.QInt8)
+
+
+if __name__ == "__main__":
+    from backend.config import EMBEDDING_MODEL
+
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX")
+    parser.add_argument("output_dir")
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--int8", action="store_true", help=f"also write the int8-quantized {QUANTIZED_FILE}")
+    args = parser.parse_args()
+    export_model(args.model, args.output_dir, args.int8)
+    print(f"Exported {args.model} to {args.output_dir}")
@@ -0,0 +1,53 @@
+"""
+AI provider selection: Groq (default) or the local mock
+
+rag.py and flashcard_generator.py get their chat model from create_chat_model()
+and audio.py transcribes through transcribe_audio(), so LLM_PROVIDER and
+WHISPER_PROVIDER decide, per process, whether calls go to Groq or to the
+simulated backend in mock_provider.py.
+"""
+from functools import lru_cache
+
+from backend.config import GROQ_API_KEY, GROQ_MODEL, WHISPER_MODEL, LLM_PROVIDER, WHISPER_PROVIDER
+
+PROVIDERS = ("groq", "mock")
+
+for _setting, _value in (("LLM_PROVIDER", LLM_PROVIDER), ("WHISPER_PROVIDER", WHISPER_PROVIDER)):
+    if _value not in PROVIDERS:
+        raise ValueError(f"{_setting} must be one of {', '.join(PROVIDERS)}, got {_value!r}")
+
+
+def create_chat_model(json_mode: bool = False):
+    """Chat model for LLM_PROVIDER; json_mode makes it return a single JSON object"""
+    model_kwargs = {"response_format": {"type": "json_object"}} if json_mode else {}
+    if LLM_PROVIDER == "mock":
+        from backend.utils.mock_provider import MockChatModel
+        return MockChatModel(model_name=f"mock-{GROQ_MODEL}", temperature=0, model_kwargs=model_kwargs)
+
+    from langchain_groq import ChatGroq
+    return ChatGroq(
+        temperature=0,
+        model=GROQ_MODEL,
+        groq_api_key=GROQ_API_KEY,
+        model_kwargs=model_kwargs
+    )
+
+
+@lru_cache(maxsize=1)
+def get_groq_client():
+    """Groq client, created on first use"""
+    from groq import Groq
+    return Groq(api_key=GROQ_API_KEY)
+
+
+def transcribe_audio(filename: str, audio_bytes: bytes) -> str:
+    """Speech to text with WHISPER_PROVIDER (blocking)"""
+    if WHISPER_PROVIDER == "mock":
+        from backend.utils.mock_provider import mock_transcribe
+        return mock_transcribe(filename, audio_bytes)
+
+    result = get_groq_client().audio.transcriptions.create(
+        file=(filename, audio_bytes),
+        model=WHISPER_MODEL,
+    )
+    return result.text
@@ -0,0 +1,107 @@
+"""
+Quantized in-memory storage for unit embeddings
+
+A 384-dimension bge-small embedding takes 1.5 KB as float32. VectorMatrix keeps
+rows as float32, float16 (half the memory) or int8 (a quarter, plus one float32
+scale per row: each row is scaled so its largest component maps to 127).
+Approximate scores are computed a block of rows at a time, so the float32 copy
+a matrix product needs never covers more than SCORE_BLOCK rows.
+
+The ranking error of int8 is small but not nil. shortlist() gives the
+rescore_factor * k best rows by approximate score, which the caller scores again
+against the full-precision vectors it keeps elsewhere (the semantic index reads
+them from item_embeddings), so the final top k and their scores are exact unless
+a true neighbour falls outside the shortlist.
+"""
+from typing import Optional
+
+import numpy as np
+
+STORAGES = ("float32", "float16", "int8")
+SCORE_BLOCK = 1024
+INT8_MAX = 127
+
+
+class VectorMatrix:
+    """Growable matrix of unit vectors stored as float32, float16 or int8"""
+
+    def __init__(self, storage: str = "float32", capacity: int = 0, dim: int = 0):
+        if storage not in STORAGES:
+            raise ValueError(f"Invalid embedding storage {storage!r}: use one of {', '.join(STORAGES)}")
+        self.storage = storage
+        self._rows = np.zeros((capacity, dim), dtype=storage)
+        self._scales = np.ones(capacity, dtype=np.float32) if storage == "int8" else None
+
+    @property
+    def dim(self) -> int:
+        return self._rows.shape[1]
+
+    @property
+    def capacity(self) -> int:
+        return len(self._rows)
+
+    @property
+    def nbytes(self) -> int:
+        return self._rows.nbytes + (self._scales.nbytes if self._scales is not None else 0)
+
+    def resize(self, capacity: int, dim: Optional[int] = None) -> "VectorMatrix":
+        """A matrix of the new capacity holding this one's first rows (all rows if dim is unchanged)"""
+        dim = self.dim if dim is None else dim
+        resized = VectorMatrix(self.storage, capacity, dim)
+        if dim == self.dim:
+            kept = min(capacity, self.capacity)
+            resized._rows[:kept] = self._rows[:kept]
+            if self._scales is not None:
+                resized._scales[:kept] = self._scales[:kept]
+        return resized
+
+    def __setitem__(self, position: int, vector: np.ndarray):
+        if self.storage == "int8":
+            scale = float(np.abs(vector).max()) / INT8_MAX or 1.0
+            self._rows[position] = np.round(vector / scale)
+            self._scales[position] = scale
+        else:
+            self._rows[position] = vector
+
+    def __getitem__(self, positions) -> np.ndarray:
+        """Rows as float32 (dequantized)"""
+        rows = self._rows[positions].astype(np.float32)
+        if self._scales is not None:
+            rows *= self._scales[positions][..., None]
+        return rows
+
+    def move(self, source: int, target: int):
+        self._rows[target] = self._rows[source]
+        if self._scales is not None:
+            self._scales[target] = self._scales[source]
+
+    def scores(self, positions: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Approximate dot products of the rows at positions (ascending) with a float32 query"""
+        scores = np.empty(len(positions), dtype=np.float32)
+        for start in range(0, len(positions), SCORE_BLOCK):
+            block = positions[start:start + SCORE_BLOCK]
+            # Runs of consecutive rows (the usual case: every row is a candidate) are read
+            # through a view instead of being gathered into a copy
+            if block[-1] - block[0] + 1 == len(block):
+                rows = self._rows[block[0]:block[-1] + 1]
+            else:
+                rows = self._rows[block]
+            scores[start:start + len(block)] = rows.astype(np.float32, copy=False) @ query
+        if self._scales is not None:
+            scores *= self._scales[positions]
+        return scores
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indexes of the k highest scores, best first"""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def shortlist(scores: np.ndarray, k: int, storage: str, rescore_factor: int) -> np.ndarray:
+    """Indexes to score again at full precision: the top k, widened for quantized storage"""
+    if storage != "float32" and rescore_factor > 0:
+        k *= rescore_factor
+    return top_k(scores, k)
@@ -1,41 +1,41 @@
 """
 Vector database and RAG utilities
+
+The langchain, HuggingFace and provider imports happen inside the functions so that
+importing this module (and starting the API) stays cheap. LLM calls go through
+the dispatcher (rate limits, priorities, coalescing of identical prompts), and
+context assembly (retrieval, context_builder) runs in a worker thread so the query
+embedding doesn't block the event loop.
 """
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from backend.config import GROQ_MODEL, GROQ_API_KEY
-from backend.utils.document_loader import split_documents
-
-
-def create_db(text: str) -> Chroma:
-    """Create vector database from text"""
-    chunks = split_documents(text)
-    embed_model = HuggingFaceEmbeddings(model_name="BAAI/bge-small-en-v1.5")
-
-    vector_db = Chroma.from_texts(
-        texts=chunks,
-        embedding=embed_model,
-        collection_name="local-rag"
-    )
-    
-    return vector_db
+import asyncio
 
+from backend.utils.llm_dispatcher import llm_dispatcher
+from backend.utils.providers import create_chat_model
+from backend.utils.retrieval import StudyDocument
 
-def delete_vector_db(vector_db: Chroma):
-    """Delete the vector database"""
-    if vector_db is not None:
-        vector_db.delete_collection()
 
+def create_db(text: str) -> StudyDocument:
+    """Prepare a study document for retrieval (see retrieval.StudyDocument)"""
+    return StudyDocument(text)
+
+
+def delete_vector_db(document: StudyDocument):
+    """Release the document's vector store, if it has one"""
+    if document is not None:
+        document.close()
 
-def answer_question(question: str, vector_db: Chroma) -> str:
-    """Answer a user's question using the vector database"""
-    llm = ChatGroq(
-        temperature=0,
-        model=GROQ_MODEL,
-        groq_api_key=GROQ_API_KEY
-    )
+
+async def ask_with_context(prompt, query: str, document: StudyDocument, llm=None, **values) -> str:
+    """Run a prompt with {input} = query and {context} = the document passages assembled for it"""
+    context = await asyncio.to_thread(document.context, query)
+    messages = prompt.format_messages(input=query, context=context, **values)
+    result = await llm_dispatcher.complete(llm or create_chat_model(), messages)
+    return result.content
+
+
+async def answer_question(question: str, document: StudyDocument) -> str:
+    """Answer a user's question from the study document"""
+    from langchain_core.prompts import ChatPromptTemplate
 
     system_prompt = (
 """
@@ -74,27 +74,12 @@ Answer ONLY using information found in the retrieved context.
         ("human", "{input}"),
     ])
     
-    retriever = vector_db.as_retriever()
-    chain = (
-        {
-            "input": lambda x: x["input"],
-            "context": lambda x: retriever.invoke(x["input"])
-        }
-        | prompt
-        | llm
-    )
+    return await ask_with_context(prompt, question, document)
 
-    result = chain.invoke({"input": question})
-    return result.content
 
-
-def evaluate_coverage(transcription: str, vector_db: Chroma) -> str:
+async def evaluate_coverage(transcription: str, document: StudyDocument) -> str:
     """Evaluate coverage of user's explanation"""
-    llm = ChatGroq(
-        temperature=0,
-        model=GROQ_MODEL,
-        groq_api_key=GROQ_API_KEY
-    )
+    from langchain_core.prompts import ChatPromptTemplate
 
     system_prompt = (
 """
@@ -140,27 +125,12 @@ Be DIRECT, simple, and factual. No filler language.
         ("human", "{input}"),
     ])
     
-    retriever = vector_db.as_retriever()
-    chain = (
-        {
-            "input": lambda x: x["input"],
-            "context": lambda x: retriever.invoke(x["input"])
-        }
-        | prompt
-        | llm
-    )
+    return await ask_with_context(prompt, transcription, document)
 
-    output = chain.invoke({"input": transcription})
-    return output.content
 
-
-def evaluate_accuracy(transcription: str, vector_db: Chroma) -> str:
+async def evaluate_accuracy(transcription: str, document: StudyDocument) -> str:
     """Evaluate accuracy of user's explanation"""
-    llm = ChatGroq(
-        temperature=0,
-        model=GROQ_MODEL,
-        groq_api_key=GROQ_API_KEY
-    )
+    from langchain_core.prompts import ChatPromptTemplate
 
     system_prompt = (
 """
@@ -209,22 +179,13 @@ RULES:
         ("human", "{input}"),
     ])
     
-    retriever = vector_db.as_retriever()
-    chain = (
-        {
-            "input": lambda x: x["input"],
-            "context": lambda x: retriever.invoke(x["input"])
-        }
-        | prompt
-        | llm
-    )
+    return await ask_with_context(prompt, transcription, document)
 
-    output = chain.invoke({"input": transcription})
-    return output.content
 
-
-def summarize(docs) -> str:
+async def summarize(docs) -> str:
     """Generate summary of content"""
+    from langchain_core.prompts import ChatPromptTemplate
+
     context_text = "\n\n".join([d.page_content for d in docs]).strip()
     if not context_text:
         raise ValueError("Empty text input")
@@ -274,13 +235,5 @@ Provide:
         )
     ])
 
-    llm = ChatGroq(
-        temperature=0,
-        model=GROQ_MODEL,
-        groq_api_key=GROQ_API_KEY
-    )
-
-    chain = prompt | llm
-    result = chain.invoke({"context": context_text})
-    
+    result = await llm_dispatcher.complete(create_chat_model(), prompt.format_messages(context=context_text))
     return result.content
@@ -0,0 +1,177 @@
+"""
+Adaptive retrieval for study documents
+
+create_db() used to chunk every document, embed every chunk and build a Chroma
+collection before the first prompt, even for a pasted paragraph that fits in the
+prompt whole, and for a long PDF it embedded hundreds of chunks of which a dozen
+are ever looked at. StudyDocument picks the cheapest strategy that fits:
+
+- full_text: documents of at most RETRIEVAL_FULL_TEXT_TOKENS go into the prompt
+  whole (compacted); nothing is chunked or embedded.
+- hybrid: longer documents are chunked and indexed with BM25 (in memory, no
+  model). Per query, the RETRIEVAL_LEXICAL_CANDIDATES chunks with the best BM25
+  scores are embedded (once per document) and the context builder picks among
+  them by dense similarity and MMR. A query with no term in the document falls
+  back to scoring every chunk densely.
+- dense: every chunk embedded into a Chroma collection up front and scored
+  densely, as before (RETRIEVAL_MODE=dense).
+
+report() gives the strategy and the time spent preparing the document and
+assembling contexts, which the study endpoints return with their results.
+"""
+import math
+import re
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.config import RETRIEVAL_MODE, RETRIEVAL_FULL_TEXT_TOKENS, RETRIEVAL_LEXICAL_CANDIDATES
+from backend.utils.context_builder import assemble, build_context, chunk_overlaps, compact, estimate_tokens
+from backend.utils.document_loader import split_documents
+from backend.utils.embeddings import embed_query, embed_texts, get_embedding_model
+
+RETRIEVAL_MODES = ("adaptive", "hybrid", "dense")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have how i in is it its of on or so that the their them "
+    "then there these they this to was were what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords, for BM25"""
+    return [token for token in re.findall(r"[a-z0-9]+", text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+
+class BM25:
+    """Okapi BM25 over a fixed list of texts"""
+
+    def __init__(self, texts: List[str], k1: float = 1.5, b: float = 0.75):
+        self.size = len(texts)
+        counts = [Counter(tokenize(text)) for text in texts]
+        lengths = np.array([sum(count.values()) for count in counts], dtype=np.float32)
+        # Per-chunk length normalization of the term frequency denominator
+        self._norm = k1 * (1 - b + b * lengths / max(float(lengths.mean()) if self.size else 0.0, 1.0))
+        self._k1 = k1
+        postings: Dict[str, List] = {}
+        for index, count in enumerate(counts):
+            for term, frequency in count.items():
+                postings.setdefault(term, []).append((index, frequency))
+        self._postings = {
+            term: (np.array([i for i, _ in entries]), np.array([f for _, f in entries], dtype=np.float32),
+                   math.log(1 + (self.size - len(entries) + 0.5) / (len(entries) + 0.5)))
+            for term, entries in postings.items()
+        }
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every text for query (0 where no query term occurs)"""
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in set(tokenize(query)):
+            if term in self._postings:
+                indices, frequencies, idf = self._postings[term]
+                scores[indices] += idf * frequencies * (self._k1 + 1) / (frequencies + self._norm[indices])
+        return scores
+
+
+def create_vector_store(chunks: List[str]):
+    """Chroma collection of the chunks, embedded with the shared embedding model"""
+    from langchain_community.vectorstores import Chroma
+
+    # Chunk positions let the context builder merge adjacent chunks; a collection per
+    # document keeps concurrent requests from retrieving each other's chunks
+    return Chroma.from_texts(
+        texts=chunks,
+        embedding=get_embedding_model(),
+        metadatas=[{"chunk": i} for i in range(len(chunks))],
+        collection_name=f"local-rag-{uuid.uuid4().hex}"
+    )
+
+
+class StudyDocument:
+    """A study document prepared for context assembly with the cheapest strategy that fits"""
+
+    def __init__(self, text: str, mode: str = RETRIEVAL_MODE, full_text_tokens: int = RETRIEVAL_FULL_TEXT_TOKENS):
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Invalid retrieval mode {mode!r}: use one of {', '.join(RETRIEVAL_MODES)}")
+        started = time.perf_counter()
+        self.tokens = estimate_tokens(text)
+        self.chunks: List[str] = []
+        self.embedded = 0
+        self._store = None
+        if mode == "adaptive" and self.tokens <= full_text_tokens:
+            self.strategy = "full_text"
+            self._text = compact(text)
+        else:
+            self.strategy = "dense" if mode == "dense" else "hybrid"
+            self.chunks = split_documents(text)
+            if self.strategy == "dense":
+                self._store = create_vector_store(self.chunks)
+                self.embedded = len(self.chunks)
+            else:
+                self._bm25 = BM25(self.chunks)
+                self._overlaps = chunk_overlaps(self.chunks)
+                self._vectors: Optional[np.ndarray] = None
+                self._is_embedded = np.zeros(len(self.chunks), dtype=bool)
+        self.prepare_seconds = time.perf_counter() - started
+        self.retrieve_seconds = 0.0
+        self.queries = 0
+
+    def _embed(self, indices: np.ndarray) -> np.ndarray:
+        """Unit vectors of all chunks, embedding those of indices that aren't yet"""
+        missing = [int(index) for index in indices if not self._is_embedded[index]]
+        if missing:
+            vectors = embed_texts([self.chunks[index] for index in missing])
+            if self._vectors is None:
+                self._vectors = np.zeros((len(self.chunks), vectors.shape[1]), dtype=np.float32)
+            self._vectors[missing] = vectors
+            self._is_embedded[missing] = True
+            self.embedded += len(missing)
+        return self._vectors
+
+    def _hybrid_context(self, query: str, **options) -> str:
+        if not self.chunks:
+            return ""
+        lexical = self._bm25.scores(query)
+        candidates = np.flatnonzero(lexical > 0)
+        if len(candidates):
+            candidates = candidates[np.argsort(-lexical[candidates], kind="stable")[:RETRIEVAL_LEXICAL_CANDIDATES]]
+        else:
+            candidates = np.arange(len(self.chunks))
+        vectors = self._embed(candidates)
+        relevance = np.full(len(self.chunks), -np.inf, dtype=np.float32)
+        relevance[candidates] = vectors[candidates] @ embed_query(query)
+        return assemble(relevance, vectors, self.chunks, overlaps=self._overlaps, **options)
+
+    def context(self, query: str, **options) -> str:
+        """Context text for query (the whole document for full_text)"""
+        started = time.perf_counter()
+        if self.strategy == "full_text":
+            context = self._text
+        elif self.strategy == "dense":
+            context = build_context(self._store, query, **options)
+        else:
+            context = self._hybrid_context(query, **options)
+        self.retrieve_seconds += time.perf_counter() - started
+        self.queries += 1
+        return context
+
+    def report(self) -> dict:
+        """Strategy, size and timings, for the response and the server log"""
+        return {
+            "strategy": self.strategy,
+            "document_tokens": self.tokens,
+            "chunks": len(self.chunks),
+            "embedded_chunks": self.embedded,
+            "prepare_ms": round(self.prepare_seconds * 1000, 1),
+            "retrieve_ms": round(self.retrieve_seconds * 1000, 1),
+            "queries": self.queries,
+        }
+
+    def close(self):
+        """Drop the Chroma collection, if any"""
+        if self._store is not None:
+            self._store.delete_collection()
+            self._store = None
@@ -0,0 +1,80 @@
+"""
+Migration of legacy review histories into the review_log table
+
+Flashcards used to keep their reviews as a JSON list in review_history, rewritten
+on every review. Reviews now go to the append-only review_log table, and
+migrate_review_history() moves the old lists over: init_db() runs it on startup,
+REVIEW_LOG_MIGRATION_BATCH cards per transaction, and POST
+/flashcards/history/migrate re-runs it on demand. Each batch clears the blobs it
+moved, and cards that already have review_log rows are not copied again, so the
+migration can be interrupted and re-run at any point.
+"""
+import json
+from datetime import datetime
+
+from sqlalchemy import exists, select, update
+from sqlalchemy.orm import Session
+
+from backend.database import FlashcardModel, ReviewLogModel
+
+REVIEW_LOG_MIGRATION_BATCH = 500
+
+
+def _history_rows(card_id: int, review_history: str) -> list:
+    try:
+        history = json.loads(review_history)
+    except ValueError:
+        print(f"Skipping unreadable review history for flashcard {card_id}")
+        return []
+    rows = []
+    for item in history if isinstance(history, list) else []:
+        try:
+            reviewed_at = datetime.fromisoformat(item["date"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        rows.append({
+            "flashcard_id": card_id,
+            "result": str(item.get("result", ""))[:10],
+            "box": item.get("box"),
+            "reviewed_at": reviewed_at
+        })
+    return rows
+
+
+def migrate_review_history(bind, batch_size: int = REVIEW_LOG_MIGRATION_BATCH) -> int:
+    """Move legacy JSON review_history blobs into review_log, one batch of cards per transaction"""
+    migrated = 0
+    last_id = 0
+    with Session(bind) as db:
+        while True:
+            rows = db.execute(
+                select(FlashcardModel.id, FlashcardModel.review_history,
+                       exists().where(ReviewLogModel.flashcard_id == FlashcardModel.id))
+                .where(FlashcardModel.id > last_id, FlashcardModel.review_history.isnot(None))
+                .order_by(FlashcardModel.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            log_rows = []
+            for card_id, review_history, logged in rows:
+                # A card with review_log rows was migrated (or reviewed) already
+                if not logged:
+                    log_rows.extend(_history_rows(card_id, review_history))
+
+            card_ids = [row[0] for row in rows]
+            if log_rows:
+                db.execute(ReviewLogModel.__table__.insert(), log_rows)
+            # Clearing the blob in the same transaction makes the migration resumable
+            db.execute(
+                update(FlashcardModel.__table__).where(FlashcardModel.__table__.c.id.in_(card_ids))
+                # Keep updated_at: moving the history is not a change clients need to sync
+                .values(review_history=None, updated_at=FlashcardModel.__table__.c.updated_at)
+            )
+            db.commit()
+
+            migrated += len(log_rows)
+            last_id = card_ids[-1]
+        if migrated:
+            print(f"Migrated {migrated} reviews into review_log")
+    return migrated
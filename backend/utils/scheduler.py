@@ -0,0 +1,252 @@
+"""
+Spaced repetition schedulers (Leitner, SM-2, FSRS)
+
+Every scheduler works on whole columns at once: a Deck holds one NumPy array per
+card field, so reviewing a batch of cards or recomputing next_review for an
+entire deck after a policy change is a single vectorized pass.
+"""
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from backend.config import SCHEDULER_ALGORITHM
+
+RATINGS = {"again": 1, "hard": 2, "good": 3, "easy": 4}
+
+# FlashcardModel columns that make up a card's scheduling state, in Deck order
+CARD_FIELDS = ("leitner_box", "ease_factor", "repetitions", "stability", "difficulty", "last_review")
+
+DEFAULT_EASE = 2.5
+AGAIN_INTERVAL_DAYS = 15 / (24 * 60)  # failed cards come back within the session
+MAX_INTERVAL_DAYS = 36500.0
+SECONDS_PER_DAY = 86400
+
+
+@dataclass
+class Deck:
+    """Scheduling state of many cards, one array per field"""
+    box: np.ndarray          # int64, Leitner nest 1-4 (rating of the last review)
+    ease: np.ndarray         # float64, SM-2 ease factor
+    repetitions: np.ndarray  # int64, consecutive successful reviews
+    stability: np.ndarray    # float64, FSRS stability in days (nan = not seeded)
+    difficulty: np.ndarray   # float64, FSRS difficulty 1-10 (nan = not seeded)
+    last_review: np.ndarray  # datetime64[s] (NaT = never reviewed)
+
+    def __len__(self) -> int:
+        return len(self.box)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> "Deck":
+        """Build a deck from (leitner_box, ease_factor, repetitions, stability, difficulty, last_review) rows"""
+        rows = list(rows)
+        if not rows:
+            columns = [[] for _ in CARD_FIELDS]
+        else:
+            columns = [list(column) for column in zip(*rows)]
+        box, ease, repetitions, stability, difficulty, last_review = columns
+        return cls(
+            box=np.array([b or 1 for b in box], dtype=np.int64),
+            ease=np.array([DEFAULT_EASE if e is None else e for e in ease], dtype=np.float64),
+            repetitions=np.array([r or 0 for r in repetitions], dtype=np.int64),
+            stability=np.array([np.nan if s is None else s for s in stability], dtype=np.float64),
+            difficulty=np.array([np.nan if d is None else d for d in difficulty], dtype=np.float64),
+            last_review=np.array(last_review, dtype="datetime64[s]"),
+        )
+
+    def to_rows(self) -> List[tuple]:
+        """Convert back to plain Python rows in CARD_FIELDS order"""
+        return list(zip(
+            self.box.tolist(),
+            self.ease.tolist(),
+            self.repetitions.tolist(),
+            [None if np.isnan(s) else s for s in self.stability.tolist()],
+            [None if np.isnan(d) else d for d in self.difficulty.tolist()],
+            self.last_review.astype("datetime64[us]").tolist(),
+        ))
+
+
+def ratings_from_results(results: Iterable[str]) -> np.ndarray:
+    """Map "again"/"hard"/"good"/"easy" to ratings 1-4"""
+    try:
+        return np.array([RATINGS[result] for result in results], dtype=np.int64)
+    except KeyError as e:
+        raise ValueError(f"Invalid review result: {e.args[0]}")
+
+
+def to_datetime64(values) -> np.ndarray:
+    """Convert datetimes (or a single datetime) to a datetime64[s] array"""
+    if isinstance(values, datetime):
+        values = [values]
+    return np.array(values, dtype="datetime64[s]")
+
+
+def days_to_timedelta(days: np.ndarray) -> np.ndarray:
+    return np.round(days * SECONDS_PER_DAY).astype("timedelta64[s]")
+
+
+class Scheduler:
+    """Base class: subclasses implement review() and intervals()"""
+    name = ""
+
+    def review(self, deck: Deck, ratings: np.ndarray, now: np.ndarray) -> Deck:
+        """Return the deck state after each card is rated (1-4) at `now`"""
+        raise NotImplementedError
+
+    def intervals(self, deck: Deck) -> np.ndarray:
+        """Days between each card's last review and its next review"""
+        raise NotImplementedError
+
+    def next_review(self, deck: Deck) -> np.ndarray:
+        """next_review for every card (NaT for cards never reviewed)"""
+        interval = np.clip(self.intervals(deck), AGAIN_INTERVAL_DAYS, MAX_INTERVAL_DAYS)
+        return deck.last_review + days_to_timedelta(interval)
+
+    def reschedule(self, deck: Deck, current: np.ndarray) -> np.ndarray:
+        """Recompute next_review for a deck, keeping `current` for cards never reviewed"""
+        next_review = self.next_review(deck)
+        return np.where(np.isnat(next_review), current, next_review)
+
+
+class LeitnerScheduler(Scheduler):
+    """Fixed interval per nest: again 15 min, hard 1 day, good 2 days, easy 7 days"""
+    name = "leitner"
+    BOX_INTERVALS = np.array([AGAIN_INTERVAL_DAYS, AGAIN_INTERVAL_DAYS, 1.0, 2.0, 7.0])
+
+    def review(self, deck: Deck, ratings: np.ndarray, now: np.ndarray) -> Deck:
+        return replace(
+            deck,
+            box=ratings.copy(),
+            repetitions=np.where(ratings > 1, deck.repetitions + 1, 0),
+            last_review=np.broadcast_to(now, deck.last_review.shape).copy(),
+        )
+
+    def intervals(self, deck: Deck) -> np.ndarray:
+        return self.BOX_INTERVALS[np.clip(deck.box, 1, 4)]
+
+
+class SM2Scheduler(Scheduler):
+    """SuperMemo-2: ease factor adjusted by answer quality, intervals 1, 6, 6*EF^(n-2) days"""
+    name = "sm2"
+    QUALITY = np.array([0, 1, 3, 4, 5])  # rating -> SM-2 quality (0-5)
+    MIN_EASE = 1.3
+
+    def review(self, deck: Deck, ratings: np.ndarray, now: np.ndarray) -> Deck:
+        quality = self.QUALITY[ratings]
+        miss = 5 - quality
+        ease = np.maximum(self.MIN_EASE, deck.ease + 0.1 - miss * (0.08 + miss * 0.02))
+        return replace(
+            deck,
+            box=ratings.copy(),
+            ease=ease,
+            repetitions=np.where(quality < 3, 0, deck.repetitions + 1),
+            last_review=np.broadcast_to(now, deck.last_review.shape).copy(),
+        )
+
+    def intervals(self, deck: Deck) -> np.ndarray:
+        reps = deck.repetitions
+        exponent = np.clip(reps - 2, 0, 64)
+        with np.errstate(over="ignore"):
+            long_interval = 6.0 * np.power(deck.ease, exponent)
+        return np.select(
+            [reps <= 0, reps == 1, reps == 2],
+            [AGAIN_INTERVAL_DAYS, 1.0, 6.0],
+            default=long_interval,
+        )
+
+
+class FSRSScheduler(Scheduler):
+    """FSRS v4.5 with the published default weights and 90% desired retention"""
+    name = "fsrs"
+    W = np.array([
+        0.4872, 1.4003, 3.7145, 13.8206, 5.1618, 1.2298, 0.8975, 0.031, 1.6474,
+        0.1367, 1.0461, 2.1072, 0.0793, 0.3246, 1.587, 0.2272, 2.8755,
+    ])
+    DECAY = -0.5
+    FACTOR = 0.9 ** (1 / DECAY) - 1  # 19/81, so that R(S, S) = 90%
+
+    def __init__(self, desired_retention: float = 0.9):
+        self.desired_retention = desired_retention
+
+    def _initial_stability(self, ratings: np.ndarray) -> np.ndarray:
+        return self.W[np.clip(ratings, 1, 4) - 1]
+
+    def _initial_difficulty(self, ratings: np.ndarray) -> np.ndarray:
+        return np.clip(self.W[4] - (ratings - 3) * self.W[5], 1.0, 10.0)
+
+    def review(self, deck: Deck, ratings: np.ndarray, now: np.ndarray) -> Deck:
+        w = self.W
+        now = np.broadcast_to(now, deck.last_review.shape)
+        seeded = ~np.isnan(deck.stability) & ~np.isnan(deck.difficulty) & ~np.isnat(deck.last_review)
+
+        # Placeholders keep the math finite for unseeded cards; np.where picks the init values for them
+        stability = np.where(seeded, deck.stability, 1.0)
+        difficulty = np.where(seeded, deck.difficulty, 5.0)
+        elapsed = np.where(
+            seeded, (now - np.where(seeded, deck.last_review, now)) / np.timedelta64(1, "D"), 0.0
+        )
+        elapsed = np.maximum(elapsed, 0.0)
+        retrievability = np.power(1 + self.FACTOR * elapsed / stability, self.DECAY)
+
+        next_difficulty = difficulty - w[6] * (ratings - 3)
+        next_difficulty = w[7] * self._initial_difficulty(np.full_like(ratings, 3)) + (1 - w[7]) * next_difficulty
+        next_difficulty = np.clip(next_difficulty, 1.0, 10.0)
+
+        hard_penalty = np.where(ratings == 2, w[15], 1.0)
+        easy_bonus = np.where(ratings == 4, w[16], 1.0)
+        recall_stability = stability * (
+            1 + np.exp(w[8]) * (11 - difficulty) * np.power(stability, -w[9])
+            * (np.exp(w[10] * (1 - retrievability)) - 1) * hard_penalty * easy_bonus
+        )
+        forget_stability = (
+            w[11] * np.power(difficulty, -w[12]) * (np.power(stability + 1, w[13]) - 1)
+            * np.exp(w[14] * (1 - retrievability))
+        )
+        next_stability = np.where(ratings == 1, forget_stability, recall_stability)
+
+        return replace(
+            deck,
+            box=ratings.copy(),
+            repetitions=np.where(ratings > 1, deck.repetitions + 1, 0),
+            stability=np.where(seeded, next_stability, self._initial_stability(ratings)),
+            difficulty=np.where(seeded, next_difficulty, self._initial_difficulty(ratings)),
+            last_review=now.copy(),
+        )
+
+    def intervals(self, deck: Deck) -> np.ndarray:
+        # Cards scheduled by another algorithm get a stability seeded from their nest
+        stability = np.where(np.isnan(deck.stability), self._initial_stability(deck.box), deck.stability)
+        interval = stability / self.FACTOR * (np.power(self.desired_retention, 1 / self.DECAY) - 1)
+        # Lapsed cards are relearned within the session, like the other schedulers
+        return np.where(deck.box == 1, AGAIN_INTERVAL_DAYS, interval)
+
+
+SCHEDULERS: Dict[str, Scheduler] = {}
+
+
+def register_scheduler(scheduler: Scheduler):
+    """Make a scheduler selectable by name (SCHEDULER_ALGORITHM or the ?algorithm= parameter)"""
+    SCHEDULERS[scheduler.name] = scheduler
+
+
+for _scheduler in (LeitnerScheduler(), SM2Scheduler(), FSRSScheduler()):
+    register_scheduler(_scheduler)
+
+
+def get_scheduler(name: Optional[str] = None) -> Scheduler:
+    """Get a scheduler by name, defaulting to the configured algorithm"""
+    name = (name or SCHEDULER_ALGORITHM).lower()
+    if name not in SCHEDULERS:
+        raise ValueError(f"Unknown scheduler: {name}. Use one of {', '.join(SCHEDULERS)}")
+    return SCHEDULERS[name]
+
+
+def review_card(card, result: str, reviewed_at: datetime, scheduler: Optional[Scheduler] = None):
+    """Apply one review to a FlashcardModel in place (scheduling state and next_review)"""
+    scheduler = scheduler or get_scheduler()
+    deck = Deck.from_rows([tuple(getattr(card, field) for field in CARD_FIELDS)])
+    deck = scheduler.review(deck, ratings_from_results([result]), to_datetime64(reviewed_at))
+    for field, value in zip(CARD_FIELDS, deck.to_rows()[0]):
+        setattr(card, field, value)
+    card.next_review = scheduler.next_review(deck).astype("datetime64[us]").tolist()[0]
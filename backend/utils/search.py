@@ -0,0 +1,197 @@
+"""
+Full-text search over notes and flashcards
+
+PostgreSQL keeps a generated, weighted tsvector column per table with a GIN index
+(title/question weight A, content/answer weight B). SQLite keeps external-content
+FTS5 tables in sync with triggers and ranks with bm25. Both return the same
+result shape with <mark>-highlighted titles and snippets.
+
+The database marks matches with control characters, never HTML: the note and
+card text around them is user input, so it is HTML-escaped in Python first and
+only then are the markers replaced with <mark> tags.
+"""
+import html
+import re
+from typing import List, Optional
+
+from sqlalchemy import inspect, text
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+# What ts_headline / highlight() / snippet() put around matches
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+SNIPPET_WORDS = 24
+SEARCH_TYPES = ("note", "flashcard")
+
+# result type -> (table, title column, body column)
+SEARCH_TABLES = {
+    "note": ("notes", "title", "content"),
+    "flashcard": ("flashcards", "question", "answer"),
+}
+
+# bm25 weights for (title, body); FTS5 ranks lower = better
+SQLITE_BM25_WEIGHTS = (4.0, 1.0)
+
+
+def setup_search(bind):
+    """Create the full-text index and its sync machinery if missing (idempotent)"""
+    dialect = bind.dialect.name
+    with bind.begin() as conn:
+        if dialect == "postgresql":
+            for table, title, body in SEARCH_TABLES.values():
+                _setup_postgres(conn, table, title, body)
+        elif dialect == "sqlite":
+            existing = set(inspect(conn).get_table_names())
+            for table, title, body in SEARCH_TABLES.values():
+                _setup_sqlite(conn, table, title, body, rebuild=f"{table}_fts" not in existing)
+        else:
+            print(f"Full-text search is not supported on {dialect}")
+
+
+def _setup_postgres(conn, table: str, title: str, body: str):
+    conn.execute(text(
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+        f"setweight(to_tsvector('english', coalesce({title}, '')), 'A') || "
+        f"setweight(to_tsvector('english', coalesce({body}, '')), 'B')) STORED"
+    ))
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_search ON {table} USING GIN (search_vector)"))
+
+
+def _setup_sqlite(conn, table: str, title: str, body: str, rebuild: bool):
+    fts = f"{table}_fts"
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{title}, {body}, content='{table}', content_rowid='id', tokenize='porter unicode61')"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {title}, {body}) VALUES (new.id, new.{title}, new.{body}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {title}, {body}) VALUES ('delete', old.id, old.{title}, old.{body}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {title}, {body} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {title}, {body}) VALUES ('delete', old.id, old.{title}, old.{body}); "
+        f"INSERT INTO {fts}(rowid, {title}, {body}) VALUES (new.id, new.{title}, new.{body}); END"
+    ))
+    if rebuild:
+        # Index rows that were written before the FTS table existed
+        conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def sqlite_match_query(query: str) -> str:
+    """Turn free text into an FTS5 query: every word must match (quoted, so no operator injection)"""
+    terms = re.findall(r"\w+", query)
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def _postgres_hits(db, kind: str, query: str, subject: Optional[str], limit: int) -> List[dict]:
+    table, title, body = SEARCH_TABLES[kind]
+    subject_filter = "AND subject = :subject" if subject else ""
+    # Rank through the GIN index first; ts_headline only runs on the page of hits
+    sql = text(f"""
+        SELECT hits.id, hits.subject,
+               ts_headline('english', coalesce(hits.{title}, ''), q.query, :title_options) AS title,
+               ts_headline('english', coalesce(hits.{body}, ''), q.query, :snippet_options) AS snippet,
+               hits.rank
+        FROM (
+            SELECT id, subject, {title}, {body}, ts_rank_cd(search_vector, query) AS rank
+            FROM {table}, websearch_to_tsquery('english', :query) AS query
+            WHERE search_vector @@ query {subject_filter}
+            ORDER BY rank DESC, id
+            LIMIT :limit
+        ) AS hits, websearch_to_tsquery('english', :query) AS q(query)
+        ORDER BY hits.rank DESC, hits.id
+    """)
+    markers = f"StartSel={MATCH_START}, StopSel={MATCH_END}"
+    rows = db.execute(sql, {
+        "query": query,
+        "subject": subject,
+        "limit": limit,
+        "title_options": f"{markers}, HighlightAll=true",
+        "snippet_options": f"{markers}, MaxWords={SNIPPET_WORDS}, MinWords=8, MaxFragments=2, FragmentDelimiter=\" … \"",
+    })
+    return [_hit(kind, row) for row in rows]
+
+
+def _sqlite_hits(db, kind: str, query: str, subject: Optional[str], limit: int) -> List[dict]:
+    table, title, body = SEARCH_TABLES[kind]
+    fts = f"{table}_fts"
+    match = sqlite_match_query(query)
+    if not match:
+        return []
+    subject_filter = f"AND {table}.subject = :subject" if subject else ""
+    title_weight, body_weight = SQLITE_BM25_WEIGHTS
+    # The inner query only ranks; highlight()/snippet() run for the page of hits
+    sql = text(f"""
+        SELECT {table}.id, {table}.subject,
+               highlight({fts}, 0, :start, :end) AS title,
+               snippet({fts}, 1, :start, :end, ' … ', {SNIPPET_WORDS}) AS snippet,
+               hits.rank
+        FROM (
+            SELECT {fts}.rowid AS id, -bm25({fts}, {title_weight}, {body_weight}) AS rank
+            FROM {fts} JOIN {table} ON {table}.id = {fts}.rowid
+            WHERE {fts} MATCH :match {subject_filter}
+            ORDER BY rank DESC, {fts}.rowid
+            LIMIT :limit
+        ) AS hits
+        JOIN {fts} ON {fts}.rowid = hits.id
+        JOIN {table} ON {table}.id = hits.id
+        WHERE {fts} MATCH :match
+        ORDER BY hits.rank DESC, hits.id
+    """)
+    rows = db.execute(sql, {
+        "match": match,
+        "subject": subject,
+        "limit": limit,
+        "start": MATCH_START,
+        "end": MATCH_END,
+    })
+    return [_hit(kind, row) for row in rows]
+
+
+def highlighted(fragment: Optional[str]) -> str:
+    """HTML-escape a marked fragment, then turn its match markers into <mark> tags"""
+    escaped = html.escape(fragment or "")
+    return escaped.replace(MATCH_START, HIGHLIGHT_START).replace(MATCH_END, HIGHLIGHT_END)
+
+
+def _hit(kind: str, row) -> dict:
+    return {
+        "type": kind,
+        "id": row[0],
+        "subject": row[1],
+        "title": highlighted(row[2]),
+        "snippet": highlighted(row[3]),
+        "rank": float(row[4]),
+    }
+
+
+def search(db, query: str, types=SEARCH_TYPES, subject: Optional[str] = None,
+           limit: int = 20, offset: int = 0) -> dict:
+    """Ranked, highlighted hits across the requested types with limit/offset paging"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        find = _postgres_hits
+    elif dialect == "sqlite":
+        find = _sqlite_hits
+    else:
+        raise ValueError(f"Full-text search is not supported on {dialect}")
+
+    # Each type contributes at most offset + limit + 1 hits; merge by rank and cut the page
+    window = offset + limit + 1
+    hits = []
+    for kind in types:
+        hits.extend(find(db, kind, query, subject, window))
+    hits.sort(key=lambda hit: (-hit["rank"], hit["type"], hit["id"]))
+
+    return {
+        "query": query,
+        "results": hits[offset:offset + limit],
+        "limit": limit,
+        "offset": offset,
+        "has_more": len(hits) > offset + limit,
+    }
@@ -0,0 +1,332 @@
+"""
+Semantic index over saved notes and flashcards
+
+Each note/flashcard has one row in item_embeddings holding its embedding and a
+hash of the embedded text. Writes go through update_items(), which re-embeds
+only items whose text or embedding configuration (EMBEDDING_KEY: model, backend,
+ONNX file) changed, so edits that don't touch the content, reviews and
+rescheduling cost nothing. Queries run against an
+in-memory matrix of unit vectors loaded from item_embeddings on first search and
+kept current by the same writes, so top-k is one matrix-vector product. The
+matrix may be stored quantized (EMBEDDING_STORAGE=float16 or int8, see
+quantized_vectors.py); the best approximate hits are then scored again with
+their float32 vectors from item_embeddings.
+
+Like the due queue, the in-memory copy is per process (desktop, single worker).
+"""
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from backend.config import EMBEDDING_STORAGE, EMBEDDING_RESCORE_FACTOR
+from backend.database import SessionLocal, ItemEmbeddingModel, NoteModel, FlashcardModel
+from backend.utils.embeddings import EMBEDDING_KEY, embed_query, embed_texts
+from backend.utils.quantized_vectors import VectorMatrix, shortlist
+
+ITEM_TYPES = ("note", "flashcard")
+ITEM_MODELS = {"note": NoteModel, "flashcard": FlashcardModel}
+EMBED_BATCH = 64
+SYNC_BATCH = 1000
+SNIPPET_CHARS = 200
+
+Key = Tuple[str, int]
+
+
+def note_text(title: Optional[str], content: Optional[str]) -> str:
+    return f"{title or ''}\n{content or ''}".strip()
+
+
+def flashcard_text(question: Optional[str], answer: Optional[str]) -> str:
+    return f"{question or ''}\n{answer or ''}".strip()
+
+
+def item_text(item_type: str, item) -> str:
+    """Text that gets embedded for a NoteModel or FlashcardModel"""
+    if item_type == "note":
+        return note_text(item.title, item.content)
+    return flashcard_text(item.question, item.answer)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SemanticIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._positions: Dict[Key, int] = {}
+        self._types = np.empty(0, dtype=np.int8)  # index into ITEM_TYPES
+        self._ids = np.empty(0, dtype=np.int64)
+        self._vectors = VectorMatrix(EMBEDDING_STORAGE)
+        self._size = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        return self._size
+
+    # In-memory matrix
+    def _load(self, db: Session):
+        rows = db.query(
+            ItemEmbeddingModel.item_type, ItemEmbeddingModel.item_id, ItemEmbeddingModel.vector
+        ).filter(ItemEmbeddingModel.model == EMBEDDING_KEY).all()
+        self._positions = {}
+        self._size = 0
+        self._vectors = VectorMatrix(EMBEDDING_STORAGE)
+        self._types = np.empty(0, dtype=np.int8)
+        self._ids = np.empty(0, dtype=np.int64)
+        for item_type, item_id, vector in rows:
+            self._set(item_type, item_id, np.frombuffer(vector, dtype=np.float32))
+        self._loaded = True
+
+    def _reserve(self, dim: int):
+        if self._vectors.dim != dim:
+            if self._size:
+                raise ValueError(f"Embedding dimension changed from {self._vectors.dim} to {dim}")
+            self._vectors = self._vectors.resize(0, dim)
+        if self._size == self._vectors.capacity:
+            capacity = max(1024, 2 * self._vectors.capacity)
+            vectors = self._vectors.resize(capacity)
+            types = np.empty(capacity, dtype=np.int8)
+            types[:self._size] = self._types[:self._size]
+            ids = np.empty(capacity, dtype=np.int64)
+            ids[:self._size] = self._ids[:self._size]
+            self._vectors, self._types, self._ids = vectors, types, ids
+
+    def _set(self, item_type: str, item_id: int, vector: np.ndarray):
+        key = (item_type, item_id)
+        position = self._positions.get(key)
+        if position is None:
+            self._reserve(len(vector))
+            position = self._size
+            self._size += 1
+            self._positions[key] = position
+            self._types[position] = ITEM_TYPES.index(item_type)
+            self._ids[position] = item_id
+        self._vectors[position] = vector
+
+    def _drop(self, key: Key):
+        position = self._positions.pop(key, None)
+        if position is None:
+            return
+        # Move the last row into the hole
+        last = self._size - 1
+        if position != last:
+            self._vectors.move(last, position)
+            self._types[position] = self._types[last]
+            self._ids[position] = self._ids[last]
+            self._positions[(ITEM_TYPES[self._types[position]], int(self._ids[position]))] = position
+        self._size = last
+
+    def invalidate(self):
+        """Drop the in-memory copy; it is reloaded on the next search"""
+        with self._lock:
+            self._loaded = False
+            self._positions = {}
+            self._size = 0
+
+    # Writes
+    def index(self, db: Session, items: Sequence[Tuple[str, int, str]]) -> int:
+        """Embed (item_type, item_id, text) items whose text changed; returns how many were embedded"""
+        changed = []
+        for start in range(0, len(items), SYNC_BATCH):
+            batch = items[start:start + SYNC_BATCH]
+            stored = self._stored_rows(db, batch)
+            for item_type, item_id, text in batch:
+                digest = content_hash(text)
+                row = stored.get((item_type, item_id))
+                if row is None or row.content_hash != digest or row.model != EMBEDDING_KEY:
+                    changed.append((item_type, item_id, text, digest, row))
+
+        for start in range(0, len(changed), EMBED_BATCH):
+            batch = changed[start:start + EMBED_BATCH]
+            vectors = embed_texts([text for _, _, text, _, _ in batch])
+            for (item_type, item_id, _, digest, row), vector in zip(batch, vectors):
+                if row is None:
+                    row = ItemEmbeddingModel(item_type=item_type, item_id=item_id)
+                    db.add(row)
+                row.model = EMBEDDING_KEY
+                row.content_hash = digest
+                row.vector = vector.tobytes()
+            db.commit()
+            with self._lock:
+                if self._loaded:
+                    for (item_type, item_id, _, _, _), vector in zip(batch, vectors):
+                        self._set(item_type, item_id, vector)
+        return len(changed)
+
+    @staticmethod
+    def _stored_rows(db: Session, batch) -> Dict[Key, ItemEmbeddingModel]:
+        stored = {}
+        for item_type in ITEM_TYPES:
+            ids = [item_id for batch_type, item_id, _ in batch if batch_type == item_type]
+            if not ids:
+                continue
+            rows = db.query(ItemEmbeddingModel).filter(
+                ItemEmbeddingModel.item_type == item_type, ItemEmbeddingModel.item_id.in_(ids)
+            )
+            for row in rows:
+                stored[(item_type, row.item_id)] = row
+        return stored
+
+    def remove(self, db: Session, keys: Iterable[Key]) -> int:
+        """Delete the embeddings of deleted notes/flashcards"""
+        keys = list(keys)
+        removed = 0
+        for item_type in ITEM_TYPES:
+            ids = [item_id for key_type, item_id in keys if key_type == item_type]
+            for start in range(0, len(ids), SYNC_BATCH):
+                removed += db.query(ItemEmbeddingModel).filter(
+                    ItemEmbeddingModel.item_type == item_type,
+                    ItemEmbeddingModel.item_id.in_(ids[start:start + SYNC_BATCH])
+                ).delete(synchronize_session=False)
+        db.commit()
+        with self._lock:
+            for key in keys:
+                self._drop(key)
+        return removed
+
+    def update_items(self, items: Sequence[Tuple[str, int, str]]):
+        """Background task for CRUD routes: index items in a session of its own"""
+        try:
+            with SessionLocal() as db:
+                self.index(db, items)
+        except Exception as e:
+            print(f"Error updating semantic index: {e}")
+
+    def update_ids(self, item_type: str, ids: Sequence[int]):
+        """Background task for bulk writes: index items by id, reading their text SYNC_BATCH at a time"""
+        model = ITEM_MODELS[item_type]
+        title, body = (model.title, model.content) if item_type == "note" else (model.question, model.answer)
+        text_of = note_text if item_type == "note" else flashcard_text
+        try:
+            with SessionLocal() as db:
+                for start in range(0, len(ids), SYNC_BATCH):
+                    rows = db.query(model.id, title, body).filter(model.id.in_(ids[start:start + SYNC_BATCH]))
+                    self.index(db, [(item_type, item_id, text_of(a, b)) for item_id, a, b in rows])
+        except Exception as e:
+            print(f"Error updating semantic index: {e}")
+
+    def remove_items(self, keys: Iterable[Key]):
+        """Background task for CRUD routes: forget deleted items"""
+        try:
+            with SessionLocal() as db:
+                self.remove(db, keys)
+        except Exception as e:
+            print(f"Error updating semantic index: {e}")
+
+    def sync(self, db: Session) -> dict:
+        """Catch up with rows written outside the API (or before the index existed)"""
+        embedded = 0
+        live = set()
+        for item_type, model in ITEM_MODELS.items():
+            title, body = (model.title, model.content) if item_type == "note" else (model.question, model.answer)
+            last_id = 0
+            while True:
+                rows = db.query(model.id, title, body).filter(model.id > last_id) \
+                    .order_by(model.id).limit(SYNC_BATCH).all()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                text_of = note_text if item_type == "note" else flashcard_text
+                embedded += self.index(db, [(item_type, item_id, text_of(a, b)) for item_id, a, b in rows])
+                live.update((item_type, item_id) for item_id, _, _ in rows)
+
+        stored = db.query(ItemEmbeddingModel.item_type, ItemEmbeddingModel.item_id).all()
+        removed = self.remove(db, [tuple(key) for key in stored if tuple(key) not in live])
+        return {"embedded": embedded, "removed": removed, "indexed": len(live)}
+
+    # Queries
+    def search(self, db: Session, query: str, k: int = 10, types: Sequence[str] = ITEM_TYPES,
+               subject: Optional[str] = None) -> List[Tuple[str, int, float]]:
+        """Top-k (item_type, item_id, cosine similarity), best first"""
+        query_vector = embed_query(query)
+        allowed = {}
+        if subject:
+            for item_type in types:
+                model = ITEM_MODELS[item_type]
+                allowed[item_type] = np.array(
+                    [row[0] for row in db.query(model.id).filter(model.subject == subject)], dtype=np.int64
+                )
+
+        with self._lock:
+            if not self._loaded:
+                self._load(db)
+            if self._size == 0:
+                return []
+            size = self._size
+            item_types = self._types[:size]
+            ids = self._ids[:size]
+            mask = np.zeros(size, dtype=bool)
+            for item_type in types:
+                type_mask = item_types == ITEM_TYPES.index(item_type)
+                if subject:
+                    type_mask &= np.isin(ids, allowed[item_type])
+                mask |= type_mask
+            candidates = np.flatnonzero(mask)
+            if len(candidates) == 0:
+                return []
+            storage = self._vectors.storage
+            scores = self._vectors.scores(candidates, query_vector)
+            top = shortlist(scores, k, storage, EMBEDDING_RESCORE_FACTOR)
+            hits = [
+                (ITEM_TYPES[item_types[candidates[i]]], int(ids[candidates[i]]), float(scores[i]))
+                for i in top
+            ]
+        if storage != "float32" and EMBEDDING_RESCORE_FACTOR > 0:
+            hits = self._rescore(db, hits, query_vector)
+        return hits[:k]
+
+    @staticmethod
+    def _rescore(db: Session, hits: List[Tuple[str, int, float]], query_vector: np.ndarray):
+        """Hits re-ranked by their float32 vectors from item_embeddings"""
+        exact = {}
+        for item_type in ITEM_TYPES:
+            ids = [item_id for hit_type, item_id, _ in hits if hit_type == item_type]
+            if not ids:
+                continue
+            rows = db.query(ItemEmbeddingModel.item_id, ItemEmbeddingModel.vector).filter(
+                ItemEmbeddingModel.item_type == item_type, ItemEmbeddingModel.item_id.in_(ids),
+                ItemEmbeddingModel.model == EMBEDDING_KEY
+            )
+            for item_id, vector in rows:
+                exact[(item_type, item_id)] = float(np.frombuffer(vector, dtype=np.float32) @ query_vector)
+        # Rows deleted since the approximate pass keep their approximate score
+        hits = [(item_type, item_id, exact.get((item_type, item_id), score)) for item_type, item_id, score in hits]
+        return sorted(hits, key=lambda hit: -hit[2])
+
+    def results(self, db: Session, hits: List[Tuple[str, int, float]]) -> List[dict]:
+        """Attach subject, title and a plain-text snippet to search hits (skips rows deleted since)"""
+        details = {}
+        for item_type, model in ITEM_MODELS.items():
+            ids = [item_id for hit_type, item_id, _ in hits if hit_type == item_type]
+            if not ids:
+                continue
+            title, body = (model.title, model.content) if item_type == "note" else (model.question, model.answer)
+            for item_id, subject, title_text, body_text in db.query(model.id, model.subject, title, body) \
+                    .filter(model.id.in_(ids)):
+                details[(item_type, item_id)] = (subject, title_text or "", (body_text or "")[:SNIPPET_CHARS])
+
+        results = []
+        for item_type, item_id, score in hits:
+            if (item_type, item_id) not in details:
+                continue
+            subject, title_text, snippet = details[(item_type, item_id)]
+            results.append({
+                "type": item_type,
+                "id": item_id,
+                "subject": subject,
+                "title": title_text,
+                "snippet": snippet,
+                "score": score,
+            })
+        return results
+
+
+semantic_index = SemanticIndex()
@@ -0,0 +1,52 @@
+"""
+Fast JSON serialization for card and note responses
+
+List endpoints select plain column tuples instead of ORM entities and encode the
+rows with orjson in a single call, skipping FastAPI's per-field jsonable_encoder
+pass. The column lists match the FlashcardRead and NoteRead response models.
+"""
+from typing import Any, Iterable, Sequence
+
+import orjson
+from fastapi import Response
+from sqlalchemy import func
+
+from backend.database import FlashcardModel, NoteModel
+
+FLASHCARD_COLUMNS = (
+    FlashcardModel.id,
+    FlashcardModel.subject,
+    FlashcardModel.question,
+    FlashcardModel.answer,
+    FlashcardModel.color,
+    func.coalesce(FlashcardModel.leitner_box, 1).label("leitner_box"),
+    FlashcardModel.next_review,
+    FlashcardModel.review_history,
+)
+FLASHCARD_FIELDS = ("id", "subject", "question", "answer", "color", "leitner_box", "next_review", "review_history")
+
+NOTE_COLUMNS = (
+    NoteModel.id,
+    NoteModel.subject,
+    NoteModel.title,
+    NoteModel.content,
+    NoteModel.color,
+)
+NOTE_FIELDS = ("id", "subject", "title", "content", "color")
+
+
+class ORJSONResponse(Response):
+    """JSON response rendered with orjson (datetimes become ISO 8601 strings)"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def rows_to_dicts(fields: Sequence[str], rows: Iterable[tuple]) -> list:
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def json_rows(fields: Sequence[str], rows: Iterable[tuple], **kwargs) -> ORJSONResponse:
+    """Encode query rows as a JSON array of objects keyed by `fields`"""
+    return ORJSONResponse(rows_to_dicts(fields, rows), **kwargs)
@@ -0,0 +1,150 @@
+"""
+Subjects table: one row per subject name with cached note and flashcard counts
+
+Notes and flashcards keep their subject name (the API and the indexes use it) and
+also reference the subjects row through subject_id. Subject lists and the session
+preview read the subjects table instead of scanning both tables for DISTINCT
+names, and the counts are maintained as rows come and go:
+
+- ORM writes (sync and async sessions) are picked up by a before_flush hook that
+  creates missing subjects, sets subject_id and adjusts the counts in the same
+  transaction.
+- Bulk paths that bypass the ORM unit of work (deck import, dedup deletes) call
+  subject_ids() and adjust_counts() themselves; recount() rebuilds every count.
+
+Rows written before the table existed are linked by migrate_subjects(), which
+init_db() runs in batches of SUBJECT_MIGRATION_BATCH rows.
+"""
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import bindparam, event, func, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from backend.database import SubjectModel, NoteModel, FlashcardModel
+
+SUBJECT_MIGRATION_BATCH = 5000
+NAME_LOOKUP_BATCH = 500
+SUBJECT_MODELS = {"notes": NoteModel, "flashcards": FlashcardModel}
+COUNT_COLUMNS = {"notes": SubjectModel.note_count, "flashcards": SubjectModel.flashcard_count}
+subjects_table = SubjectModel.__table__
+
+
+def subject_ids(db: Session, names: Iterable[Optional[str]]) -> Dict[str, int]:
+    """Subject ids by name, creating the subjects that don't exist yet"""
+    names = {name for name in names if name is not None}
+    ids = {}
+    for batch in _batches(sorted(names)):
+        ids.update(db.execute(select(SubjectModel.name, SubjectModel.id).where(SubjectModel.name.in_(batch))).all())
+    missing = sorted(names - ids.keys())
+    if missing:
+        # Another session may create the same subject concurrently; the unique name wins
+        dialect_insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        db.execute(
+            dialect_insert(subjects_table).values([{"name": name} for name in missing])
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+        for batch in _batches(missing):
+            ids.update(db.execute(select(SubjectModel.name, SubjectModel.id).where(SubjectModel.name.in_(batch))).all())
+    return ids
+
+
+def _batches(values: List, size: int = NAME_LOOKUP_BATCH):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def adjust_counts(db: Session, table: str, deltas: Dict[int, int]):
+    """Add deltas (subject id -> change) to the cached counts of `table` rows"""
+    column = COUNT_COLUMNS[table].key
+    params = [{"subject": subject_id, "delta": delta} for subject_id, delta in deltas.items() if delta]
+    if params:
+        db.execute(
+            update(subjects_table).where(subjects_table.c.id == bindparam("subject"))
+            .values({column: subjects_table.c[column] + bindparam("delta")}),
+            params
+        )
+
+
+def recount(db: Session):
+    """Recompute every cached count from the notes and flashcards tables"""
+    for table, model in SUBJECT_MODELS.items():
+        column = COUNT_COLUMNS[table].key
+        counts = db.execute(
+            select(model.subject_id, func.count()).where(model.subject_id.isnot(None)).group_by(model.subject_id)
+        ).all()
+        db.execute(update(subjects_table).values({column: 0}))
+        if counts:
+            db.execute(
+                update(subjects_table).where(subjects_table.c.id == bindparam("subject"))
+                .values({column: bindparam("total")}),
+                [{"subject": subject_id, "total": total} for subject_id, total in counts]
+            )
+
+
+def subject_names_query(table: str):
+    """SELECT of the subject names that have at least one row in `table`, sorted"""
+    return select(SubjectModel.name).where(COUNT_COLUMNS[table] > 0).order_by(SubjectModel.name)
+
+
+@event.listens_for(Session, "before_flush")
+def _link_subjects(session, flush_context, instances):
+    linked = []  # (object, table, subject name)
+    deltas = {table: Counter() for table in SUBJECT_MODELS}
+    for obj in session.new:
+        table = getattr(obj, "__tablename__", None)
+        if table in SUBJECT_MODELS:
+            linked.append((obj, table, obj.subject))
+    for obj in session.dirty:
+        table = getattr(obj, "__tablename__", None)
+        if table in SUBJECT_MODELS and inspect(obj).attrs.subject.history.has_changes():
+            if obj.subject_id is not None:
+                deltas[table][obj.subject_id] -= 1
+            linked.append((obj, table, obj.subject))
+    for obj in session.deleted:
+        table = getattr(obj, "__tablename__", None)
+        if table in SUBJECT_MODELS and obj.subject_id is not None:
+            deltas[table][obj.subject_id] -= 1
+    if not linked and not any(deltas.values()):
+        return
+
+    with session.no_autoflush:
+        ids = subject_ids(session, [name for _, _, name in linked])
+        for obj, table, name in linked:
+            obj.subject_id = ids.get(name)
+            if obj.subject_id is not None:
+                deltas[table][obj.subject_id] += 1
+        for table, table_deltas in deltas.items():
+            adjust_counts(session, table, table_deltas)
+
+
+def migrate_subjects(bind, batch_size: int = SUBJECT_MIGRATION_BATCH) -> int:
+    """Link notes and flashcards without a subject_id to their subject, one batch per transaction"""
+    linked = 0
+    with Session(bind) as db:
+        for model in SUBJECT_MODELS.values():
+            unlinked = (model.subject_id.is_(None), model.subject.isnot(None))
+            last_id = 0
+            while True:
+                rows = db.execute(
+                    select(model.id, model.subject).where(model.id > last_id, *unlinked)
+                    .order_by(model.id).limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+                ids = subject_ids(db, {subject for _, subject in rows})
+                db.execute(
+                    update(model.__table__).where(model.__table__.c.id == bindparam("row_id"))
+                    # Keep updated_at: linking a subject is not a change clients need to sync
+                    .values(subject_id=bindparam("linked_id"), updated_at=model.__table__.c.updated_at),
+                    [{"row_id": row_id, "linked_id": ids[subject]} for row_id, subject in rows]
+                )
+                db.commit()
+                linked += len(rows)
+                last_id = rows[-1][0]
+        if linked:
+            recount(db)
+            db.commit()
+            print(f"Linked {linked} notes and flashcards to the subjects table")
+    return linked
@@ -0,0 +1,85 @@
+"""
+Delta sync for notes and flashcards
+
+Both tables carry an indexed updated_at (set on insert and on every UPDATE,
+including bulk updates) and every delete leaves a row in tombstones, so a client
+holding a cursor only downloads what changed since then: two index range scans
+plus the tombstones, whatever the size of the deck.
+
+Cursors are server timestamps taken before the queries run, minus
+SYNC_OVERLAP_SECONDS so that transactions still committing while a sync runs are
+picked up by the next one. Rows can therefore arrive twice; clients upsert by id.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend.database import NoteModel, FlashcardModel, TombstoneModel
+from backend.utils.serialization import (
+    FLASHCARD_COLUMNS, FLASHCARD_FIELDS, NOTE_COLUMNS, NOTE_FIELDS, rows_to_dicts
+)
+
+SYNC_OVERLAP_SECONDS = 5
+TOMBSTONE_RETENTION_DAYS = 90
+ITEM_TYPES = {"notes": "note", "flashcards": "flashcard"}  # table -> tombstone item_type
+
+
+def tombstones(item_type: str, item_ids) -> list:
+    """Tombstone rows for items removed without the ORM (bulk DELETE)"""
+    now = datetime.now()
+    return [TombstoneModel(item_type=item_type, item_id=item_id, deleted_at=now) for item_id in item_ids]
+
+
+@event.listens_for(Session, "before_flush")
+def _record_deletes(session, flush_context, instances):
+    # ORM deletes (sync and async sessions) get their tombstone in the same transaction
+    for obj in list(session.deleted):
+        item_type = ITEM_TYPES.get(getattr(obj, "__tablename__", None))
+        if item_type is not None:
+            session.add(TombstoneModel(item_type=item_type, item_id=obj.id, deleted_at=datetime.now()))
+
+
+def changes(db: Session, since: Optional[datetime]) -> dict:
+    """Rows changed and ids deleted since the cursor; a full snapshot without one"""
+    started = datetime.now()
+    horizon = started - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+    # Deletes older than the retention window are gone, so such cursors get a full snapshot
+    full = since is None or since < horizon
+
+    notes = db.query(*NOTE_COLUMNS)
+    flashcards = db.query(*FLASHCARD_COLUMNS)
+    deleted = {"notes": [], "flashcards": []}
+    if not full:
+        notes = notes.filter(NoteModel.updated_at >= since)
+        flashcards = flashcards.filter(FlashcardModel.updated_at >= since)
+        removed = db.query(TombstoneModel.item_type, TombstoneModel.item_id) \
+            .filter(TombstoneModel.deleted_at >= since).all()
+    else:
+        removed = []
+
+    note_rows = notes.order_by(NoteModel.id).all()
+    flashcard_rows = flashcards.order_by(FlashcardModel.id).all()
+
+    # An id that is live again (SQLite can reuse the highest id) is not deleted
+    live = {"note": {row[0] for row in note_rows}, "flashcard": {row[0] for row in flashcard_rows}}
+    for item_type, item_id in removed:
+        if item_id not in live[item_type]:
+            deleted[f"{item_type}s"].append(item_id)
+
+    return {
+        "full": full,
+        "cursor": started - timedelta(seconds=SYNC_OVERLAP_SECONDS),
+        "notes": rows_to_dicts(NOTE_FIELDS, note_rows),
+        "flashcards": rows_to_dicts(FLASHCARD_FIELDS, flashcard_rows),
+        "deleted": {table: sorted(set(ids)) for table, ids in deleted.items()},
+    }
+
+
+def prune_tombstones(db: Session) -> int:
+    """Drop tombstones past the retention window"""
+    horizon = datetime.now() - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+    removed = db.query(TombstoneModel).filter(TombstoneModel.deleted_at < horizon).delete(synchronize_session=False)
+    db.commit()
+    return removed
@@ -0,0 +1,116 @@
+"""
+Per-table and per-subject version counters for conditional GETs
+
+Every committed write to notes or flashcards bumps the table's counter and the
+counters of the subjects it touched (old and new subject on a move). List
+endpoints derive their ETag from the counters alone, so a request carrying a
+matching If-None-Match is answered with 304 before any query runs.
+
+Writes made through ORM sessions are picked up by session events; callers using
+bulk_*_mappings or raw SQL call table_versions.bump() themselves. Counters are
+per process and start from a fresh boot id, so ETags never survive a restart.
+Like the due queue, they assume the single-process desktop setup.
+"""
+import threading
+import uuid
+import zlib
+from itertools import chain
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+TRACKED_TABLES = ("notes", "flashcards")
+ANY_SUBJECT = object()  # a write whose subjects aren't known (bulk UPDATE/DELETE)
+PENDING_KEY = "table_versions_pending"
+
+
+class TableVersions:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._boot = uuid.uuid4().hex[:8]
+        self._tables: Dict[str, int] = {}
+        self._generations: Dict[str, int] = {}  # bumped by writes with unknown subjects
+        self._subjects: Dict[Tuple[str, Optional[str]], int] = {}
+
+    def bump(self, table: str, subjects: Optional[Iterable[Optional[str]]] = None):
+        """Record a committed write; subjects=None means any subject may have changed"""
+        with self._lock:
+            self._tables[table] = self._tables.get(table, 0) + 1
+            if subjects is None:
+                self._generations[table] = self._generations.get(table, 0) + 1
+                return
+            for subject in set(subjects):
+                if subject is ANY_SUBJECT:
+                    self._generations[table] = self._generations.get(table, 0) + 1
+                else:
+                    self._subjects[(table, subject)] = self._subjects.get((table, subject), 0) + 1
+
+    def etag(self, table: str, subject: Optional[str] = None) -> str:
+        """ETag for a listing of the whole table, or of one subject"""
+        with self._lock:
+            if subject is None:
+                return f'"{table}-{self._boot}-{self._tables.get(table, 0)}"'
+            generation = self._generations.get(table, 0)
+            version = self._subjects.get((table, subject), 0)
+        subject_key = zlib.crc32(subject.encode("utf-8"))
+        return f'"{table}-{self._boot}-s{subject_key:x}-{generation}.{version}"'
+
+
+table_versions = TableVersions()
+
+
+def etag_headers(etag: str) -> dict:
+    # no-cache: clients may store the response but must revalidate it every time
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A 304 response if the request's If-None-Match already has `etag`"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    if etag in candidates or "*" in candidates:
+        return Response(status_code=304, headers=etag_headers(etag))
+    return None
+
+
+# Session hooks: collect the (table, subject) pairs a transaction writes, bump them on commit
+def _pending(session: Session) -> Dict[str, set]:
+    return session.info.setdefault(PENDING_KEY, {})
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_flush(session, flush_context, instances):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table not in TRACKED_TABLES:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        subjects = _pending(session).setdefault(table, set())
+        subjects.add(obj.subject)
+        subjects.update(inspect(obj).attrs.subject.history.deleted or ())
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    table = mapper.local_table.name if mapper is not None else None
+    if table in TRACKED_TABLES:
+        _pending(orm_execute_state.session).setdefault(table, set()).add(ANY_SUBJECT)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed(session):
+    for table, subjects in session.info.pop(PENDING_KEY, {}).items():
+        table_versions.bump(table, subjects)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop(PENDING_KEY, None)
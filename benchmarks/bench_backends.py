@@ -0,0 +1,125 @@
+"""
+Benchmark: embedded SQLite vs PostgreSQL for the Leitner endpoints
+
+Each backend runs in its own process (so configuration is read fresh) and reports
+cold start (import + first request) and per-endpoint latency through the FastAPI
+app in-process. PostgreSQL uses the DB_* settings from .env; SQLite uses a
+throwaway database file.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_backends [--backends sqlite postgresql] [--cards 2000] [--iterations 200]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ENDPOINTS = ["due", "review", "review_batch", "stats", "preview"]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def worker(cards: int, iterations: int):
+    """Runs inside the child process; prints one JSON line of results"""
+    started = time.perf_counter()
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as client:
+        client.get("/flashcards/session/stats")
+        cold_start = time.perf_counter() - started
+
+        # Seed a benchmark subject
+        from backend.database import SessionLocal, FlashcardModel
+        from datetime import datetime
+        subject = "Backend benchmark"
+        with SessionLocal() as db:
+            db.query(FlashcardModel).filter(FlashcardModel.subject == subject).delete()
+            db.bulk_insert_mappings(FlashcardModel, [
+                {"subject": subject, "question": f"Question {i}", "answer": f"Answer {i}",
+                 "color": "yellow.300", "timestamp": datetime.now(), "leitner_box": 1,
+                 "next_review": datetime.now()}
+                for i in range(cards)
+            ])
+            db.commit()
+            card_ids = [row[0] for row in db.query(FlashcardModel.id).filter(FlashcardModel.subject == subject)]
+
+        timings = {name: [] for name in ENDPOINTS}
+        results = ["again", "hard", "good", "easy"]
+        for i in range(iterations):
+            card_id = card_ids[i % len(card_ids)]
+            requests = {
+                "due": lambda: client.get(f"/flashcards/due?subject={subject}&limit=20"),
+                "review": lambda: client.post(f"/flashcards/review/{card_id}", json={"result": results[i % 4]}),
+                "review_batch": lambda: client.post("/flashcards/review/batch", json={"reviews": [
+                    {"card_id": card_ids[(i * 10 + k) % len(card_ids)], "result": results[k % 4]} for k in range(10)
+                ]}),
+                "stats": lambda: client.get("/flashcards/session/stats"),
+                "preview": lambda: client.get("/flashcards/session/preview"),
+            }
+            for name, send in requests.items():
+                start = time.perf_counter()
+                response = send()
+                timings[name].append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        with SessionLocal() as db:
+            db.query(FlashcardModel).filter(FlashcardModel.subject == subject).delete()
+            db.commit()
+
+    print(json.dumps({"cold_start": cold_start, "timings": timings}))
+
+
+def run_backend(backend: str, args) -> dict:
+    env = dict(os.environ, DB_BACKEND=backend)
+    tmpdir = None
+    if backend == "sqlite":
+        tmpdir = tempfile.TemporaryDirectory()
+        env["SQLITE_PATH"] = os.path.join(tmpdir.name, "bench.db")
+    try:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_backends", "--worker",
+             "--cards", str(args.cards), "--iterations", str(args.iterations)],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+    finally:
+        if tmpdir:
+            tmpdir.cleanup()
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["sqlite", "postgresql"])
+    parser.add_argument("--cards", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.cards, args.iterations)
+        return
+
+    print(f"{args.cards} cards, {args.iterations} iterations per endpoint")
+    print(f"{'backend':<11} {'endpoint':<13} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for backend in args.backends:
+        try:
+            result = run_backend(backend, args)
+        except subprocess.CalledProcessError as e:
+            print(f"{backend:<11} failed: {e.stderr.strip().splitlines()[-1] if e.stderr else e}")
+            continue
+        print(f"{backend:<11} {'cold start':<13} {result['cold_start'] * 1000:>7.1f}ms")
+        for name in ENDPOINTS:
+            values = result["timings"][name]
+            print(f"{'':<11} {name:<13} {percentile(values, 50) * 1000:>7.2f}ms "
+                  f"{percentile(values, 95) * 1000:>7.2f}ms {percentile(values, 99) * 1000:>7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: token-budgeted MMR context vs the default retriever on a small eval set
+
+For every question in benchmarks/data/context_eval.json the document is loaded
+into a Chroma vector store (retrieval.create_vector_store()), then the context is assembled two ways:
+
+- baseline: vector_db.as_retriever().invoke(question), the four nearest chunks,
+  formatted into the prompt as a list of Documents (what rag.py used to do)
+- budgeted: context_builder.build_context() (MMR under CONTEXT_TOKEN_BUDGET,
+  adjacent chunks de-overlapped, compact rendering)
+
+and reports context tokens (characters / 4), assembly latency and grounding: the
+share of questions whose evidence phrases all made it into the context. With
+--llm, answer_question() also runs on both contexts against Groq (needs
+GROQ_API_KEY) and the answers are checked for the expected keywords.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_context [--budget 700] [--lambda-mult 0.7] [--llm]
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import time
+
+EVAL_SET = os.path.join(os.path.dirname(__file__), "data", "context_eval.json")
+
+
+def squash(text):
+    return re.sub(r"\s+", " ", text)
+
+
+def grounded(context, evidence):
+    context = squash(context)
+    return all(squash(phrase) in context for phrase in evidence)
+
+
+def answered(answer, keywords):
+    return all(keyword.lower() in answer.lower() for keyword in keywords)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=int, help="context token budget (default CONTEXT_TOKEN_BUDGET)")
+    parser.add_argument("--lambda-mult", type=float, help="MMR lambda (default CONTEXT_MMR_LAMBDA)")
+    parser.add_argument("--llm", action="store_true", help="also answer every question with Groq")
+    args = parser.parse_args()
+
+    from backend.utils import rag
+    from backend.utils.context_builder import build_context, estimate_tokens
+    from backend.utils.document_loader import split_documents
+    from backend.utils.retrieval import create_vector_store
+
+    options = {}
+    if args.budget is not None:
+        options["budget"] = args.budget
+    if args.lambda_mult is not None:
+        options["lambda_mult"] = args.lambda_mult
+
+    with open(EVAL_SET, encoding="utf-8") as f:
+        eval_set = json.load(f)
+
+    def baseline(vector_db, question):
+        docs = vector_db.as_retriever().invoke(question)
+        # The prompt template formatted the Document list with str()
+        return str(docs), "\n".join(doc.page_content for doc in docs)
+
+    def budgeted(vector_db, question):
+        context = build_context(vector_db, question, **options)
+        return context, context
+
+    strategies = {"baseline (4 nearest)": baseline, "budgeted MMR": budgeted}
+    results = {name: {"tokens": [], "seconds": [], "grounded": 0, "answered": 0, "llm_seconds": []}
+               for name in strategies}
+
+    class AssembledContext:
+        """Stands in for a StudyDocument whose context is already assembled"""
+        def __init__(self, text):
+            self.text = text
+
+        def context(self, query):
+            return self.text
+
+    stores = {name: create_vector_store(split_documents("\n".join(lines)))
+              for name, lines in eval_set["documents"].items()}
+    build_context(stores[next(iter(stores))], "warm up")  # load the embedding model outside the timings
+    try:
+        for item in eval_set["questions"]:
+            vector_db = stores[item["document"]]
+            for name, strategy in strategies.items():
+                started = time.perf_counter()
+                prompt_text, plain_text = strategy(vector_db, item["question"])
+                result = results[name]
+                result["seconds"].append(time.perf_counter() - started)
+                result["tokens"].append(estimate_tokens(prompt_text))
+                result["grounded"] += grounded(plain_text, item["evidence"])
+
+                if args.llm:
+                    # answer_question() with this strategy's context
+                    started = time.perf_counter()
+                    answer = asyncio.run(rag.answer_question(item["question"], AssembledContext(prompt_text)))
+                    result["llm_seconds"].append(time.perf_counter() - started)
+                    result["answered"] += answered(answer, item["keywords"])
+    finally:
+        for vector_db in stores.values():
+            vector_db.delete_collection()
+
+    questions = len(eval_set["questions"])
+    print(f"{questions} questions over {len(stores)} documents\n")
+    header = f"{'':<22} {'ctx tokens':>11} {'max':>6} {'assembly ms':>12} {'grounded':>9}"
+    if args.llm:
+        header += f" {'answer s':>9} {'keywords':>9}"
+    print(header)
+    for name, result in results.items():
+        line = (f"{name:<22} {statistics.mean(result['tokens']):>11.0f} {max(result['tokens']):>6} "
+                f"{statistics.mean(result['seconds']) * 1000:>12.1f} {result['grounded']:>5}/{questions:<3}")
+        if args.llm:
+            line += f" {statistics.mean(result['llm_seconds']):>9.2f} {result['answered']:>5}/{questions:<3}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark: streaming deck export and import on a large deck
+
+Seeds --cards flashcards with --reviews review_log rows each into a throwaway
+SQLite database (or the configured database with --use-configured-db), then
+times the NDJSON export (plain and gzip) against building the whole export in
+memory, and the batched import of the exported stream. With --trace-memory the
+peak Python heap (tracemalloc) of each run is reported too, showing whether memory
+stays flat as the deck grows; tracing slows everything down, so timings from
+that mode are not comparable.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_deck_io [--cards 100000] [--reviews 3] [--trace-memory]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+
+def measure(label, func, cards, trace_memory):
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    size = func()
+    elapsed = time.perf_counter() - started
+    peak = ""
+    if trace_memory:
+        peak = f"{tracemalloc.get_traced_memory()[1] / 1e6:>9.1f}"
+        tracemalloc.stop()
+    print(f"{label:<28} {elapsed:>8.2f}s {cards / elapsed:>12,.0f} {size / 1e6:>9.1f} {peak}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=100000)
+    parser.add_argument("--reviews", type=int, default=3, help="review_log rows per card")
+    parser.add_argument("--trace-memory", action="store_true", help="report peak Python heap per run (slow)")
+    parser.add_argument("--use-configured-db", action="store_true", help="use DB_BACKEND/.env instead of a temp SQLite file")
+    args = parser.parse_args()
+
+    tmpdir = None
+    if not args.use_configured_db:
+        tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DB_BACKEND"] = "sqlite"
+        os.environ["SQLITE_PATH"] = os.path.join(tmpdir.name, "deck.db")
+
+    import orjson
+    from backend.database import init_db, SessionLocal, FlashcardModel, ReviewLogModel
+    from backend.utils.deck_io import DeckImporter, DeckReader, export_lines, gzip_chunks
+
+    init_db()
+    rng = random.Random(42)
+    subject = "Deck benchmark"
+    now = datetime.now()
+
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        for start in range(0, args.cards, 5000):
+            count = min(5000, args.cards - start)
+            db.bulk_insert_mappings(FlashcardModel, [
+                {"subject": subject, "question": f"Question {start + i} about topic {rng.randrange(1000)}?",
+                 "answer": f"Answer {start + i}: " + "detail " * rng.randint(3, 20), "color": "blue.300",
+                 "leitner_box": rng.randint(1, 5), "next_review": now + timedelta(days=rng.randint(-5, 30)),
+                 "ease_factor": 2.5, "repetitions": args.reviews}
+                for i in range(count)
+            ])
+        db.flush()
+        card_ids = [row[0] for row in db.query(FlashcardModel.id).filter(FlashcardModel.subject == subject)]
+        for start in range(0, len(card_ids), 5000):
+            db.bulk_insert_mappings(ReviewLogModel, [
+                {"flashcard_id": card_id, "result": rng.choice(["good", "again"]), "box": rng.randint(1, 5),
+                 "reviewed_at": now - timedelta(days=rng.randint(1, 300))}
+                for card_id in card_ids[start:start + 5000]
+                for _ in range(args.reviews)
+            ])
+        db.commit()
+        print(f"Seeded {args.cards} cards and {args.cards * args.reviews} reviews in "
+              f"{time.perf_counter() - started:.1f}s\n")
+
+    peak_header = f" {'peak MB':>9}" if args.trace_memory else ""
+    print(f"{'':<28} {'time':>9} {'cards/s':>12} {'MB out':>9}{peak_header}")
+    exported = {}
+
+    def in_memory():
+        # What a non-streaming export would do: every card and review loaded, one big document
+        with SessionLocal() as db:
+            cards = db.query(FlashcardModel).filter(FlashcardModel.subject == subject).all()
+            reviews = {}
+            for row in db.query(ReviewLogModel).all():
+                reviews.setdefault(row.flashcard_id, []).append(
+                    {"result": row.result, "box": row.box, "reviewed_at": row.reviewed_at})
+            body = orjson.dumps([
+                {"id": c.id, "subject": c.subject, "question": c.question, "answer": c.answer,
+                 "leitner_box": c.leitner_box, "next_review": c.next_review, "reviews": reviews.get(c.id, [])}
+                for c in cards
+            ])
+        return len(body)
+
+    def streamed(compress):
+        def run():
+            size = 0
+            chunks_out = []
+            with SessionLocal() as db:
+                chunks = export_lines(db, subject)
+                for chunk in gzip_chunks(chunks) if compress else chunks:
+                    size += len(chunk)
+                    if compress:
+                        chunks_out.append(chunk)
+            if compress:
+                exported["gzip"] = chunks_out
+            return size
+        return run
+
+    measure("export, in memory (baseline)", in_memory, args.cards, args.trace_memory)
+    measure("export, NDJSON stream", streamed(False), args.cards, args.trace_memory)
+    measure("export, NDJSON + gzip", streamed(True), args.cards, args.trace_memory)
+
+    def import_stream():
+        reader = DeckReader()
+        with SessionLocal() as db:
+            importer = DeckImporter(db, subject="Deck benchmark import")
+            for chunk in exported["gzip"]:
+                importer.add(reader.feed(chunk))
+            importer.add(reader.close())
+            result = importer.finish()
+        assert result["imported"] == args.cards, result
+        return sum(len(chunk) for chunk in exported["gzip"])
+
+    measure("import, gzip stream", import_stream, args.cards, args.trace_memory)
+
+    if tmpdir is not None:
+        from backend.database import engine
+        engine.dispose()
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: near-duplicate lookup per new card, LSH index vs comparing with every card
+
+Builds decks of synthetic questions, then times NearDuplicateIndex.find() for
+fresh questions and paraphrases of existing ones against a brute-force scan of
+all signatures. Also reports recall on the paraphrases.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_dedup [--sizes 1000 10000 100000] [--lookups 500]
+"""
+import argparse
+import random
+import string
+import time
+
+import numpy as np
+
+from backend.utils.dedup import NearDuplicateIndex, signature
+
+_letters = random.Random(0)
+VOCABULARY = ["".join(_letters.choice(string.ascii_lowercase) for _ in range(_letters.randint(3, 10)))
+              for _ in range(5000)]
+STARTS = ["What is", "Why does", "How do", "Define", "Explain", "Which"]
+
+
+def question(rng, i):
+    words = " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(5, 12)))
+    return f"{rng.choice(STARTS)} {words}?"
+
+
+def paraphrase(rng, text):
+    """Drop one word and the question mark, the kind of variation regenerating a deck produces"""
+    words = text.rstrip("?").split()
+    del words[rng.randrange(2, len(words))]
+    return " ".join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--threshold", type=float, default=0.6)
+    args = parser.parse_args()
+
+    print(f"{'cards':>8} {'build':>9} {'LSH find':>10} {'brute force':>12} {'recall':>7}")
+    for size in args.sizes:
+        rng = random.Random(size)
+        questions = [question(rng, i) for i in range(size)]
+        rows = [(i, "Benchmark", q) for i, q in enumerate(questions)]
+
+        index = NearDuplicateIndex()
+        start = time.perf_counter()
+        index.load(rows)
+        build = time.perf_counter() - start
+        matrix = np.stack([index._cards[i][1] for i in range(size)])
+
+        probes = [paraphrase(rng, questions[rng.randrange(size)]) for _ in range(args.lookups // 2)]
+        probes += [question(rng, size + i) for i in range(args.lookups - len(probes))]
+
+        start = time.perf_counter()
+        found = [index.find(None, "Benchmark", probe, args.threshold) for probe in probes]
+        lsh = (time.perf_counter() - start) / len(probes)
+
+        start = time.perf_counter()
+        brute = []
+        for probe in probes:
+            scores = (matrix == signature(probe)).mean(axis=1)
+            best = int(scores.argmax())
+            brute.append(best if scores[best] >= args.threshold else None)
+        scan = (time.perf_counter() - start) / len(probes)
+
+        expected = [b for b in brute if b is not None]
+        hits = sum(1 for f, b in zip(found, brute) if b is not None and f is not None)
+        recall = hits / len(expected) if expected else 1.0
+        print(f"{size:>8} {build:>8.2f}s {lsh * 1000:>8.3f}ms {scan * 1000:>10.3f}ms {recall:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
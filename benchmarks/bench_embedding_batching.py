@@ -0,0 +1,100 @@
+"""
+Benchmark: cross-request dynamic batching of embeddings vs one model call per request
+
+Simulates concurrent study requests: each of --concurrency threads issues
+--requests requests back to back, and a request embeds --chunks chunks of the
+benchmarks/data/context_eval.json documents, then its query (like hybrid
+retrieval does). Two ways:
+
+- direct: every call runs the model itself (EMBEDDING_BATCH_WAIT_MS=0)
+- batched: calls go through an EmbeddingBatcher gathering up to --max-batch
+  texts for at most --wait-ms (see backend/utils/embedding_batcher.py)
+
+and reports, per concurrency level, throughput (requests and texts per second),
+p50 and p99 request latency, and for the batched runs the mean batch size.
+Uses the configured embedding backend (EMBEDDING_BACKEND, EMBEDDING_THREADS).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_embedding_batching [--concurrency 1,2,4,8,16] [--requests 20] [--chunks 8]
+"""
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+
+import numpy as np
+
+EVAL_SET = os.path.join(os.path.dirname(__file__), "data", "context_eval.json")
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run(embed, texts, questions, concurrency, requests, chunks):
+    """Request latencies and wall time of concurrency threads issuing requests each"""
+    latencies = []
+    lock = threading.Lock()
+
+    def client(worker):
+        for request in range(requests):
+            offset = (worker * requests + request) * chunks
+            batch = [texts[(offset + i) % len(texts)] for i in range(chunks)]
+            started = time.perf_counter()
+            embed(batch)
+            embed([questions[offset % len(questions)]])
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=client, args=(worker,)) for worker in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - started
+
+
+def main():
+    from backend.config import EMBEDDING_BACKEND, EMBEDDING_BATCH_SIZE, EMBEDDING_BATCH_WAIT_MS
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="comma-separated concurrent clients")
+    parser.add_argument("--requests", type=int, default=20, help="requests per client")
+    parser.add_argument("--chunks", type=int, default=8, help="chunks embedded per request")
+    parser.add_argument("--max-batch", type=int, default=EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--wait-ms", type=float, default=EMBEDDING_BATCH_WAIT_MS or 5)
+    args = parser.parse_args()
+
+    from backend.utils.document_loader import split_documents
+    from backend.utils.embedding_batcher import EmbeddingBatcher
+    from backend.utils.embeddings import get_embedding_model
+
+    with open(EVAL_SET, encoding="utf-8") as f:
+        eval_set = json.load(f)
+    texts = [chunk for lines in eval_set["documents"].values() for chunk in split_documents("\n".join(lines))]
+    questions = [item["question"] for item in eval_set["questions"]]
+    model = get_embedding_model()
+    model.embed_documents(texts[:4])  # load the model outside the timings
+
+    def direct(batch):
+        return np.asarray(model.embed_documents(batch), dtype=np.float32)
+
+    print(f"{EMBEDDING_BACKEND} backend; {args.chunks} chunks + 1 query per request, "
+          f"batches of up to {args.max_batch}, {args.wait_ms:g} ms max wait\n")
+    print(f"{'clients':>7} {'mode':<8} {'req/s':>8} {'texts/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'batch':>6}")
+    for concurrency in [int(value) for value in args.concurrency.split(",")]:
+        batcher = EmbeddingBatcher(model.embed_documents, args.max_batch, args.wait_ms / 1000)
+        for mode, embed in (("direct", direct), ("batched", batcher.embed)):
+            latencies, seconds = run(embed, texts, questions, concurrency, args.requests, args.chunks)
+            batch = f"{batcher.metrics()['batch_size']['mean']:>6.1f}" if mode == "batched" else f"{'':>6}"
+            print(f"{concurrency:>7} {mode:<8} {len(latencies) / seconds:>8.1f} "
+                  f"{len(latencies) * (args.chunks + 1) / seconds:>9.1f} "
+                  f"{statistics.median(latencies) * 1000:>8.1f} {percentile(latencies, 0.99) * 1000:>8.1f} {batch}")
+
+
+if __name__ == "__main__":
+    main()
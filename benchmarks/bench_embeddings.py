@@ -0,0 +1,80 @@
+"""
+Benchmark: ONNX Runtime (float32 / int8) vs PyTorch embedding backends on CPU
+
+Embeds the chunks of the benchmarks/data/context_eval.json documents (repeated
+up to --texts) with HuggingFaceEmbeddings (sentence-transformers on PyTorch)
+and with OnnxEmbeddings for every ONNX file found in --onnx-dir (model.onnx and,
+if exported with --int8, model_int8.onnx), at each --threads count, and
+reports chunks per second and the cosine similarity of each ONNX embedding to
+the PyTorch one (mean and minimum).
+
+Export the model first:
+    python -m backend.utils.onnx_embeddings models/bge-small-en-v1.5-onnx --int8
+
+Usage (from the repository root):
+    python -m benchmarks.bench_embeddings [--onnx-dir DIR] [--texts 512] [--threads 1,4]
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+EVAL_SET = os.path.join(os.path.dirname(__file__), "data", "context_eval.json")
+
+
+def chunks_per_second(embed, texts, repeats):
+    embed(texts[:8])  # warm up
+    started = time.perf_counter()
+    for _ in range(repeats):
+        vectors = np.asarray(embed(texts), dtype=np.float32)
+    return len(texts) * repeats / (time.perf_counter() - started), vectors
+
+
+def main():
+    from backend.config import EMBEDDING_MODEL, EMBEDDING_ONNX_DIR, EMBEDDING_POOLING, EMBEDDING_BATCH_SIZE
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--onnx-dir", default=EMBEDDING_ONNX_DIR, help="exported model directory")
+    parser.add_argument("--texts", type=int, default=512, help="chunks embedded per run")
+    parser.add_argument("--threads", default="1,4", help="comma-separated thread counts")
+    parser.add_argument("--repeats", type=int, default=2, help="runs timed per backend")
+    args = parser.parse_args()
+
+    import torch
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    from backend.utils.document_loader import split_documents
+    from backend.utils.embeddings import normalize
+    from backend.utils.onnx_embeddings import OnnxEmbeddings
+
+    with open(EVAL_SET, encoding="utf-8") as f:
+        eval_set = json.load(f)
+    chunks = [chunk for lines in eval_set["documents"].values() for chunk in split_documents("\n".join(lines))]
+    chunks += [line for lines in eval_set["documents"].values() for line in lines]
+    texts = (chunks * (args.texts // len(chunks) + 1))[:args.texts]
+    onnx_files = [name for name in ("model.onnx", "model_int8.onnx")
+                  if os.path.exists(os.path.join(args.onnx_dir, name))]
+    if not onnx_files:
+        parser.error(f"No model.onnx in {args.onnx_dir}; export it with python -m backend.utils.onnx_embeddings")
+
+    print(f"{EMBEDDING_MODEL}: {len(texts)} chunks, batch size {EMBEDDING_BATCH_SIZE}\n")
+    print(f"{'backend':<22} {'threads':>7} {'chunks/s':>9} {'speedup':>8} {'mean cos':>9} {'min cos':>8}")
+    torch_model = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL, encode_kwargs={"batch_size": EMBEDDING_BATCH_SIZE})
+    for threads in [int(value) for value in args.threads.split(",")]:
+        torch.set_num_threads(threads)
+        baseline, reference = chunks_per_second(torch_model.embed_documents, texts, args.repeats)
+        reference = normalize(reference)
+        print(f"{'torch':<22} {threads:>7} {baseline:>9.1f} {1:>8.2f} {'':>9} {'':>8}")
+        for onnx_file in onnx_files:
+            model = OnnxEmbeddings(args.onnx_dir, onnx_file, threads=threads, batch_size=EMBEDDING_BATCH_SIZE,
+                                   pooling=EMBEDDING_POOLING)
+            speed, vectors = chunks_per_second(model.embed, texts, args.repeats)
+            agreement = (normalize(vectors) * reference).sum(axis=1)
+            print(f"{'onnx ' + onnx_file:<22} {threads:>7} {speed:>9.1f} {speed / baseline:>8.2f} "
+                  f"{agreement.mean():>9.4f} {agreement.min():>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: single-call structured grading vs the two-call coverage/accuracy path
+
+Grades the student explanations of benchmarks/data/context_eval.json against
+their documents --runs times in each mode (see backend/utils/grading.py) and
+reports latency, LLM calls and the input/output tokens the responses reported
+through the LLM dispatcher. The structured mode also reports how many responses
+failed schema validation and fell back to the two-call path (those runs count
+all three calls).
+
+Runs against Groq (needs GROQ_API_KEY) unless another LLM provider is configured.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_grading [--runs 3] [--show]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+EVAL_SET = os.path.join(os.path.dirname(__file__), "data", "context_eval.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="gradings per explanation and mode")
+    parser.add_argument("--show", action="store_true", help="print the rendered texts of the first run")
+    args = parser.parse_args()
+
+    from backend.utils import rag
+    from backend.utils.grading import grade_separately, grade_structured
+    from backend.utils.llm_dispatcher import llm_dispatcher
+
+    with open(EVAL_SET, encoding="utf-8") as f:
+        eval_set = json.load(f)
+    stores = {name: rag.create_db("\n".join(eval_set["documents"][name])) for name in eval_set["explanations"]}
+    modes = {"separate (2 calls)": grade_separately, "structured (1 call)": grade_structured}
+
+    async def run():
+        results = {}
+        for name, grade in modes.items():
+            seconds = []
+            before = dict(llm_dispatcher.admitted), dict(llm_dispatcher.usage)
+            for run_index in range(args.runs):
+                for document, explanation in eval_set["explanations"].items():
+                    started = time.perf_counter()
+                    grading = await grade(explanation, stores[document])
+                    seconds.append(time.perf_counter() - started)
+                    if args.show and run_index == 0:
+                        print(f"--- {name}, {document}\n{grading['coverage']}\n\n{grading['accuracy']}\n")
+            gradings = len(seconds)
+            calls = sum(llm_dispatcher.admitted.values()) - sum(before[0].values())
+            results[name] = {
+                "mean": statistics.mean(seconds),
+                "p50": statistics.median(seconds),
+                "calls": calls / gradings,
+                "input": (llm_dispatcher.usage["input_tokens"] - before[1]["input_tokens"]) / gradings,
+                "output": (llm_dispatcher.usage["output_tokens"] - before[1]["output_tokens"]) / gradings,
+                "gradings": gradings,
+            }
+        return results
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        for vector_db in stores.values():
+            rag.delete_vector_db(vector_db)
+
+    print(f"{'per grading':<20} {'mean s':>8} {'p50 s':>8} {'calls':>6} {'in tokens':>10} {'out tokens':>11}")
+    for name, result in results.items():
+        print(f"{name:<20} {result['mean']:>8.2f} {result['p50']:>8.2f} {result['calls']:>6.2f} "
+              f"{result['input']:>10.0f} {result['output']:>11.0f}")
+    structured = results["structured (1 call)"]
+    fallbacks = round((structured["calls"] - 1) * structured["gradings"] / 2)
+    print(f"\nstructured responses that failed validation: {fallbacks}/{structured['gradings']}")
+
+
+if __name__ == "__main__":
+    main()
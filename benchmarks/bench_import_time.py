@@ -0,0 +1,85 @@
+"""
+Benchmark: API import time (`python -X importtime -c "import main"`)
+
+Importing main must not create database engines or pull in the ML stack
+(langchain, HuggingFace, Groq, Chroma); those load lazily on first use. This
+script measures the import in a fresh interpreter, lists the heaviest modules
+and exits non-zero when the budget is exceeded or a heavy module is imported
+eagerly. It is the startup-time gate for CI: run it as a build step, or call
+check() from a test and assert it returns no failures.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_import_time [--budget-ms 1500] [--runs 5] [--top 15]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import List, Tuple
+
+# Top-level packages that must only be imported on first use
+LAZY_PACKAGES = (
+    "langchain", "langchain_core", "langchain_community", "langchain_groq", "langchain_huggingface",
+    "langchain_text_splitters", "groq", "chromadb", "sentence_transformers", "transformers", "torch",
+    "PyPDF2",
+)
+BUDGET_MS = 1500.0
+
+
+def measure() -> dict:
+    """Import main in a fresh interpreter; returns {module: cumulative microseconds}"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        env=env, capture_output=True, text=True, check=True
+    ).stderr
+
+    cumulative = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, _, fields = line.partition(":")
+        self_us, cumulative_us, name = (field.strip() for field in fields.split("|"))
+        cumulative[name.strip()] = int(cumulative_us)
+    return cumulative
+
+
+def check(runs: List[dict], budget_ms: float = BUDGET_MS) -> Tuple[float, List[str]]:
+    """Median import time of main in ms and the failed checks (empty when within budget)"""
+    median = statistics.median(run["main"] / 1000 for run in runs)
+    failures = []
+    eager = sorted({name for run in runs for name in run if name.split(".")[0] in LAZY_PACKAGES})
+    if eager:
+        failures.append(f"imported eagerly: {', '.join(eager)}")
+    if median > budget_ms:
+        failures.append(f"median import time {median:.1f}ms exceeds budget {budget_ms:.0f}ms")
+    return median, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS, help="fail above this median import time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="heaviest modules to list")
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    totals = [run["main"] / 1000 for run in runs]
+    median, failures = check(runs, args.budget_ms)
+    last = runs[-1]
+
+    print(f"import main: median {median:.1f}ms, min {min(totals):.1f}ms, max {max(totals):.1f}ms ({args.runs} runs)")
+    print(f"\n{'cumulative':>12}  module")
+    for name, micros in sorted(last.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{micros / 1000:>10.1f}ms  {name}")
+
+    for failure in failures:
+        print(f"\nFAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"\nOK: within {args.budget_ms:.0f}ms budget, ML stack not imported")
+
+
+if __name__ == "__main__":
+    main()
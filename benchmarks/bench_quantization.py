@@ -0,0 +1,98 @@
+"""
+Benchmark: float16 / int8 embedding storage vs full-precision search
+
+Fills a quantized_vectors.VectorMatrix per storage type with the same unit
+vectors and runs the same queries against each, reporting:
+
+- memory: bytes of the in-memory matrix
+- query latency: approximate scoring of every row, top-k, and for the
+  "+ rescore" rows re-scoring the shortlist (--rescore-factor * k) with float32
+  vectors read from a memory-mapped file (standing in for item_embeddings)
+- recall@k: share of the exact float32 top k that each search returns
+
+The vectors are synthetic by default: --size points around --clusters random
+centres, like topic-clustered sentence embeddings, with queries near random
+points. --vectors loads real embeddings instead (a .npy array of shape
+(n, dim), e.g. saved from embed_texts()); queries are then perturbed rows.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_quantization [--size 100000] [--dim 384] [--k 10] [--rescore-factor 4]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+
+def synthetic(size, dim, clusters, rng):
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(clusters, size=size)] + 0.6 * rng.standard_normal((size, dim)).astype(np.float32)
+    return vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000, help="number of stored vectors")
+    parser.add_argument("--dim", type=int, default=384, help="embedding dimension")
+    parser.add_argument("--clusters", type=int, default=500, help="topic clusters of the synthetic vectors")
+    parser.add_argument("--vectors", help=".npy file of real embeddings to use instead")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rescore-factor", type=int, default=4, help="shortlist size as a multiple of k")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from backend.utils.embeddings import normalize
+    from backend.utils.quantized_vectors import STORAGES, VectorMatrix, shortlist, top_k
+
+    rng = np.random.default_rng(args.seed)
+    if args.vectors:
+        vectors = normalize(np.load(args.vectors).astype(np.float32))
+    else:
+        vectors = normalize(synthetic(args.size, args.dim, args.clusters, rng))
+    size, dim = vectors.shape
+    picks = rng.integers(size, size=args.queries)
+    queries = normalize(vectors[picks] + 0.05 * rng.standard_normal((args.queries, dim)).astype(np.float32))
+    positions = np.arange(size)
+    exact = [set(top_k(vectors @ query, args.k)) for query in queries]
+
+    matrices = {}
+    for storage in STORAGES:
+        matrix = VectorMatrix(storage, size, dim)
+        for position, vector in enumerate(vectors):
+            matrix[position] = vector
+        matrices[storage] = matrix
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "vectors.f32")
+        vectors.tofile(path)
+        stored = np.memmap(path, dtype=np.float32, mode="r", shape=(size, dim))
+
+        print(f"{size} vectors x {dim} dims, {args.queries} queries, k={args.k}\n")
+        print(f"{'storage':<18} {'memory MB':>10} {'p50 ms':>8} {'p95 ms':>8} {f'recall@{args.k}':>10}")
+        for storage, matrix in matrices.items():
+            for rescore in ((False,) if storage == "float32" else (False, True)):
+                seconds, recalls = [], []
+                for query, truth in zip(queries, exact):
+                    started = time.perf_counter()
+                    scores = matrix.scores(positions, query)
+                    if rescore:
+                        candidates = shortlist(scores, args.k, storage, args.rescore_factor)
+                        candidates.sort()  # sequential reads from the file
+                        found = candidates[top_k(stored[candidates] @ query, args.k)]
+                    else:
+                        found = top_k(scores, args.k)
+                    seconds.append(time.perf_counter() - started)
+                    recalls.append(len(truth.intersection(found.tolist())) / args.k)
+                seconds.sort()
+                name = storage + (" + rescore" if rescore else "")
+                print(f"{name:<18} {matrix.nbytes / 2 ** 20:>10.1f} {statistics.median(seconds) * 1000:>8.2f} "
+                      f"{seconds[int(0.95 * (len(seconds) - 1))] * 1000:>8.2f} {statistics.mean(recalls):>10.3f}")
+        del stored
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: adaptive retrieval (full text / BM25 + dense) vs embedding every chunk
+
+Every question of benchmarks/data/context_eval.json is asked against its
+document at three sizes:
+
+- single: the document alone (about 700-900 tokens)
+- combined: all eval documents, the question's first
+- large: the question's document buried in shuffled lines of the others,
+  repeated up to --large-tokens
+
+and each retrieval mode (see backend/utils/retrieval.py) prepares the document
+the way a request does, then assembles the context for the question. Reported
+per mode and size: the strategy chosen, prepare and retrieval latency, chunks
+embedded, context tokens and grounding (questions whose evidence phrases all
+made it into the context).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_retrieval [--large-tokens 50000] [--full-text-tokens 1500]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+from collections import Counter
+
+EVAL_SET = os.path.join(os.path.dirname(__file__), "data", "context_eval.json")
+MODES = ("adaptive", "hybrid", "dense")
+
+
+def squash(text):
+    return re.sub(r"\s+", " ", text)
+
+
+def grounded(context, evidence):
+    context = squash(context)
+    return all(squash(phrase) in context for phrase in evidence)
+
+
+def build_documents(documents, large_tokens, seed=0):
+    """{size: {name: text}} for the single, combined and large sizes"""
+    rng = random.Random(seed)
+    sizes = {"single": {}, "combined": {}, "large": {}}
+    for name, lines in documents.items():
+        others = [line for other, other_lines in documents.items() if other != name for line in other_lines]
+        sizes["single"][name] = "\n".join(lines)
+        sizes["combined"][name] = "\n".join(lines + others)
+        filler = []
+        while sum(len(line) for line in filler) < large_tokens * 4:
+            filler.extend(rng.sample(others, len(others)))
+        position = rng.randrange(len(filler))
+        sizes["large"][name] = "\n".join(filler[:position] + lines + filler[position:])
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--large-tokens", type=int, default=50000, help="approximate size of the large documents")
+    parser.add_argument("--full-text-tokens", type=int, help="full text threshold (default RETRIEVAL_FULL_TEXT_TOKENS)")
+    args = parser.parse_args()
+
+    from backend.config import RETRIEVAL_FULL_TEXT_TOKENS
+    from backend.utils.context_builder import estimate_tokens
+    from backend.utils.embeddings import embed_query
+    from backend.utils.retrieval import StudyDocument
+
+    with open(EVAL_SET, encoding="utf-8") as f:
+        eval_set = json.load(f)
+    sizes = build_documents(eval_set["documents"], args.large_tokens)
+    full_text_tokens = args.full_text_tokens or RETRIEVAL_FULL_TEXT_TOKENS
+    embed_query("warm up")  # load the embedding model outside the timings
+
+    questions = len(eval_set["questions"])
+    print(f"{questions} questions; full text up to {full_text_tokens} tokens\n")
+    print(f"{'mode':<9} {'size':<9} {'doc tokens':>10} {'strategy':<10} {'prepare ms':>11} "
+          f"{'retrieve ms':>12} {'embedded':>9} {'ctx tokens':>11} {'grounded':>9}")
+    for mode in MODES:
+        for size, texts in sizes.items():
+            reports, tokens, hits = [], [], 0
+            for item in eval_set["questions"]:
+                # A fresh document per question, like one request
+                document = StudyDocument(texts[item["document"]], mode=mode, full_text_tokens=full_text_tokens)
+                try:
+                    context = document.context(item["question"])
+                finally:
+                    document.close()
+                reports.append(document.report())
+                tokens.append(estimate_tokens(context))
+                hits += grounded(context, item["evidence"])
+            strategy = Counter(report["strategy"] for report in reports).most_common(1)[0][0]
+            print(f"{mode:<9} {size:<9} {statistics.mean(r['document_tokens'] for r in reports):>10.0f} "
+                  f"{strategy:<10} {statistics.mean(r['prepare_ms'] for r in reports):>11.1f} "
+                  f"{statistics.mean(r['retrieve_ms'] for r in reports):>12.1f} "
+                  f"{statistics.mean(r['embedded_chunks'] for r in reports):>9.1f} "
+                  f"{statistics.mean(tokens):>11.0f} {hits:>5}/{questions:<3}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark: vectorized review and bulk reschedule for every scheduler
+
+Usage (from the repository root):
+    python -m benchmarks.bench_scheduler [--cards 1000000] [--repeat 3]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from backend.utils.scheduler import SCHEDULERS, Deck
+
+
+def make_deck(n: int, rng: np.random.Generator) -> Deck:
+    """Random deck with a realistic mix of nests and review ages"""
+    now = np.datetime64("now", "s")
+    reviewed_ago = rng.integers(0, 60 * 86400, n).astype("timedelta64[s]")
+    return Deck(
+        box=rng.integers(1, 5, n),
+        ease=rng.uniform(1.3, 3.0, n),
+        repetitions=rng.integers(0, 12, n),
+        stability=rng.uniform(0.5, 120.0, n),
+        difficulty=rng.uniform(1.0, 10.0, n),
+        last_review=now - reviewed_ago,
+    )
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    deck = make_deck(args.cards, rng)
+    current = deck.last_review + np.timedelta64(1, "D")
+    ratings = rng.integers(1, 5, args.cards)
+    now = np.datetime64("now", "s")
+
+    print(f"{args.cards:,} cards, best of {args.repeat}")
+    print(f"{'scheduler':<10} {'reschedule':>12} {'review':>12} {'cards/s (reschedule)':>22}")
+    for name, scheduler in SCHEDULERS.items():
+        reschedule_s = best_of(args.repeat, lambda: scheduler.reschedule(deck, current))
+        review_s = best_of(args.repeat, lambda: scheduler.review(deck, ratings, now))
+        print(f"{name:<10} {reschedule_s * 1000:>10.1f}ms {review_s * 1000:>10.1f}ms "
+              f"{args.cards / reschedule_s:>22,.0f}")
+
+
+if __name__ == "__main__":
+    main()
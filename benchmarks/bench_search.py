@@ -0,0 +1,106 @@
+"""
+Benchmark: full-text search vs a LIKE scan on a large corpus
+
+Seeds --notes notes and --cards flashcards of random vocabulary into a throwaway
+SQLite database (or the configured database with --use-configured-db), then
+times /search-style queries through backend.utils.search against the
+equivalent case-insensitive LIKE filter.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_search [--notes 50000] [--cards 200000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+VOCABULARY_SIZE = 20000
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def make_text(rng, words, length):
+    return " ".join(rng.choice(words) for _ in range(length))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=50000)
+    parser.add_argument("--cards", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--use-configured-db", action="store_true", help="use DB_BACKEND/.env instead of a temp SQLite file")
+    args = parser.parse_args()
+
+    tmpdir = None
+    if not args.use_configured_db:
+        tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DB_BACKEND"] = "sqlite"
+        os.environ["SQLITE_PATH"] = os.path.join(tmpdir.name, "search.db")
+
+    from sqlalchemy import or_
+    from backend.database import init_db, SessionLocal, NoteModel, FlashcardModel
+    from backend.utils.search import search
+
+    init_db()
+    rng = random.Random(42)
+    words = [f"term{i}" for i in range(VOCABULARY_SIZE)]
+    subject = "Search benchmark"
+
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        for start in range(0, args.notes, 5000):
+            db.bulk_insert_mappings(NoteModel, [
+                {"subject": subject, "title": make_text(rng, words, 5), "content": make_text(rng, words, 150),
+                 "color": "blue.300"}
+                for _ in range(min(5000, args.notes - start))
+            ])
+        for start in range(0, args.cards, 5000):
+            db.bulk_insert_mappings(FlashcardModel, [
+                {"subject": subject, "question": make_text(rng, words, 12), "answer": make_text(rng, words, 25),
+                 "color": "yellow.300", "leitner_box": 1}
+                for _ in range(min(5000, args.cards - start))
+            ])
+        db.commit()
+        print(f"seeded {args.notes} notes, {args.cards} cards in {time.perf_counter() - started:.1f}s "
+              f"({db.get_bind().dialect.name})")
+
+        queries = [" ".join(rng.sample(words, rng.choice([1, 2]))) for _ in range(args.queries)]
+
+        fts_times = []
+        for query in queries:
+            start = time.perf_counter()
+            search(db, query, limit=20)
+            fts_times.append(time.perf_counter() - start)
+
+        like_times = []
+        for query in queries[:max(1, args.queries // 10)]:
+            start = time.perf_counter()
+            terms = query.split()
+            db.query(NoteModel.id).filter(*[
+                or_(NoteModel.title.ilike(f"%{t}%"), NoteModel.content.ilike(f"%{t}%")) for t in terms
+            ]).limit(20).all()
+            db.query(FlashcardModel.id).filter(*[
+                or_(FlashcardModel.question.ilike(f"%{t}%"), FlashcardModel.answer.ilike(f"%{t}%")) for t in terms
+            ]).limit(20).all()
+            like_times.append(time.perf_counter() - start)
+
+        db.query(NoteModel).filter(NoteModel.subject == subject).delete()
+        db.query(FlashcardModel).filter(FlashcardModel.subject == subject).delete()
+        db.commit()
+
+    print(f"{'method':<14} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, values in (("full-text", fts_times), ("LIKE scan", like_times)):
+        print(f"{name:<14} {statistics.fmean(values) * 1000:>7.2f}ms {percentile(values, 50) * 1000:>7.2f}ms "
+              f"{percentile(values, 95) * 1000:>7.2f}ms {percentile(values, 99) * 1000:>7.2f}ms")
+
+    if tmpdir:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
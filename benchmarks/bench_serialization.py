@@ -0,0 +1,92 @@
+"""
+Benchmark: list response serialization for flashcards
+
+Compares the old path (ORM entities -> hand-built dicts -> jsonable_encoder -> json)
+with column tuples encoded by orjson, on an in-memory SQLite copy of the schema.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_serialization [--rows 10000 50000] [--repeat 5]
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base, FlashcardModel
+from backend.utils.serialization import FLASHCARD_COLUMNS, FLASHCARD_FIELDS, json_rows
+
+
+def orm_path(db):
+    cards = db.query(FlashcardModel).all()
+    result = []
+    for card in cards:
+        result.append({
+            "id": card.id,
+            "subject": card.subject,
+            "question": card.question,
+            "answer": card.answer,
+            "color": card.color,
+            "leitner_box": getattr(card, 'leitner_box', 1) or 1,
+            "next_review": getattr(card, 'next_review', None),
+            "review_history": getattr(card, 'review_history', None)
+        })
+    return json.dumps(jsonable_encoder(result)).encode()
+
+
+def tuple_path(db):
+    return json_rows(FLASHCARD_FIELDS, db.query(*FLASHCARD_COLUMNS).all()).body
+
+
+def populate(db, rows: int):
+    now = datetime.now()
+    db.bulk_insert_mappings(FlashcardModel, [
+        {
+            "subject": f"Subject {i % 20}",
+            "question": f"What is concept number {i} and why does it matter?",
+            "answer": f"Concept {i} is a short factual answer used for recall practice.",
+            "color": "yellow.300",
+            "timestamp": now,
+            "leitner_box": i % 4 + 1,
+            "next_review": now + timedelta(hours=i % 72),
+        }
+        for i in range(rows)
+    ])
+    db.commit()
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'orm+jsonable_encoder':>22} {'tuples+orjson':>15} {'speedup':>8} {'bytes':>12}")
+    for rows in args.rows:
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        populate(db, rows)
+
+        old = best_of(args.repeat, lambda: (orm_path(db), db.expunge_all()))
+        new = best_of(args.repeat, lambda: tuple_path(db))
+        size = len(tuple_path(db))
+        print(f"{rows:>8} {old * 1000:>20.1f}ms {new * 1000:>13.1f}ms {old / new:>7.1f}x {size:>12,}")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
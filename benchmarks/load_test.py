@@ -0,0 +1,157 @@
+"""
+Load test: endpoint throughput at increasing client concurrency
+
+Start the API first (once with DB_ASYNC=false, once with DB_ASYNC=true to compare),
+point it at a local Postgres or an SQLite stand-in, then run:
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --concurrency 50 100 200 500
+
+Each level runs for --duration seconds with a mixed workload and reports throughput
+and latency percentiles. The default "crud" workload lists notes and flashcards,
+fetches due cards and posts reviews. The "ai" workload grades explanations (some
+as audio uploads), summarizes documents and generates flashcards from the
+documents in benchmarks/data/context_eval.json; start the API with
+LLM_PROVIDER=mock (and LLM_REQUESTS_PER_MINUTE=0 LLM_TOKENS_PER_MINUTE=0 to take
+the rate limiter out) to run it offline and reproducibly:
+    python -m benchmarks.load_test --workload ai --concurrency 1 4 16 --seed 1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+
+import httpx
+
+SEED_CARDS = 200
+SEED_NOTES = 50
+RESULTS = ["again", "hard", "good", "easy"]
+EVAL_SET = os.path.join(os.path.dirname(__file__), "data", "context_eval.json")
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def seed(client: httpx.AsyncClient) -> list:
+    """Make sure there is data to read and review; returns flashcard ids"""
+    cards = (await client.get("/flashcards/")).json()
+    for i in range(max(0, SEED_CARDS - len(cards))):
+        await client.post("/flashcards/", json={
+            "subject": f"Load test {i % 5}", "question": f"Load test question {i}",
+            "answer": f"Answer {i}", "color": "yellow.300"
+        })
+    notes = (await client.get("/notes/")).json()
+    for i in range(max(0, SEED_NOTES - len(notes))):
+        await client.post("/notes/", json={
+            "subject": f"Load test {i % 5}", "title": f"Note {i}",
+            "content": "Load test note content " * 20, "color": "blue.300"
+        })
+    return [card["id"] for card in (await client.get("/flashcards/")).json()]
+
+
+def pick_request(card_ids: list):
+    roll = random.random()
+    if roll < 0.35:
+        return "GET", "/flashcards/", {}
+    if roll < 0.55:
+        return "GET", "/notes/", {}
+    if roll < 0.70:
+        return "GET", "/flashcards/subjects", {}
+    if roll < 0.85:
+        return "GET", "/flashcards/due?limit=20", {}
+    return "POST", f"/flashcards/review/{random.choice(card_ids)}", {"json": {"result": random.choice(RESULTS)}}
+
+
+def ai_requests(eval_set: dict):
+    """Request picker for the LLM-backed endpoints"""
+    documents = {name: "\n".join(lines) for name, lines in eval_set["documents"].items()}
+    explanations = eval_set["explanations"]
+
+    def pick(_):
+        name = random.choice(sorted(explanations))
+        roll = random.random()
+        if roll < 0.3:
+            return "POST", "/grade", {"data": {"text": explanations[name], "content": documents[name],
+                                               "content_type": "Text"}}
+        if roll < 0.4:
+            return "POST", "/grade", {"data": {"content": documents[name], "content_type": "Text"},
+                                      "files": {"audio": ("explanation.mp3", b"\0" * 4096, "audio/mpeg")}}
+        if roll < 0.7:
+            return "POST", "/summarize", {"data": {"content": documents[name], "content_type": "Text"}}
+        return "POST", "/flashcards/generate", {"json": {"source_type": "summary", "content": documents[name],
+                                                         "subject": "Load test AI", "on_duplicate": "keep"}}
+    return pick
+
+
+async def run_level(url: str, concurrency: int, duration: float, card_ids: list, pick=pick_request) -> dict:
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                method, path, body = pick(card_ids)
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, **body)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "errors": errors,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+async def main_async(args):
+    random.seed(args.seed)
+    if args.workload == "ai":
+        with open(EVAL_SET, encoding="utf-8") as f:
+            pick, card_ids = ai_requests(json.load(f)), []
+    else:
+        pick = pick_request
+        async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+            card_ids = await seed(client)
+
+    print(f"{'clients':>8} {'requests':>9} {'req/s':>9} {'errors':>7} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for concurrency in args.concurrency:
+        r = await run_level(args.url, concurrency, args.duration, card_ids, pick)
+        print(f"{r['concurrency']:>8} {r['requests']:>9} {r['rps']:>9.1f} {r['errors']:>7} "
+              f"{r['mean_ms']:>7.1f}ms {r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms {r['p99_ms']:>7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 100, 200, 500])
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per concurrency level")
+    parser.add_argument("--workload", choices=["crud", "ai"], default="crud")
+    parser.add_argument("--seed", type=int, help="random seed for a reproducible request mix")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,27 @@
 """
 Main FastAPI application
 """
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from backend.routes import study, notes, flashcards
+from backend.config import DB_ASYNC
+from backend.database import init_db, close_db
+from backend.utils.embeddings import get_embedding_batcher
+from backend.utils.llm_dispatcher import llm_dispatcher
+from backend.routes import study, notes, flashcards, search, sync
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Connect and create tables at startup rather than when modules are imported
+    init_db()
+    yield
+    await close_db()
 
-app = FastAPI(title="StudyKeet API", version="1.0.0")
+
+app = FastAPI(title="StudyKeet API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -18,9 +33,17 @@ app.add_middleware(
 )
 
 # Include routers
+if DB_ASYNC:
+    # Registered first so the async CRUD routes take precedence over their sync versions
+    from backend.routes import notes_async, flashcards_async
+    app.include_router(notes_async.router, tags=["Notes"])
+    app.include_router(flashcards_async.router, tags=["Flashcards"])
+
 app.include_router(study.router, tags=["Study"])
 app.include_router(notes.router, tags=["Notes"])
 app.include_router(flashcards.router, tags=["Flashcards"])
+app.include_router(search.router, tags=["Search"])
+app.include_router(sync.router, tags=["Sync"])
 
 
 @app.get("/")
@@ -31,3 +54,15 @@ def root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/llm/metrics")
+def llm_metrics():
+    """LLM dispatcher queue depth, wait times and coalescing counts"""
+    return llm_dispatcher.metrics()
+
+
+@app.get("/embeddings/metrics")
+def embedding_metrics():
+    """Embedding batcher batch sizes, queue waits and inference times"""
+    return get_embedding_batcher().metrics()
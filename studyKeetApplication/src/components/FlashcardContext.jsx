@@ -2,6 +2,9 @@ import React, { createContext, useState, useEffect } from "react";
 import axios from "axios";
 export const FlashcardContext = createContext();
 
+// Number of due cards loaded per Leitner session
+const SESSION_BATCH_SIZE = 50;
+
 export const FlashcardProvider = ({ children }) => {
   const [flashcards, setFlashcards] = useState([]);
   const [subjects, setSubjects] = useState([]);
@@ -101,12 +104,19 @@ export const FlashcardProvider = ({ children }) => {
     console.log("Subjects updated:", subjects);
   }, [subjects]);
 
-  // Fetch cards due for review
-  const fetchDueFlashcards = async (subject = "") => {
+  // Fetch cards due for review (limit = how many to load for this session)
+  const fetchDueFlashcards = async (subject = "", limit = SESSION_BATCH_SIZE) => {
     try {
-      let url = `http://127.0.0.1:8000/flashcards/due`;
+      const params = new URLSearchParams();
       if (subject) {
-        url += `?subject=${subject}`;
+        params.append("subject", subject);
+      }
+      if (limit) {
+        params.append("limit", limit);
+      }
+      let url = `http://127.0.0.1:8000/flashcards/due`;
+      if (params.toString()) {
+        url += `?${params.toString()}`;
       }
       const response = await axios.get(url);
       setSessionCards(response.data);
@@ -142,6 +152,19 @@ export const FlashcardProvider = ({ children }) => {
     }
   };
 
+  // Submit a queued list of reviews ({ card_id, result, reviewed_at }) in one request
+  const submitReviews = async (reviews) => {
+    try {
+      const response = await axios.post(`http://127.0.0.1:8000/flashcards/review/batch`, {
+        reviews: reviews
+      });
+      return response.data;
+    } catch (error) {
+      console.error("Error submitting reviews:", error);
+      throw error;
+    }
+  };
+
   // Get session statistics
   const fetchSessionStats = async () => {
     try {
@@ -181,6 +204,7 @@ export const FlashcardProvider = ({ children }) => {
         sessionStats,
         fetchDueFlashcards,
         markFlashcard,
+        submitReviews,
         fetchSessionStats,
         fetchSessionPreview,
         resetFlashcard
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useContext } from "react";
+import React, { useState, useEffect, useContext, useRef } from "react";
 import {
   Modal,
   ModalOverlay,
@@ -18,13 +18,17 @@ import { CloseIcon, CheckIcon, CloseIcon as XIcon } from "@chakra-ui/icons";
 import { FlashcardContext } from "./FlashcardContext.jsx";
 import "./FlashcardGrid.css";
 
+// Ratings are queued and sent to /flashcards/review/batch every few cards and at session end
+const REVIEW_FLUSH_SIZE = 10;
+
 const LeitnerSession = ({ isOpen, onClose, questionFirst, subjectFilter }) => {
-  const { sessionCards, markFlashcard, fetchDueFlashcards } = useContext(FlashcardContext);
+  const { sessionCards, submitReviews, fetchDueFlashcards } = useContext(FlashcardContext);
   const [localIndex, setLocalIndex] = useState(0);
   const [isFlipped, setIsFlipped] = useState(false);
   const [sessionResults, setSessionResults] = useState({ again: 0, hard: 0, good: 0, easy: 0 });
   const [isComplete, setIsComplete] = useState(false);
   const [localCards, setLocalCards] = useState([]);
+  const pendingReviews = useRef([]);
   const toast = useToast();
 
   const currentCard = localCards[localIndex];
@@ -75,27 +79,15 @@ const LeitnerSession = ({ isOpen, onClose, questionFirst, subjectFilter }) => {
     setIsFlipped(true);
   };
 
-  const handleAnswer = async (result) => {
-    if (!currentCard) return;
-
+  // Send the queued ratings in one request; they stay queued if it fails
+  const flushReviews = async () => {
+    const reviews = pendingReviews.current;
+    if (reviews.length === 0) return;
+    pendingReviews.current = [];
     try {
-      await markFlashcard(currentCard.id, result);
-      
-      // Update results
-      setSessionResults(prev => ({
-        ...prev,
-        [result]: prev[result] + 1
-      }));
-
-      // Move to next card
-      if (localIndex < totalCards - 1) {
-        setLocalIndex(localIndex + 1);
-        setIsFlipped(false);
-      } else {
-        // Session complete
-        setIsComplete(true);
-      }
+      await submitReviews(reviews);
     } catch (error) {
+      pendingReviews.current = [...reviews, ...pendingReviews.current];
       toast({
         title: "Error saving progress",
         status: "error",
@@ -105,7 +97,37 @@ const LeitnerSession = ({ isOpen, onClose, questionFirst, subjectFilter }) => {
     }
   };
 
+  const handleAnswer = async (result) => {
+    if (!currentCard) return;
+
+    pendingReviews.current.push({
+      card_id: currentCard.id,
+      result: result,
+      reviewed_at: new Date().toISOString()
+    });
+
+    // Update results
+    setSessionResults(prev => ({
+      ...prev,
+      [result]: prev[result] + 1
+    }));
+
+    // Move to next card
+    if (localIndex < totalCards - 1) {
+      setLocalIndex(localIndex + 1);
+      setIsFlipped(false);
+      if (pendingReviews.current.length >= REVIEW_FLUSH_SIZE) {
+        await flushReviews();
+      }
+    } else {
+      // Session complete
+      await flushReviews();
+      setIsComplete(true);
+    }
+  };
+
   const handleClose = () => {
+    flushReviews();
     setLocalIndex(0);
     setIsFlipped(false);
     setIsComplete(false);
@@ -115,6 +137,7 @@ const LeitnerSession = ({ isOpen, onClose, questionFirst, subjectFilter }) => {
   };
 
   const handleRestart = async () => {
+    await flushReviews();
     const newCards = await fetchDueFlashcards(subjectFilter);
     setLocalCards([...newCards]);
     setLocalIndex(0);
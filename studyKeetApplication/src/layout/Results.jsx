@@ -139,20 +139,41 @@ export default function Results() {
         throw new Error("Unknown option type");
       }
 
-      // Call LLM to generate flashcards (don't save yet)
-      const llmResponse = await axios.post("http://127.0.0.1:8000/flashcards/generate-preview", {
-        source_type: sourceType,
-        content: content
+      // Call LLM to generate flashcards (don't save yet); cards stream in as NDJSON lines
+      // and the preview opens with the first one
+      const response = await fetch("http://127.0.0.1:8000/flashcards/generate-preview/stream", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ source_type: sourceType, content: content })
       });
+      if (!response.ok) {
+        const body = await response.json().catch(() => ({}));
+        throw new Error(body.detail || "Failed to generate flashcards");
+      }
 
-      if (llmResponse.data.flashcards && llmResponse.data.flashcards.length > 0) {
-        // Store flashcards for preview with subject
-        setPreviewFlashcards(llmResponse.data.flashcards.map(card => ({
-          ...card,
-          subject: savedContentType || "General"
-        })));
-        onPreviewOpen();
-      } else {
+      setPreviewFlashcards([]);
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let received = 0;
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop();
+        for (const line of lines) {
+          if (!line.trim()) continue;
+          const event = JSON.parse(line);
+          if (event.type === "error") throw new Error(event.detail);
+          if (event.type !== "card") continue;
+          received += 1;
+          setPreviewFlashcards(prev => [...prev, { ...event.flashcard, subject: savedContentType || "General" }]);
+          if (received === 1) onPreviewOpen();
+        }
+      }
+
+      if (received === 0) {
         toast({
           title: "No flashcards generated",
           description: "The AI couldn't extract flashcards from this content.",
@@ -180,22 +201,24 @@ export default function Results() {
   const handleSaveFlashcards = async () => {
     setIsSaving(true);
     try {
-      // Save all approved flashcards
+      // Save all approved flashcards in one request; near duplicates of existing cards are skipped
       const colors = ["yellow.300", "pink.300", "blue.300", "green.300", "purple.300"];
-      
-      for (let i = 0; i < previewFlashcards.length; i++) {
-        const card = previewFlashcards[i];
-        await axios.post("http://127.0.0.1:8000/flashcards", {
+
+      const response = await axios.post("http://127.0.0.1:8000/flashcards/bulk", {
+        flashcards: previewFlashcards.map((card, i) => ({
           subject: card.subject,
           question: card.q || card.question,
           answer: card.a || card.answer,
           color: colors[i % colors.length]
-        });
-      }
+        }))
+      });
+      const { count, skipped } = response.data;
 
       toast({
         title: "Flashcards Saved!",
-        description: `Saved ${previewFlashcards.length} flashcards. Redirecting...`,
+        description: skipped > 0
+          ? `Saved ${count} flashcards, skipped ${skipped} duplicates. Redirecting...`
+          : `Saved ${count} flashcards. Redirecting...`,
         status: "success",
         duration: 3000,
         isClosable: true,
@@ -549,7 +572,7 @@ export default function Results() {
               <Button
                 colorScheme="green"
                 onClick={handleSaveFlashcards}
-                isDisabled={previewFlashcards.length === 0}
+                isDisabled={previewFlashcards.length === 0 || isGenerating}
                 isLoading={isSaving}
                 loadingText="Saving..."
                 px={8}